@@ -6,7 +6,7 @@ from loguru import logger
 
 from env import Env
 from schemas.config import ConfigModel, RunEnvironment
-from sdk import yaml_to_model, relpath
+from sdk import yaml_to_model, relpath, configure_pools, configure_breakers
 
 __all__ = ["init_config"]
 
@@ -43,3 +43,7 @@ def init_config(run_type: RunEnvironment) -> None:
     )
     sys.stdout.reconfigure(encoding="utf-8")
     logger.success("Logger initialized.")
+
+    # --- Network initialization
+    configure_pools(Env.config.network.pool.default_size, Env.config.network.pool.hosts)
+    configure_breakers(Env.config.network.breaker.failure_threshold, Env.config.network.breaker.reset_timeout)
@@ -4,6 +4,7 @@ from internal.dmdata import DMDataFetcher
 from internal.geojson import GeoJson
 from internal.intensity2color import IntensityToColor
 from internal.pswave import PSWave
+from internal.tiles import VectorTiles
 from schemas.config import ConfigModel, RunEnvironment
 
 __all__ = ["Env"]
@@ -27,6 +28,7 @@ class _Env:
         self._pswave_instance = None
         self._dmdata_instance = None
         self._db_instance = None
+        self._tiles_instance = None
 
     @property
     def run_env(self) -> RunEnvironment:
@@ -123,6 +125,16 @@ class _Env:
         verify_type(instance, Database)
         self._db_instance = instance
 
+    @property
+    def tiles_instance(self) -> VectorTiles:
+        verify_none(self._tiles_instance)
+        return self._tiles_instance
+
+    @tiles_instance.setter
+    def tiles_instance(self, instance: VectorTiles) -> None:
+        verify_type(instance, VectorTiles)
+        self._tiles_instance = instance
+
     @property
     def eew_debugging_enabled(self) -> bool:
         return Env.config.debug.kmoni_eew.enabled or \
@@ -2,6 +2,7 @@ from loguru import logger
 
 from schemas.centroid import CentroidModel, LatLngModel, CentroidModelWithRegion, LatLngModelWithRegion, \
     ObsStationsCentroidModel, AreaToPositionCentroidModel
+from schemas.compact import CompactDictionaryModel, CompactAreasModel, CompactStationsModel
 from sdk import func_timer, read_csv, relpath, verify_none, todo, read_json, obj_to_model
 
 
@@ -18,10 +19,16 @@ class Centroid:
         self._station_centroid = CentroidModelWithRegion()
         self._eq_station_centroid: list[ObsStationsCentroidModel] = []
         self._area_to_position_centroid = AreaToPositionCentroidModel()
+        self._compact_dictionary: CompactDictionaryModel | None = None
+        # Name -> index in the compact dictionary
+        self._area_index: dict[str, int] = {}
+        self._station_index: dict[str, int] = {}
+        self._eq_station_index: dict[str, int] = {}
         self._init_area_centroid()
         self._init_station_centroid()
         self._init_earthquake_station_centroid()
         self._init_area_to_position_centroid()
+        self._init_compact_dictionary()
         logger.success("Centroid instance initialized.")
 
     def refresh_stations(self) -> None:
@@ -100,6 +107,44 @@ class Centroid:
             AreaToPositionCentroidModel
         )
 
+    @func_timer
+    def _init_compact_dictionary(self) -> None:
+        """
+        Initializes the compact (v2) dictionary of areas and stations, with the name -> index lookups.
+        """
+        areas = CompactAreasModel()
+        area_code_index: dict[str, int] = {}
+        for code, area in self._area_to_position_centroid.content.items():
+            area_code_index[code] = len(areas.code)
+            self._area_index.setdefault(area.name, len(areas.code))
+            areas.code.append(code)
+            areas.name.append(area.name)
+            areas.latitude.append(float(area.position[0]))
+            areas.longitude.append(float(area.position[1]))
+
+        stations = CompactStationsModel()
+        for name, station in self._station_centroid.content.items():
+            self._station_index[name] = len(stations.name)
+            stations.name.append(name)
+            stations.area.append(area_code_index.get(station.region_code, -1))
+            stations.latitude.append(float(station.latitude))
+            stations.longitude.append(float(station.longitude))
+
+        eq_stations = CompactStationsModel()
+        for station in self._eq_station_centroid:
+            # Same key as IntensityToColor's station intensities
+            self._eq_station_index.setdefault(station.region + station.name, len(eq_stations.name))
+            eq_stations.name.append(station.region + station.name)
+            eq_stations.area.append(area_code_index.get(station.sub_region_code, -1))
+            eq_stations.latitude.append(float(station.location.latitude))
+            eq_stations.longitude.append(float(station.location.longitude))
+
+        self._compact_dictionary = CompactDictionaryModel(
+            areas=areas,
+            stations=stations,
+            observation_stations=eq_stations
+        )
+
     @property
     def area_centroid(self) -> CentroidModel:
         return self._area_centroid
@@ -115,3 +160,19 @@ class Centroid:
     @property
     def area_position_centroid(self) -> AreaToPositionCentroidModel:
         return self._area_to_position_centroid
+
+    @property
+    def compact_dictionary(self) -> CompactDictionaryModel:
+        return self._compact_dictionary
+
+    @property
+    def area_index(self) -> dict[str, int]:
+        return self._area_index
+
+    @property
+    def station_index(self) -> dict[str, int]:
+        return self._station_index
+
+    @property
+    def earthquake_station_index(self) -> dict[str, int]:
+        return self._eq_station_index
@@ -0,0 +1,154 @@
+from typing import Iterable
+
+from loguru import logger
+
+from schemas.compact import CompactIntensitiesModel, CompactEEWModel, CompactEarthquakeModel, \
+    CompactEarthquakeInfoModel
+from schemas.eew import EEWParseReturnModel, EEWConvertedIntensityEnum
+from schemas.p2p_info import EarthquakeInfoReturnModel, EarthquakeReturnModel, EarthquakePointsScaleEnum
+
+__all__ = ["CompactConverter"]
+
+
+class CompactConverter:
+    """
+    Converts the API models into the compact (v2) wire schema,
+     where areas and stations are indices into Centroid.compact_dictionary.
+    """
+
+    @classmethod
+    def intensity_code(cls, intensity_name: str) -> int:
+        """
+        Converts an intensity enum member name into the numeric intensity code.
+        :param intensity_name: e.g. "five_lower"
+        :return: e.g. 45, 0 if no intensity
+        """
+        member = EarthquakePointsScaleEnum.__members__.get(intensity_name)
+        return member.value if member is not None else 0
+
+    @classmethod
+    def _intensities(cls, names: Iterable[str], codes: Iterable[int],
+                     index: dict[str, int]) -> CompactIntensitiesModel:
+        """
+        Converts named intensities into the columnar model. Shall not be used externally.
+        :param names: The area/station names
+        :param codes: The intensity codes
+        :param index: Name -> index in the dictionary
+        :return: The columnar intensities, without the names not in the dictionary
+        """
+        model = CompactIntensitiesModel()
+        for name, code in zip(names, codes):
+            position = index.get(name)
+            if position is None:
+                logger.trace(f"{name} is not in the compact dictionary.")
+                continue
+            model.index.append(position)
+            model.intensity.append(code)
+        return model
+
+    @classmethod
+    def convert_eew(cls, eew: EEWParseReturnModel) -> CompactEEWModel:
+        """
+        Converts an EEW.
+        :param eew: The EEW
+        :return: The compact EEW
+        """
+        from env import Env
+        stations = CompactIntensitiesModel(detail=[])
+        station_index = Env.centroid_instance.earthquake_station_index
+        for name, station in (eew.area_intensity or {}).items():
+            position = station_index.get(name)
+            if position is None:
+                logger.trace(f"{name} is not in the compact dictionary.")
+                continue
+            stations.index.append(position)
+            stations.intensity.append(cls._converted_code(station.intensity))
+            stations.detail.append(station.detail_intensity)
+        areas = eew.area_coloring.areas or {}
+        return CompactEEWModel(
+            status=eew.status,
+            type=eew.type,
+            is_plum=eew.is_plum,
+            is_cancel=eew.is_cancel,
+            is_test=eew.is_test,
+            max_intensity=cls.intensity_code(eew.max_intensity.name),
+            max_lg_intensity=int(eew.max_lg_intensity.value or 0),
+            report_time=eew.report_time,
+            report_timestamp=eew.report_timestamp,
+            report_num=eew.report_num,
+            report_flag=eew.report_flag,
+            report_id=eew.report_id,
+            occur_timestamp=eew.occur_timestamp,
+            is_final=eew.is_final,
+            magnitude=eew.magnitude,
+            hypocenter=eew.hypocenter,
+            stations=stations,
+            areas=cls._intensities(
+                areas.keys(),
+                (cls._converted_code(i.intensity) for i in areas.values()),
+                Env.centroid_instance.area_index
+            ),
+            recommended_areas=eew.area_coloring.recommended_areas,
+            s_wave=eew.s_wave,
+            p_wave=eew.p_wave
+        )
+
+    @classmethod
+    def _converted_code(cls, intensity: str) -> int:
+        """
+        Converts a converted intensity string (e.g. "5-") into the numeric intensity code.
+        Shall not be used externally.
+        :param intensity: The converted intensity
+        :return: The intensity code, 0 if no intensity
+        """
+        try:
+            return cls.intensity_code(EEWConvertedIntensityEnum(intensity).name)
+        except ValueError:
+            return 0
+
+    @classmethod
+    def convert_earthquake(cls, earthquake: EarthquakeReturnModel) -> CompactEarthquakeModel:
+        """
+        Converts an earthquake report.
+        :param earthquake: The earthquake report
+        :return: The compact earthquake report
+        """
+        from env import Env
+        area_intensity = earthquake.area_intensity
+        areas = area_intensity.areas if area_intensity else {}
+        stations = area_intensity.station if area_intensity else {}
+        return CompactEarthquakeModel(
+            id=earthquake.id,
+            type=earthquake.type,
+            occur_time=earthquake.occur_time,
+            receive_time=earthquake.receive_time,
+            magnitude=earthquake.magnitude,
+            max_intensity=cls.intensity_code(earthquake.max_intensity.name),
+            tsunami_comments=earthquake.tsunami_comments,
+            hypocenter=earthquake.hypocenter,
+            stations=cls._intensities(
+                stations.keys(),
+                (i.intensity_code.value for i in stations.values()),
+                Env.centroid_instance.station_index
+            ),
+            areas=cls._intensities(
+                areas.keys(),
+                (i.intensity_code.value for i in areas.values()),
+                Env.centroid_instance.area_index
+            )
+        )
+
+    @classmethod
+    def convert_earthquake_info(cls, info: EarthquakeInfoReturnModel) -> CompactEarthquakeInfoModel:
+        """
+        Converts the earthquake info (reports + EEW).
+        :param info: The earthquake info
+        :return: The compact earthquake info
+        """
+        eew = info.eew
+        if isinstance(eew, EEWParseReturnModel):
+            eew = cls.convert_eew(eew)
+        return CompactEarthquakeInfoModel(
+            info=[cls.convert_earthquake(i) for i in info.info],
+            eew=eew
+        )
@@ -3,6 +3,7 @@ import platform
 
 from loguru import logger
 
+from internal.dmdata.decoder import Telegram
 from models import DbMessages
 from schemas.dmdata.socket import DmdataSocketData
 
@@ -15,7 +16,7 @@ def store_message_middleware(*params):
     asyncio.run(store_message(*params))
 
 
-async def store_message(message: DmdataSocketData, xml_message: dict):
+async def store_message(message: DmdataSocketData, telegram: Telegram):
     """Stores data message to the database."""
     base = message.xmlReport
     if base is None:
@@ -38,7 +39,7 @@ async def store_message(message: DmdataSocketData, xml_message: dict):
             event_id=base.head.event_id,
             serial=serial,
             event_time=base.head.target_date,
-            data=xml_message
+            data=telegram.to_dict()
         )
         session.add(message)
         await session.commit()
@@ -0,0 +1,282 @@
+import base64
+import functools
+import zlib
+from typing import Iterator, Optional, Type, Any, get_args
+from xml.etree import ElementTree
+
+import xmltodict
+from loguru import logger
+from pydantic import BaseModel, AliasChoices
+from pydantic.fields import FieldInfo
+
+from schemas.dmdata.generic import DmdataMessageTypes
+from schemas.jma.earthquake.destination import JMADestinationModel
+from schemas.jma.earthquake.epicenter_update import JMAEpicenterUpdateModel
+from schemas.jma.earthquake.intensity_destination import JMAIntDestModel
+from schemas.jma.earthquake.intensity_report import JMAIntReportModel
+from schemas.jma.eew import JMAEEWApiModel
+from schemas.jma.tsunami_expectation import JMATsunamiExpectationApiModel
+from schemas.jma.tsunami_watch import JMATsunamiWatchApiModel
+
+__all__ = ["Telegram", "decode_telegram", "telegram_to_model"]
+
+# Base64 characters read at once
+_CHUNK_SIZE = 16384
+# zlib window bits accepting the gzip container
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# Message type -> (the typed model, whether the model is of the Report element instead of the whole telegram)
+TELEGRAM_MODELS: dict[DmdataMessageTypes, tuple[Type[BaseModel], bool]] = {
+    DmdataMessageTypes.eew_forecast: (JMAEEWApiModel, False),
+    DmdataMessageTypes.eew_warning: (JMAEEWApiModel, False),
+    DmdataMessageTypes.eq_intensity_report: (JMAIntReportModel, True),
+    DmdataMessageTypes.eq_destination: (JMADestinationModel, True),
+    DmdataMessageTypes.eq_intensity_destination: (JMAIntDestModel, True),
+    DmdataMessageTypes.eq_destination_change: (JMAEpicenterUpdateModel, True),
+    DmdataMessageTypes.tsunami_warning: (JMATsunamiExpectationApiModel, False),
+    DmdataMessageTypes.tsunami_info: (JMATsunamiWatchApiModel, False)
+}
+
+
+class _Names(dict):
+    """
+    ElementTree name ({uri}local) -> the name as written in the telegram (prefix:local), as xmltodict names it.
+    Filled as names are looked up.
+    Shall not be used externally.
+    """
+
+    def __init__(self, prefixes: dict[str, str]):
+        """
+        Initializes the names.
+        :param prefixes: Namespace URI -> prefix of the telegram
+        """
+        super().__init__()
+        self._prefixes = prefixes
+
+    def __missing__(self, name: str) -> str:
+        qualified = name
+        if name.startswith("{"):
+            uri, local = name[1:].split("}", 1)
+            prefix = self._prefixes.get(uri, "")
+            qualified = f"{prefix}:{local}" if prefix else local
+        self[name] = qualified
+        return qualified
+
+
+# Element name -> what is read of it (a plan of the same form), None for the whole element
+_Plan = dict[str, Optional["_Plan"]]
+
+
+def _field_names(name: str, field: FieldInfo) -> list[str]:
+    """
+    Gets the names a field is read from.
+    Shall not be used externally.
+
+    :param name: The field name
+    :param field: The field
+    :return: The names
+    """
+    names = [name]
+    if isinstance(field.validation_alias, AliasChoices):
+        names += [i for i in field.validation_alias.choices if isinstance(i, str)]
+    elif isinstance(field.validation_alias, str):
+        names.append(field.validation_alias)
+    if field.alias:
+        names.append(field.alias)
+    return names
+
+
+def _annotation_models(annotation: Any) -> tuple[list[Type[BaseModel]], bool]:
+    """
+    Gets the models declared in an annotation (e.g. Optional[list[Model] | Model]).
+    Shall not be used externally.
+
+    :param annotation: The annotation
+    :return: The models, whether anything else is declared as well
+    """
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return [annotation], False
+    args = [i for i in get_args(annotation) if i is not type(None)]
+    if not args:
+        return [], True
+    models, others = [], False
+    for i in args:
+        arg_models, arg_others = _annotation_models(i)
+        models += arg_models
+        others = others or arg_others
+    return models, others
+
+
+def _merge_plans(plans: list[Optional[_Plan]]) -> Optional[_Plan]:
+    """
+    Merges plans, so that whatever any of them reads is read.
+    Shall not be used externally.
+
+    :param plans: The plans
+    :return: The plan
+    """
+    if any(i is None for i in plans):
+        return None
+    merged: dict[str, list[Optional[_Plan]]] = {}
+    for plan in plans:
+        for name, sub_plan in plan.items():
+            merged.setdefault(name, []).append(sub_plan)
+    return {name: _merge_plans(sub_plans) for name, sub_plans in merged.items()}
+
+
+@functools.cache
+def _model_plan(model: Type[BaseModel]) -> _Plan:
+    """
+    Generates the plan of a model: the elements its fields declare, and what is read of them.
+    Shall not be used externally.
+
+    :param model: The model
+    :return: The plan
+    """
+    plan: dict[str, list[Optional[_Plan]]] = {}
+    for name, field in model.model_fields.items():
+        models, others = _annotation_models(field.annotation)
+        # Values that aren't models (text, mostly) are read as a whole.
+        sub_plan = _merge_plans([_model_plan(i) for i in models] + ([None] if others else []))
+        for i in _field_names(name, field):
+            plan.setdefault(i, []).append(sub_plan)
+    return {name: _merge_plans(sub_plans) for name, sub_plans in plan.items()}
+
+
+class Telegram:
+    """
+    A decoded DMData telegram.
+    Typed models are validated from the parsed elements they declare only;
+     the dict form that xmltodict makes of the whole telegram is only made when asked for, e.g. for storing.
+    """
+
+    def __init__(self, xml: bytes, root: ElementTree.Element, prefixes: dict[str, str]):
+        """
+        Initializes the telegram.
+        :param xml: The XML
+        :param root: The parsed root element
+        :param prefixes: Namespace URI -> prefix of the telegram
+        """
+        self.xml = xml
+        self._root = root
+        self._names = _Names(prefixes)
+        self._dict: Optional[dict] = None
+
+    def to_dict(self) -> dict:
+        """
+        Converts the whole telegram into its dict form, once.
+        :return: The telegram as dict
+        """
+        if self._dict is None:
+            self._dict = xmltodict.parse(self.xml, encoding="utf-8")
+        return self._dict
+
+    def validate(self, model: Type[BaseModel], report_only: bool = False) -> BaseModel:
+        """
+        Validates the telegram as a typed model.
+        :param model: The model
+        :param report_only: Whether the model is of the Report element instead of the whole telegram
+        :return: The model
+        """
+        plan = _model_plan(model)
+        if report_only:
+            return model.model_validate(self._convert(self._root, plan))
+        # The whole telegram has the root element as its only key.
+        name = self._names[self._root.tag]
+        return model.model_validate({name: self._convert(self._root, plan[name])} if name in plan else {})
+
+    def _convert(self, element: ElementTree.Element, plan: Optional[_Plan]) -> Any:
+        """
+        Converts an element the way xmltodict does, leaving out the child elements the plan doesn't read.
+        Shall not be used externally.
+
+        :param element: The element
+        :param plan: What is read of the element, None for the whole element
+        :return: The text (None if empty) for text-only elements, the dict otherwise
+        """
+        text = element.text.strip() if element.text else ""
+        if not element.attrib and len(element) == 0:
+            return text or None
+        names = self._names
+        result = {f"@{names[key]}": value for key, value in element.attrib.items()}
+        for child in element:
+            name = names[child.tag]
+            if plan is not None and name not in plan:
+                continue
+            value = self._convert(child, None if plan is None else plan[name])
+            if name not in result:
+                result[name] = value
+            elif isinstance(result[name], list):
+                result[name].append(value)
+            else:
+                result[name] = [result[name], value]
+        if text:
+            result["#text"] = text
+        return result
+
+
+def _inflate(body: str) -> Iterator[bytes]:
+    """
+    Decodes and decompresses a base64 gzip body chunk by chunk,
+    without holding the compressed telegram as a whole.
+    Shall not be used externally.
+
+    :param body: The base64 gzip body, which may be wrapped by whitespace
+    :return: The XML, chunk by chunk
+    """
+    decompressor = zlib.decompressobj(_GZIP_WBITS)
+    pending = ""
+    for start in range(0, len(body), _CHUNK_SIZE):
+        # Whitespace is dropped first, and the characters that don't fill a quantum of 4 wait for the next chunk,
+        #  so that every chunk decodes on its own.
+        chunk = pending + "".join(body[start:start + _CHUNK_SIZE].split())
+        usable = len(chunk) - len(chunk) % 4
+        pending = chunk[usable:]
+        yield decompressor.decompress(base64.b64decode(chunk[:usable]))
+    if pending:
+        # Truncated; lets base64 raise for it.
+        base64.b64decode(pending)
+    yield decompressor.flush()
+
+
+def decode_telegram(body: str) -> Telegram:
+    """
+    Decodes a DMData telegram body (base64 -> gzip -> XML),
+    streaming the chunks straight into the XML parser.
+
+    :param body: The base64 gzip body
+    :return: The telegram
+    """
+    parser = ElementTree.XMLPullParser(events=("start-ns", "start"))
+    prefixes: dict[str, str] = {}
+    root: Optional[ElementTree.Element] = None
+    chunks = []
+    for chunk in _inflate(body):
+        chunks.append(chunk)
+        parser.feed(chunk)
+        for event, value in parser.read_events():
+            if event == "start-ns":
+                prefixes.setdefault(value[1], value[0])
+            elif root is None:
+                root = value
+    parser.close()
+    return Telegram(b"".join(chunks), root, prefixes)
+
+
+def telegram_to_model(telegram: Telegram, message_type: DmdataMessageTypes) -> Optional[BaseModel]:
+    """
+    Converts a decoded telegram into the typed model its handler reads.
+
+    :param telegram: The telegram
+    :param message_type: The message type
+    :return: The model, None if the type has no model or the telegram does not fit in the model
+    """
+    if message_type not in TELEGRAM_MODELS:
+        logger.debug(f"No model for telegram type {message_type}.")
+        return None
+    model, report_only = TELEGRAM_MODELS[message_type]
+    try:
+        return telegram.validate(model, report_only)
+    except Exception:
+        logger.exception(f"Failed to convert telegram of type {message_type} to {model.__name__}.")
+        return None
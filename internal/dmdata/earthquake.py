@@ -15,35 +15,32 @@ from schemas.jma.generic import JMAInfoType
 from schemas.p2p_info import EarthquakeReturnModel, EarthquakeIssueTypeEnum, EarthquakeScaleEnum, \
     EarthquakeReturnEpicenterModel, P2PEarthquakePoints, EarthquakePointsScaleEnum, EarthquakeForeignTsunamiEnum, \
     EarthquakeIntensityEnum, EarthquakeTsunamiCommentsModel, EarthquakeDomesticTsunamiEnum
-from sdk import func_timer, obj_to_model, generate_list
+from sdk import func_timer, generate_list
 
 
 @func_timer(log_func=logger.debug)
-def parse_earthquake(content: dict, earthquake_type: DmdataMessageTypes) -> EarthquakeReturnModel | str:
+def parse_earthquake(model: Optional[JMAIntReportModel | JMADestinationModel | JMAIntDestModel |
+                                     JMAEpicenterUpdateModel],
+                     earthquake_type: DmdataMessageTypes) -> EarthquakeReturnModel | str:
     """Parses earthquake nad converts it into a P2PQuakeModel."""
+    if not model:
+        logger.error("Failed to parse earthquake: model is None")
+        return "None"
     if earthquake_type == DmdataMessageTypes.eq_intensity_report:
-        model: Optional[JMAIntReportModel] = obj_to_model(content["Report"], JMAIntReportModel)
         earthquake_issue_type = EarthquakeIssueTypeEnum.ScalePrompt
     elif earthquake_type == DmdataMessageTypes.eq_destination:
-        model: Optional[JMADestinationModel] = obj_to_model(content["Report"], JMADestinationModel)
         earthquake_issue_type = EarthquakeIssueTypeEnum.Destination
     elif earthquake_type == DmdataMessageTypes.eq_intensity_destination:
-        model: Optional[JMAIntDestModel] = obj_to_model(content["Report"], JMAIntDestModel)
         if model.head.title == "遠地地震に関する情報" or not model.body.intensity:
             earthquake_issue_type = EarthquakeIssueTypeEnum.Foreign
         else:
             earthquake_issue_type = EarthquakeIssueTypeEnum.DetailScale
     elif earthquake_type == DmdataMessageTypes.eq_destination_change:
-        model: Optional[JMAEpicenterUpdateModel] = obj_to_model(content["Report"], JMAEpicenterUpdateModel)
         # fixme: it does not do anything!
         return "None"
     else:
         logger.error(f"Exhaustive handling of earthquake_type: {earthquake_type}")
         return "None"
-
-    if not model:
-        logger.error("Failed to parse earthquake: model is None")
-        return "None"
     if model.head.info_status == JMAInfoType.cancel:
         logger.warning(f"Rare cancellation message of {model.head.event_id} -> {model.head.report_date}")
         return "Cancel"
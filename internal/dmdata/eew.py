@@ -11,15 +11,14 @@ from schemas.eew import EEWIntensityEnum, IedredForecastAreasIntensity, SvirToIn
     IedredParseStatus, IedredEEWModel, SvirLgIntensityEnum, IedredEventTypeEnum, SvirEventType
 from schemas.jma.eew import JMAEEWApiModel
 from schemas.jma.generic import JMAInfoType, JMAControlStatus
-from sdk import generate_list, obj_to_model, func_timer
+from sdk import generate_list, func_timer
 
 
 @func_timer(log_func=logger.debug)
-def parse_eew(content: dict, eew_type: DmdataMessageTypes) -> Optional[IedredEEWModel]:
+def parse_eew(model: Optional[JMAEEWApiModel], eew_type: DmdataMessageTypes) -> Optional[IedredEEWModel]:
     """
     Parses EEW, converts into iedred format.
     """
-    model: Optional[JMAEEWApiModel] = obj_to_model(content, JMAEEWApiModel)
     if not model:
         logger.error("Failed to parse EEW: model is None")
         return None
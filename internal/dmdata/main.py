@@ -1,7 +1,4 @@
-import base64
 import functools
-import gzip
-import io
 import json
 import os
 import sys
@@ -11,10 +8,10 @@ from typing import Callable, Optional
 
 import sentry_sdk
 import websocket
-import xmltodict
 from loguru import logger
 
 from internal.dmdata.db import store_message_middleware
+from internal.dmdata.decoder import decode_telegram, telegram_to_model
 from internal.dmdata.earthquake import parse_earthquake
 from internal.dmdata.eew import parse_eew
 from internal.dmdata.webhook import post_message
@@ -338,17 +335,13 @@ class DMDataFetcher:
             logger.error("Suspicious message: format is XML but no xmlReport")
 
         try:
-            raw_io = io.BytesIO(base64.b64decode(message.body))
-            raw_message = gzip.decompress(raw_io.read())
-            raw_message = raw_message.decode("utf-8")
-            xml_message = xmltodict.parse(raw_message, encoding="utf-8")
-            raw_io.close()
+            telegram = decode_telegram(message.body)
         except Exception:
             logger.exception("Failed to parse data message.")
             return 1
 
         hooks = [
-            threading.Thread(target=store_message_middleware, args=(message, xml_message),
+            threading.Thread(target=store_message_middleware, args=(message, telegram),
                              daemon=True),
             threading.Thread(target=post_message, args=(message.body,),
                              daemon=True)
@@ -357,14 +350,19 @@ class DMDataFetcher:
         for t in hooks:
             t.start()
 
+        # The handlers read the typed report; the dict form is only made on the storing thread.
+        with sentry_sdk.start_span(op="validate_telegram"):
+            report = telegram_to_model(telegram, message.head.type)
+
         from internal.modules_init import module_manager
+        from internal.snapshot import snapshot_manager
         if message.head.type == DmdataMessageTypes.eew_warning \
                 or message.head.type == DmdataMessageTypes.eew_forecast:
             # EEW
             if self.testing:
-                print(xml_message)
+                print(telegram.to_dict())
             with sentry_sdk.start_span(op="transform_eew"):
-                eew = parse_eew(xml_message, message.head.type)
+                eew = parse_eew(report, message.head.type)
             if self.testing:
                 print(eew)
             if eew is None:
@@ -376,24 +374,29 @@ class DMDataFetcher:
             except Exception:
                 logger.exception("Failed to parse Dmdata EEW.")
                 return 1
+            snapshot_manager.publish("eew_info")
         if message.head.type == DmdataMessageTypes.tsunami_info \
                 or message.head.type == DmdataMessageTypes.tsunami_warning:
             # tsunami
             if self.testing:
-                print(xml_message)
+                print(telegram.to_dict())
+            if report is None:
+                logger.error("Failed to parse Dmdata tsunami: is None")
+                return 1
             try:
                 with sentry_sdk.start_span(op="parse_tsunami"):
-                    module_manager.classes["tsunami"].parse_dmdata(xml_message, message.head.type)
+                    module_manager.classes["tsunami"].parse_dmdata(report, message.head.type)
             except Exception:
                 logger.exception("Failed to parse Dmdata tsunami.")
                 return 1
+            snapshot_manager.publish("tsunami")
         if message.head.type == DmdataMessageTypes.eq_intensity_report \
                 or message.head.type == DmdataMessageTypes.eq_destination \
                 or message.head.type == DmdataMessageTypes.eq_intensity_destination:
             # or message.head.type == DmdataMessageTypes.eq_destination_change:
             # eq_destination_change fixme
             with sentry_sdk.start_span(op="transform_earthquake"):
-                info = parse_earthquake(xml_message, message.head.type)
+                info = parse_earthquake(report, message.head.type)
             if info == "None":
                 logger.error("Failed to parse Dmdata earthquake: is None")
                 return 1
@@ -427,6 +430,7 @@ class DMDataFetcher:
             except Exception:
                 logger.exception("Failed to parse Dmdata earthquake.")
                 return 1
+            snapshot_manager.publish("p2p_info")
 
         for t in hooks:
             t.join(5)
@@ -1,9 +1,32 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
 from loguru import logger
 
 from schemas.geojson import GeoJsonModel, TsunamiGeoJsonModel
 from schemas.p2p_info import TsunamiAreaModel, TsunamiAreaGradeEnum
 from sdk import func_timer, json_to_model, relpath
 
+# Colored area GeoJSONs kept, one per (event id, serial)
+INTENSITY_GEOJSON_CACHE_SIZE = 16
+# Tsunami GeoJSONs kept, one per area -> grade mapping
+TSUNAMI_GEOJSON_CACHE_SIZE = 16
+# Intensity -> the name of its color in the config
+INTENSITY_COLOR_NAMES = {
+    "1": "one",
+    "2": "two",
+    "3": "three",
+    "4": "four",
+    "5-": "five_lower",
+    "5?": "five_lower",
+    "5+": "five_upper",
+    "6-": "six_lower",
+    "6+": "six_upper",
+    "7": "seven"
+}
+
 
 class GeoJson:
     """
@@ -14,7 +37,22 @@ class GeoJson:
         """
         Initializes the instance.
         """
+        # Area code -> the serialized feature, up to (not including) the closing brace of its properties
+        self._area_fragments: dict[str, bytes] = {}
+        # Area name -> area code
+        self._area_codes: dict[str, str] = {}
+        self._intensity_geojson_cache: OrderedDict[tuple[str, ...], bytes] = OrderedDict()
+        # Tsunami area name -> its feature, never modified
+        self._tsunami_features: dict[str, Any] = {}
+        # Tsunami area name -> the serialized feature, up to (not including) its grade
+        self._tsunami_fragments: dict[str, bytes] = {}
+        # Signature of the area -> grade mapping -> (the GeoJson, the serialized GeoJson)
+        self._tsunami_geojson_cache: OrderedDict[tuple[tuple[str, str], ...],
+                                                 tuple[TsunamiGeoJsonModel, bytes]] = OrderedDict()
+        self._cache_lock = threading.Lock()
         self._init_json()
+        self._init_area_fragments()
+        self._init_tsunami_fragments()
         logger.success("GeoJson instance initialized.")
 
     @func_timer
@@ -23,28 +61,143 @@ class GeoJson:
         self.tsunami_areas = json_to_model(relpath("../assets/area/tsunami_areas.json"), TsunamiGeoJsonModel)
 
     @func_timer
-    def get_tsunami_geojson(self, area_grades: dict[str, TsunamiAreaModel]) -> GeoJsonModel:
+    def _init_area_fragments(self) -> None:
+        """
+        Indexes japan_areas by code, serializing every feature once.
+        """
+        for i in self.japan_areas.features:
+            if i.geometry is None or not i.properties.code:
+                continue
+            self._area_codes[i.properties.name] = i.properties.code
+            self._area_fragments[i.properties.code] = \
+                b'{"type":"Feature","geometry":' + i.geometry.model_dump_json().encode("utf-8") + \
+                b',"properties":' + i.properties.model_dump_json().encode("utf-8")[:-1]
+
+    def get_intensity_geojson(self, key: tuple[str, ...], area_intensities: dict[str, str]) -> bytes:
+        """
+        Gets the area GeoJSON colored by intensity, building it once per key.
+        Building is a concatenation of the serialized features, with the intensity and its color appended.
+
+        :param key: Identifies the intensities, e.g. (event id, serial)
+        :param area_intensities: Area name -> intensity (e.g. "5-")
+        :return: The GeoJSON FeatureCollection
+        """
+        with self._cache_lock:
+            if key in self._intensity_geojson_cache:
+                self._intensity_geojson_cache.move_to_end(key)
+                return self._intensity_geojson_cache[key]
+
+        from env import Env
+        colors = Env.config.intensity.color.model_dump()
+        features = []
+        for name, intensity in area_intensities.items():
+            code = self._area_codes.get(name)
+            if code is None:
+                logger.trace(f"{name} has no area geometry.")
+                continue
+            color = colors.get(INTENSITY_COLOR_NAMES.get(intensity, ""), "")
+            features.append(self._area_fragments[code] +
+                            f',"intensity":{json.dumps(intensity)},"intensity_color":"{color}"}}}}'.encode("utf-8"))
+        body = b'{"type":"FeatureCollection","features":[' + b",".join(features) + b"]}"
+
+        with self._cache_lock:
+            self._intensity_geojson_cache[key] = body
+            while len(self._intensity_geojson_cache) > INTENSITY_GEOJSON_CACHE_SIZE:
+                self._intensity_geojson_cache.popitem(last=False)
+        logger.debug(f"Built intensity GeoJson for {key}.")
+        return body
+
+    @func_timer
+    def _init_tsunami_fragments(self) -> None:
+        """
+        Indexes tsunami_areas by name, serializing every feature once.
+        """
+        for i in self.tsunami_areas.features:
+            self._tsunami_features[i.properties.name] = i
+            # Grade and intensity_color are the last properties; cut them and the closing braces off.
+            self._tsunami_fragments[i.properties.name] = i.model_dump_json(
+                exclude={"properties": {"grade", "intensity_color"}}
+            ).encode("utf-8")[:-2]
+
+    def _tsunami_grade(self, name: str, area: TsunamiAreaModel) -> str:
+        """
+        Gets the grade of a tsunami area. Shall not be used externally.
+        :param name: The area name
+        :param area: The area
+        :return: The grade, Unknown if it can't be parsed
+        """
+        try:
+            return area.grade.value
+        except Exception:
+            logger.exception(f"Failed to parse tsunami GeoJson for {name}.")
+            return TsunamiAreaGradeEnum.Unknown.value
+
+    @func_timer
+    def get_tsunami_geojson(self, area_grades: dict[str, TsunamiAreaModel]) -> TsunamiGeoJsonModel:
         """
         Tries to get the geojson for tsunami areas.
+        The result is shared between calls with the same grades, so it shall not be modified.
 
         :param area_grades: Area warning grades
         :return: Area-Color pair
         """
+        grades = {name: self._tsunami_grade(name, area) for name, area in area_grades.items()
+                  if name in self._tsunami_features}
+        signature = tuple(sorted(grades.items()))
+        with self._cache_lock:
+            if signature in self._tsunami_geojson_cache:
+                self._tsunami_geojson_cache.move_to_end(signature)
+                logger.debug("Got tsunami GeoJson (cached).")
+                return self._tsunami_geojson_cache[signature][0]
+
         from env import Env
-        return_model = GeoJsonModel()
-        area_names = area_grades.keys()
-        for i in self.tsunami_areas.features:
-            if i.properties.name in area_names:
-                # Included in the tsunami area
-                try:
-                    i.properties.grade = area_grades[i.properties.name].grade.value
-                except Exception:
-                    logger.exception(f"Failed to parse tsunami GeoJson for {i.properties.name}.")
-                    i.properties.grade = TsunamiAreaGradeEnum.Unknown.value
-                if i.properties.grade != TsunamiAreaGradeEnum.Unknown:
-                    i.properties.intensity_color = Env.config.tsunami.color.dict().get(i.properties.grade, "")
-                else:
-                    logger.warning(f"{i.properties.name}: grade is unknown. Skipping parsing.")
-                return_model.features.append(i)
+        colors = Env.config.tsunami.color.model_dump()
+        return_model = TsunamiGeoJsonModel()
+        fragments = []
+        for name, grade in grades.items():
+            if grade != TsunamiAreaGradeEnum.Unknown:
+                color = colors.get(grade, "")
+            else:
+                logger.warning(f"{name}: grade is unknown. Skipping parsing.")
+                color = ""
+            feature = self._tsunami_features[name]
+            return_model.features.append(feature.model_copy(update={
+                "properties": feature.properties.model_copy(update={"grade": grade, "intensity_color": color})
+            }))
+            fragments.append((name, grade, color))
+        body = self._tsunami_body(fragments)
+
+        with self._cache_lock:
+            self._tsunami_geojson_cache[signature] = (return_model, body)
+            while len(self._tsunami_geojson_cache) > TSUNAMI_GEOJSON_CACHE_SIZE:
+                self._tsunami_geojson_cache.popitem(last=False)
         logger.debug("Got tsunami GeoJson.")
         return return_model
+
+    def _tsunami_body(self, features: list[tuple[str, str, str]]) -> bytes:
+        """
+        Serializes a tsunami GeoJson from the fragments. Shall not be used externally.
+        :param features: (area name, grade, color) of every feature
+        :return: The serialized GeoJson
+        """
+        fragments = [self._tsunami_fragments[name] +
+                     f',"grade":{json.dumps(grade)},"intensity_color":{json.dumps(color)}}}}}'.encode("utf-8")
+                     for name, grade, color in features]
+        return b'{"type":"FeatureCollection","features":[' + b",".join(fragments) + b"]}"
+
+    def get_tsunami_geojson_json(self, geojson: TsunamiGeoJsonModel) -> Optional[bytes]:
+        """
+        Gets the serialized form of a GeoJson returned by get_tsunami_geojson.
+        The cached form is found by the areas and grades, and rebuilt from the fragments if it has been evicted.
+        :param geojson: The GeoJson
+        :return: The serialized GeoJson, None if it has areas not in tsunami_areas
+        """
+        features = [(i.properties.name, i.properties.grade, i.properties.intensity_color) for i in geojson.features]
+        if any(name not in self._tsunami_fragments for name, _, _ in features):
+            return None
+        signature = tuple(sorted((name, grade) for name, grade, _ in features))
+        with self._cache_lock:
+            cached = self._tsunami_geojson_cache.get(signature)
+        if cached is not None:
+            return cached[1]
+        return self._tsunami_body(features)
@@ -1,13 +1,53 @@
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from typing import Optional
 
+import numpy as np
 from PIL import Image
 from loguru import logger
 
+from schemas.centroid import ObsStationsCentroidModel
 from schemas.eew import EEWConvertedIntensityEnum
 from schemas.intensity2color import IntensityToColorReturnModel, StationIntensityModel, AreaIntensityModel, \
     IntensityToColorIntEnum
 from sdk import verify_type, func_timer
 
+# Lower bounds of intensity levels 2~9 (IntensityToColorIntEnum); level 1 is (0.5, 1.5)
+INTENSITY_LEVEL_BOUNDS = np.array([1.5, 2.5, 3.5, 4.5, 5.0, 5.5, 6.0, 6.5])
+# Intensity level -> converted intensity (e.g. 5 -> "5-"), level 0 being no intensity
+INTENSITY_LEVEL_NAMES = [""] + [EEWConvertedIntensityEnum[i.name].value for i in IntensityToColorIntEnum]
+# Palettes kept; kmoni uses one, so it's only a guard against odd images
+PALETTE_CACHE_SIZE = 8
+# Seconds to wait for a worker process before parsing in this process
+WORKER_TIMEOUT = 5
+
+# The instance of a worker process, holding the station pixels only
+_worker_instance: Optional["IntensityToColor"] = None
+
+
+def _init_worker(station_x: np.ndarray, station_y: np.ndarray) -> None:
+    """
+    Initializes a worker process with the station pixels. Shall not be used externally.
+    :param station_x: Pixel X of every station
+    :param station_y: Pixel Y of every station
+    """
+    global _worker_instance
+    _worker_instance = IntensityToColor()
+    _worker_instance.load_station_pixels(station_x, station_y)
+
+
+def _parse_in_worker(raw_image: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parses the image in a worker process. Shall not be used externally.
+    :param raw_image: The EEW image file
+    :return: Detail intensities in hundredths (int16), intensity levels, whether the station's pixel is colored
+    """
+    detail, level, colored = _worker_instance.parse_station_intensities(raw_image)
+    return np.rint(detail * 100).astype(np.int16), level, colored
+
 
 class IntensityToColor:
     """
@@ -18,11 +58,121 @@ class IntensityToColor:
         2. Interpolating with color
     Considering the cons with method 1, for now,
      only method 2 was being implemented.
+
+    The EEW image is palettized, so the color -> intensity interpolation is done once per palette entry,
+     and every station's intensity is gathered from that table by its pixel coordinates.
+    With processes, images are parsed by a pool of worker processes holding the station pixels,
+     so that parsing doesn't hold the GIL of the API.
+    If a worker fails or times out, the pool is dropped, and started again on the next image.
     """
 
-    def __init__(self):
+    def __init__(self, processes: int = 0):
+        """
+        Initializes the instance.
+        :param processes: Worker processes to parse images with, 0 to parse in this process
+        """
+        # Palette hash -> (detail intensity, intensity level, whether colored) of every palette entry
+        self._palette_tables: dict[bytes, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._stations: list[ObsStationsCentroidModel] = []
+        # Pixel coordinates + index into _sub_region_codes of every station in _stations
+        self._station_x = np.zeros(0, dtype=np.intp)
+        self._station_y = np.zeros(0, dtype=np.intp)
+        self._station_sub_region = np.zeros(0, dtype=np.intp)
+        # Index into Centroid.earthquake_station_centroid of every station in _stations
+        self._station_centroid_index = np.zeros(0, dtype=np.intp)
+        self._sub_region_codes: list[str] = []
+        self._stations_lock = threading.Lock()
+        self._stations_initialized = False
+        self._processes = processes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        if processes > 0:
+            self._init_stations()
+            self._start_pool()
         logger.success("Intensity2Color instance initialized.")
 
+    def _start_pool(self) -> None:
+        """
+        Starts the worker processes. Shall not be used externally.
+        """
+        # Forkserver: the logger (enqueue) and sentry have started threads before this instance is created,
+        #  so workers are forked from a single-threaded server process instead of this one,
+        #  which also makes restarting the pool from a scheduler thread safe.
+        # The server preloads only this module; main.py is imported as __mp_main__, which builds no app.
+        mp_context = multiprocessing.get_context("forkserver")
+        mp_context.set_forkserver_preload(["internal.intensity2color"])
+        self._pool = ProcessPoolExecutor(
+            max_workers=self._processes,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(self._station_x, self._station_y)
+        )
+        # Workers are started on demand; start them now instead of on the first EEW.
+        for _ in range(self._processes):
+            self._pool.submit(int)
+        logger.debug(f"Started {self._processes} Intensity2Color worker processes.")
+
+    def _drop_pool(self, pool: ProcessPoolExecutor) -> None:
+        """
+        Stops a failed pool, so that the next image starts a new one. Shall not be used externally.
+        :param pool: The pool that failed
+        """
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes, if any. Images are parsed in this process from then on.
+        """
+        with self._pool_lock:
+            self._processes = 0
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def load_station_pixels(self, station_x: np.ndarray, station_y: np.ndarray) -> None:
+        """
+        Loads the station pixels directly, for worker processes without the centroid.
+        :param station_x: Pixel X of every station
+        :param station_y: Pixel Y of every station
+        """
+        with self._stations_lock:
+            self._station_x = station_x
+            self._station_y = station_y
+            self._stations_initialized = True
+
+    def _init_stations(self) -> None:
+        """
+        Builds the station arrays from the observation stations. Shall not be used externally.
+        The centroid instance is initialized separately, so this is done on the first parse
+         (or before starting the worker processes).
+        """
+        with self._stations_lock:
+            if self._stations_initialized:
+                return
+            from env import Env
+            stations, x, y, centroid_index = [], [], [], []
+            for index, i in enumerate(Env.centroid_instance.earthquake_station_centroid):
+                try:
+                    x.append(int(i.point.X))
+                    y.append(int(i.point.Y))
+                except Exception:
+                    logger.trace(f"Invalid EEW intensity picture's pixel of {i.name}.")
+                    continue
+                stations.append(i)
+                centroid_index.append(index)
+            sub_region_codes, sub_region = np.unique([i.sub_region_code for i in stations], return_inverse=True)
+            self._stations = stations
+            self._station_x = np.array(x, dtype=np.intp)
+            self._station_y = np.array(y, dtype=np.intp)
+            self._station_sub_region = sub_region.astype(np.intp).reshape(-1)
+            self._station_centroid_index = np.array(centroid_index, dtype=np.intp)
+            self._sub_region_codes = sub_region_codes.tolist()
+            self._stations_initialized = True
+            logger.debug(f"Initialized {len(stations)} EEW intensity stations.")
+
     @func_timer
     def intensity2color(self, raw_image: bytes) -> IntensityToColorReturnModel:
         """
@@ -32,99 +182,206 @@ class IntensityToColor:
         """
         verify_type(raw_image, bytes)
         logger.debug("Parsing EEW coloring.")
+        detail, level, colored = self.station_intensities(raw_image)
+        return self._build_return_model(detail, level, colored)
+
+    @property
+    def station_centroid_index(self) -> np.ndarray:
+        """
+        The index into Centroid.earthquake_station_centroid of every station in station_intensities.
+        """
+        self._init_stations()
+        return self._station_centroid_index
+
+    def station_intensities(self, raw_image: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gets the intensity of every station (as station_centroid_index), with the worker processes if any.
+        Works for any image in kmoni's color scale, e.g. real-time intensities.
+        :param raw_image: The image file
+        :return: Detail intensities, intensity levels, whether the station's pixel is colored (observed)
+        """
+        self._init_stations()
+        if self._processes > 0:
+            return self._parse_in_pool(raw_image)
+        return self.parse_station_intensities(raw_image)
+
+    def _parse_in_pool(self, raw_image: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gets the intensity of every station with a worker process. Shall not be used externally.
+        Starts the pool if it was dropped. If the worker fails, drops the pool and parses in this process.
+        :param raw_image: The EEW image file
+        :return: Detail intensities, intensity levels, whether the station's pixel is colored (observed)
+        """
+        with self._pool_lock:
+            if self._pool is None and self._processes > 0:
+                self._start_pool()
+            pool = self._pool
+        if pool is None:
+            return self.parse_station_intensities(raw_image)
+        try:
+            detail, level, colored = pool.submit(_parse_in_worker, raw_image).result(WORKER_TIMEOUT)
+            return detail / 100, level, colored
+        except Exception:
+            logger.exception("Failed to parse EEW image in worker process. "
+                             "Parsing in this process, and restarting the worker processes on the next image.")
+            self._drop_pool(pool)
+            return self.parse_station_intensities(raw_image)
+
+    def parse_station_intensities(self, raw_image: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gets the intensity of every station.
+        :param raw_image: The EEW image file
+        :return: Detail intensities, intensity levels, whether the station's pixel is colored (observed)
+        """
+        with Image.open(BytesIO(raw_image)) as image_fp:
+            return self._station_intensities(image_fp)
+
+    def _station_intensities(self, image_fp: Image.Image) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gets the intensity of every station. Shall not be used externally.
+        A station is not colored when its pixel is outside the image, transparent, or without color
+         (black, gray or white), which is the lowest intensity of the scale (-3) as well.
+        :param image_fp: The EEW image
+        :return: Detail intensities, intensity levels, whether the station's pixel is colored (observed)
+        """
+        width, height = image_fp.size
+        in_image = (self._station_x >= 0) & (self._station_x < width) & \
+                   (self._station_y >= 0) & (self._station_y < height)
+        x = self._station_x[in_image]
+        y = self._station_y[in_image]
+        detail = np.zeros(len(self._station_x))
+        level = np.zeros(len(self._station_x), dtype=np.int8)
+        colored = np.zeros(len(self._station_x), dtype=bool)
+
+        if image_fp.mode == "P":
+            transparency = image_fp.info.get("transparency")
+            palette_detail, palette_level, palette_colored = self._palette_table(
+                image_fp.getpalette(), transparency if isinstance(transparency, int) else None)
+            indices = np.asarray(image_fp)[y, x]
+            detail[in_image] = palette_detail[indices]
+            level[in_image] = palette_level[indices]
+            colored[in_image] = palette_colored[indices]
+        else:
+            logger.trace(f"EEW intensity picture isn't palettized ({image_fp.mode}).")
+            pixels = np.asarray(image_fp.convert("HSV"))[y, x]
+            detail[in_image], level[in_image] = self._intensity_levels(self._color_to_position(pixels))
+            colored[in_image] = self._colored(pixels)
+        return detail, level, colored
+
+    def _palette_table(self, palette: list[int],
+                       transparency: Optional[int] = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gets the detail intensity, intensity level and whether colored of every palette entry.
+        Shall not be used externally.
+        :param palette: The palette, as [R, G, B, R, G, B, ...]
+        :param transparency: The transparent palette entry, if any
+        :return: Detail intensities, intensity levels, whether colored, indexed by palette entry
+        """
+        raw_palette = bytes(palette)
+        key = hashlib.blake2b(raw_palette + str(transparency).encode(), digest_size=16).digest()
+        table = self._palette_tables.get(key)
+        if table is not None:
+            return table
 
+        # Pad to 256 entries, so that any index within the image is valid.
+        raw_palette = raw_palette.ljust(256 * 3, b"\x00")[:256 * 3]
+        colors = np.asarray(Image.frombytes("RGB", (256, 1), raw_palette).convert("HSV")).reshape(-1, 3)
+        colored = self._colored(colors)
+        if transparency is not None and 0 <= transparency < 256:
+            colored[transparency] = False
+        table = (*self._intensity_levels(self._color_to_position(colors)), colored)
+        if len(self._palette_tables) >= PALETTE_CACHE_SIZE:
+            self._palette_tables.clear()
+        self._palette_tables[key] = table
+        logger.debug("Built EEW intensity palette table.")
+        return table
+
+    def _intensity_levels(self, position: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Converts locations in intensity space into intensities. Shall not be used externally.
+        :param position: The locations in intensity space
+        :return: Detail intensities, intensity levels (0 for no intensity)
+        """
+        detail = np.round(position * 10 - 3, 2)
+        level = np.searchsorted(INTENSITY_LEVEL_BOUNDS, detail, side="right") + 1
+        level[detail <= 0.5] = 0
+        return detail, level.astype(np.int8)
+
+    def _build_return_model(self, detail: np.ndarray, level: np.ndarray,
+                            colored: np.ndarray) -> IntensityToColorReturnModel:
+        """
+        Builds the return model from the station intensities. Shall not be used externally.
+        :param detail: Detail intensities
+        :param level: Intensity levels
+        :param colored: Whether the station's pixel is colored
+        :return: The station intensities, area intensities, whether to recommend area coloring
+        """
         return_model = IntensityToColorReturnModel()
-        image_fp = Image.open(BytesIO(raw_image))
-        image = image_fp.convert("HSV").load()
+        logger.trace(f"{np.count_nonzero(colored)} stations are colored in EEW intensity picture.")
+        active = np.flatnonzero(level > 0)
 
-        from env import Env
-        area_intensity_max: dict[str, int] = {}
-        for i in Env.centroid_instance.earthquake_station_centroid:
-            try:
-                # noinspection PyUnresolvedReferences
-                pixel_color = image[int(i.point.X), int(i.point.Y)]
-            except Exception:
-                logger.trace(f"Failed to get EEW intensity picture's pixel: {i.point.X}:{i.point.Y}")
-                continue
-            pixel_intensity = round(self._color_to_position(pixel_color) * 10 - 3, 2)
-            if pixel_intensity > 0.5:
-                # Intensity bigger than 0.5
-                if 0.5 < pixel_intensity < 1.5:
-                    parsed_intensity = "1", 1
-                elif 1.5 <= pixel_intensity < 2.5:
-                    parsed_intensity = "2", 2
-                elif 2.5 <= pixel_intensity < 3.5:
-                    parsed_intensity = "3", 3
-                elif 3.5 <= pixel_intensity < 4.5:
-                    parsed_intensity = "4", 4
-                elif 4.5 <= pixel_intensity < 5.0:
-                    parsed_intensity = "5-", 5
-                elif 5.0 <= pixel_intensity < 5.5:
-                    parsed_intensity = "5+", 6
-                elif 5.5 <= pixel_intensity < 6.0:
-                    parsed_intensity = "6-", 7
-                elif 6.0 <= pixel_intensity < 6.5:
-                    parsed_intensity = "6+", 8
-                elif pixel_intensity >= 6.5:
-                    parsed_intensity = "7", 9
-                else:
-                    logger.trace(f"Intensity value outside range: {pixel_color} vs {pixel_intensity}")
-                    continue
+        # Area: the maximum level of the stations within every sub region
+        area_level = np.zeros(len(self._sub_region_codes), dtype=np.int8)
+        np.maximum.at(area_level, self._station_sub_region[active], level[active])
+        area_intensity_max: dict[str, int] = {
+            self._sub_region_codes[i]: int(area_level[i]) for i in np.flatnonzero(area_level)
+        }
 
-                # Area
-                if i.sub_region_code not in area_intensity_max:
-                    # Add new area
-                    area_intensity_max[i.sub_region_code] = 0
-                if area_intensity_max[i.sub_region_code] < parsed_intensity[1]:
-                    area_intensity_max[i.sub_region_code] = parsed_intensity[1]
-
-                # Station
-                full_name = i.region + i.name
-                return_model.station_intensities[full_name] = StationIntensityModel(
-                    name=full_name,
-                    area_code=i.region_code,
-                    sub_area_code=i.sub_region_code,
-                    latitude=i.location.latitude,
-                    longitude=i.location.longitude,
-                    intensity=parsed_intensity[0],
-                    detail_intensity=pixel_intensity,
-                    is_area=False
-                )
-        image_fp.close()
+        # Station
+        for i, station_detail, station_level in zip(active.tolist(), detail[active].tolist(),
+                                                    level[active].tolist()):
+            station = self._stations[i]
+            full_name = station.region + station.name
+            # Every field is already validated by the centroid, so skip the validation.
+            return_model.station_intensities[full_name] = StationIntensityModel.model_construct(
+                name=full_name,
+                area_code=station.region_code,
+                sub_area_code=station.sub_region_code,
+                latitude=station.location.latitude,
+                longitude=station.location.longitude,
+                intensity=INTENSITY_LEVEL_NAMES[station_level],
+                detail_intensity=station_detail,
+                is_area=False
+            )
         return_model.area_intensities, return_model.recommend_areas \
             = self._parse_area_intensities(area_intensity_max)
         return return_model
 
-    def _color_to_position(self, color: list[int]) -> float:
+    def _color_to_position(self, color: np.ndarray) -> np.ndarray:
         """
         Pixel color in HSV space to intensity space.
         Functions are full of magic numbers calculated in advance, so
          don't change it until you're absolutely sure with what you're doing!
 
-        :param color: The pixel color in HSV space of [0-1, 0-1, 0-1]
-        :return: The corresponding location in intensity space
+        :param color: The pixel colors in HSV space, as an (N, 3) array of [0-255, 0-255, 0-255]
+        :return: The corresponding locations in intensity space
         """
-        p = 0
-        h = color[0] / 255
-        s = color[1] / 255
-        v = color[2] / 255
-
-        if v > 0.1 and s > 0.75:
+        h = color[:, 0] / 255
+        s = color[:, 1] / 255
+        v = color[:, 2] / 255
 
-            if h > 0.1476:
-                p = 280.31 * pow(h, 6) - 916.05 * pow(h, 5) + 1142.6 * pow(h, 4) - 709.95 * pow(h, 3) \
-                    + 234.65 * pow(h, 2) - 40.27 * h + 3.2217
+        p = np.select(
+            [h > 0.1476, h > 0.001],
+            [
+                280.31 * h ** 6 - 916.05 * h ** 5 + 1142.6 * h ** 4 - 709.95 * h ** 3
+                + 234.65 * h ** 2 - 40.27 * h + 3.2217,
+                151.4 * h ** 4 - 49.32 * h ** 3 + 6.753 * h ** 2 - 2.481 * h + 0.9033
+            ],
+            -0.005171 * v ** 2 - 0.3282 * v + 1.2236
+        )
+        p[~self._colored(color)] = 0
 
-            if 0.1476 >= h > 0.001:
-                p = 151.4 * pow(h, 4) - 49.32 * pow(h, 3) + 6.753 * pow(h, 2) - 2.481 * h + 0.9033
+        return np.maximum(p, 0)
 
-            if h <= 0.001:
-                p = -0.005171 * pow(v, 2) - 0.3282 * v + 1.2236
-
-        if p < 0:
-            p = 0
-
-        return p
+    @staticmethod
+    def _colored(color: np.ndarray) -> np.ndarray:
+        """
+        Whether pixel colors are within the color scale, rather than black, gray or white.
+        Shall not be used externally.
+        :param color: The pixel colors in HSV space, as an (N, 3) array of [0-255, 0-255, 0-255]
+        :return: Whether every color is within the color scale
+        """
+        return (color[:, 2] / 255 > 0.1) & (color[:, 1] / 255 > 0.75)
 
     def _parse_area_intensities(self, area_intensity_max: dict[str, int]) -> tuple[
         dict[str, AreaIntensityModel],
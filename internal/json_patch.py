@@ -0,0 +1,56 @@
+from typing import Any
+
+__all__ = ["make_patch"]
+
+
+def _escape(key: str) -> str:
+    """
+    Escapes a key into a JSON Pointer token (RFC 6901). Shall not be used externally.
+    :param key: The key
+    :return: The token
+    """
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _diff(old: Any, new: Any, path: str, operations: list[dict]) -> None:
+    """
+    Appends the operations turning old into new at path. Shall not be used externally.
+    :param old: The old value
+    :param new: The new value
+    :param path: The JSON Pointer of both values
+    :param operations: The operations so far
+    """
+    if type(old) is not type(new):
+        operations.append({"op": "replace", "path": path, "value": new})
+    elif isinstance(old, dict):
+        for key in old.keys() - new.keys():
+            operations.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            if key not in old:
+                operations.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+            else:
+                _diff(old[key], value, f"{path}/{_escape(key)}", operations)
+    elif isinstance(old, list):
+        common = min(len(old), len(new))
+        for index in range(common):
+            _diff(old[index], new[index], f"{path}/{index}", operations)
+        # Removes from the end, so that the indices stay valid
+        for index in range(len(old) - 1, common - 1, -1):
+            operations.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in range(common, len(new)):
+            operations.append({"op": "add", "path": f"{path}/-", "value": new[index]})
+    elif old != new:
+        operations.append({"op": "replace", "path": path, "value": new})
+
+
+def make_patch(old: Any, new: Any) -> list[dict]:
+    """
+    Makes the JSON Patch (RFC 6902) turning one JSON document into another.
+    Lists are compared index by index, which fits documents whose lists mostly keep their order.
+    :param old: The old document
+    :param new: The new document
+    :return: The operations
+    """
+    operations = []
+    _diff(old, new, "", operations)
+    return operations
@@ -11,6 +11,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from loguru import logger
 
 from env import Env
+from internal.snapshot import snapshot_manager
 from modules.base_module import BaseModule
 from schemas.config import RunEnvironment
 from schemas.modules import ModulesEnum, ModulesClassEnum
@@ -143,6 +144,11 @@ class ModuleManager:
                                    trigger="interval",
                                    seconds=5,
                                    id="global_eq")
+        if Env.config.modules.realtime_shindo:
+            self.scheduler.add_job(func=self._module_refresher(self._loaded_classes["realtime_shindo"]),
+                                   trigger="interval",
+                                   seconds=1,
+                                   id="realtime_shindo")
         if Env.config.dmdata.enabled and Env.config.dmdata.jquake.use_plan:
             self.scheduler.add_job(func=self._module_refresher(Env.dmdata_instance, "get_current_token"),
                                    trigger="interval",
@@ -227,9 +233,11 @@ class ModuleManager:
     def _module_refresher(self, module: BaseModule, func_name: str = "get_info") \
             -> Callable[..., None]:
         """
-        Refreshes a module using its get_info function.
+        Refreshes a module using its get_info function,
+         then publishes the snapshots built from the module.
         :param module: The module to refresh
         """
+        name = next((k for k, v in self._loaded_classes.items() if v is module), None)
 
         def wrapper_refresh():
             if not hasattr(module, func_name):
@@ -242,6 +250,8 @@ class ModuleManager:
                         getattr(module, func_name)()
             except Exception:
                 logger.exception(f"Failed to refresh {module}.")
+            if name is not None:
+                snapshot_manager.publish(name)
 
         return wrapper_refresh
 
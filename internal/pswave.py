@@ -1,18 +1,26 @@
-import re
+from bisect import bisect_left
+from typing import Optional
 
+import numpy as np
 from loguru import logger
 
-from schemas.pswave import TravelTimeTableModel, PSWaveTimeModel
+from schemas.pswave import PSWaveTimeModel
 from sdk import open_file, relpath, verify_none, func_timer
 
 
 class PSWave:
     """
     PSWave class to parse EEW's expected arrival time, P & S wave.
+
+    The travel time table (tjma2001) is kept per tabulated depth as arrays sorted by distance,
+     in which the travel times are non-decreasing, so they're bisected by time.
     """
 
     def __init__(self):
-        self.pswave_list = []
+        # Tabulated depths, ascending
+        self._depths: list[int] = []
+        # Depth -> (P wave times, S wave times, distances)
+        self._tables: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
         self._init_pswave()
 
     @func_timer
@@ -25,28 +33,58 @@ class PSWave:
         raw_file = handle.read()
         handle.close()
         try:
-            split_file = re.sub(r"\x20+", " ", raw_file)
-            split_with_return_file = split_file.split("\n")
-            for i in split_with_return_file:
-                line = i.split(" ")
-                if len(line) != 5:
+            rows: dict[int, list[tuple[float, float, int]]] = {}
+            for i in raw_file.split("\n"):
+                line = i.split()
+                if len(line) != 4:
                     # Either the file is corrupted, or it's not in
                     # our consideration (unused).
                     continue
-                self.pswave_list.append(TravelTimeTableModel(
-                    p_time=float(line[1]),
-                    s_time=float(line[2]),
-                    depth=int(line[3]),
-                    distance=int(line[4])
-                ))
+                rows.setdefault(int(line[2]), []).append((float(line[0]), float(line[1]), int(line[3])))
+            for depth, depth_rows in rows.items():
+                depth_rows.sort(key=lambda row: row[2])
+                table = np.array(depth_rows, dtype=np.float64)
+                self._tables[depth] = (table[:, 0].copy(), table[:, 1].copy(), table[:, 2].copy())
+            self._depths = sorted(self._tables)
             logger.success("PSWave instance initialized.")
         except Exception:
             logger.exception("Failed to initialize PSWave instance.")
 
+    @staticmethod
+    def _interpolate_distance(times: np.ndarray, distances: np.ndarray, time_passed: float) -> Optional[float]:
+        """
+        Interpolates the distance a wave has traveled. Shall not be used externally.
+        :param times: Travel times, non-decreasing
+        :param distances: Distances of the travel times
+        :param time_passed: The elapsed time of the earthquake
+        :return: The distance, None if the time is outside the table
+        """
+        if not times[0] <= time_passed <= times[-1]:
+            return None
+        first = int(np.searchsorted(times, time_passed, side="left"))
+        if times[first] == time_passed:
+            return float(distances[first])
+        last = first - 1
+        # linear interpolation
+        return float((time_passed - times[last]) / (times[first] - times[last]) *
+                     (distances[first] - distances[last]) + distances[last])
+
+    def _depth_distances(self, depth: int, time_passed: float) -> tuple[Optional[float], Optional[float]]:
+        """
+        Gets the distances of S & P waves at a tabulated depth. Shall not be used externally.
+        :param depth: The tabulated depth
+        :param time_passed: The elapsed time of the earthquake
+        :return: S wave distance, P wave distance
+        """
+        p_times, s_times, distances = self._tables[depth]
+        return (self._interpolate_distance(s_times, distances, time_passed),
+                self._interpolate_distance(p_times, distances, time_passed))
+
     @func_timer
     def parse_pswave_time(self, depth: int, time_passed: float) -> PSWaveTimeModel:
         """
         Parses the PSWave time.
+        Depths between the tabulated ones are interpolated linearly.
 
         :param depth: The depth of the earthquake
         :param time_passed: The elapsed time of the earthquake
@@ -56,38 +94,28 @@ class PSWave:
         if depth > 700 or time_passed > 2000:
             logger.warning("Failed to parse PSWave times (Elapsed time too long or earthquake too deep).")
             return PSWaveTimeModel()
-        corresponding_earthquake_list = list(filter(lambda d: d.depth == depth, self.pswave_list))
-        if len(corresponding_earthquake_list) == 0:
+        if not self._depths or not self._depths[0] <= depth <= self._depths[-1]:
             logger.warning("Failed to parse PSWave times (No depth corresponding).")
             return PSWaveTimeModel()
 
-        # --- S Wave time
-        # last corresponding one => s_last, first corresponding one => s_first
-        s_last = list(filter(lambda s_p: s_p.s_time <= time_passed, corresponding_earthquake_list))
-        s_first = list(filter(lambda s_p: s_p.s_time >= time_passed, corresponding_earthquake_list))
-        if (not s_last) or (not s_first):
+        upper = bisect_left(self._depths, depth)
+        if self._depths[upper] == depth:
+            s_time, p_time = self._depth_distances(depth, time_passed)
+        else:
+            lower_depth, upper_depth = self._depths[upper - 1], self._depths[upper]
+            ratio = (depth - lower_depth) / (upper_depth - lower_depth)
+            lower_s, lower_p = self._depth_distances(lower_depth, time_passed)
+            upper_s, upper_p = self._depth_distances(upper_depth, time_passed)
+            s_time = None if lower_s is None or upper_s is None else lower_s + (upper_s - lower_s) * ratio
+            p_time = None if lower_p is None or upper_p is None else lower_p + (upper_p - lower_p) * ratio
+
+        if s_time is None:
             logger.warning("Failed to parse S wave time (no time corresponding).")
-            s_time = None
         else:
-            s_last = s_last[-1]
-            s_first = s_first[0]
-            # linear interpolation
-            s_time = (time_passed - s_last.s_time) / (s_first.s_time - s_last.s_time) * \
-                     (s_first.distance - s_last.distance) + s_last.distance
             logger.debug("S wave time parsed.")
-
-        # --- P Wave time
-        # last corresponding one => p_last, first corresponding one => p_first
-        p_last = list(filter(lambda s_p: s_p.p_time <= time_passed, corresponding_earthquake_list))
-        p_first = list(filter(lambda s_p: s_p.p_time >= time_passed, corresponding_earthquake_list))
-        if (not p_first) or (not p_last):
+        if p_time is None:
             logger.warning("Failed to parse P wave time (no time corresponding).")
-            p_time = None
         else:
-            p_last = p_last[-1]
-            p_first = p_first[0]
-            p_time = (time_passed - p_last.p_time) / (p_first.p_time - p_last.p_time) * \
-                     (p_first.distance - p_last.distance) + p_last.distance
             logger.debug("P wave time parsed.")
         return PSWaveTimeModel(
             s_time=s_time,
@@ -0,0 +1,311 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import msgpack
+from loguru import logger
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response, JSONResponse
+
+from internal.json_patch import make_patch
+from schemas.router import GenericResponseModel
+from schemas.snapshot import SnapshotModel, SnapshotTopics
+from sdk import encoding_quality, media_type_quality
+
+__all__ = ["snapshot_manager"]
+
+# Seconds a long-poll request is held before answering 304
+LONG_POLL_TIMEOUT = 25
+# Recent versions of each topic that a delta can be based on
+PATCH_WINDOW = 10
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class SnapshotManager:
+    """
+    Manages the pre-serialized snapshots of the API responses.
+
+    A snapshot is rebuilt only when one of its source modules publishes,
+     and only gets a new version when its serialized body changes.
+    Serving a request is then a dict lookup, instead of building, validating,
+     serializing and compressing the response again.
+
+    Waiters (push channels) share one future per topic on the event loop,
+     which is resolved and replaced every time the topic gets a new version.
+
+    Deltas (JSON Patch) from the recent versions to the latest one are computed
+     on the first request for each base version, and shared until the next version.
+
+    Versions restart with the process, so clients hold them as "<epoch>.<version>" (X-Snapshot-Version),
+     and a version from another boot is answered with the full snapshot at once.
+    """
+
+    def __init__(self):
+        # Tells the versions of this process from the ones of the previous boots
+        self.epoch = format(time.time_ns() // 1_000_000, "x")
+        self._builders: dict[SnapshotTopics, Callable[[], Optional[BaseModel | bytes]]] = {}
+        self._topics_by_source: dict[str, set[SnapshotTopics]] = {}
+        self._snapshots: dict[SnapshotTopics, Optional[SnapshotModel]] = {}
+        self._versions: dict[SnapshotTopics, int] = {}
+        self._lock = threading.RLock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: dict[SnapshotTopics, asyncio.Future] = {}
+        # Topic -> version -> body, of the recent versions
+        self._history: dict[SnapshotTopics, OrderedDict[int, bytes]] = {}
+        # Topic -> base version -> (patch, gzip patch) to the latest version, None if not cheaper
+        self._patches: dict[SnapshotTopics, dict[int, Optional[tuple[bytes, bytes]]]] = {}
+
+    def register(self, topic: SnapshotTopics, builder: Callable[[], Optional[BaseModel | bytes]],
+                 sources: list[str]) -> None:
+        """
+        Registers how to build a snapshot.
+        :param topic: The snapshot topic
+        :param builder: Builds the response model (or the serialized JSON), returns None when the API is not ready
+        :param sources: The names of the modules that the snapshot is built from
+        """
+        self._builders[topic] = builder
+        for source in sources:
+            self._topics_by_source.setdefault(source, set()).add(topic)
+
+    def publish(self, *sources: str) -> None:
+        """
+        Rebuilds the snapshots built from the given modules, after their states changed.
+        :param sources: The names of the modules
+        """
+        topics = set()
+        for source in sources:
+            topics |= self._topics_by_source.get(source, set())
+        for topic in topics:
+            self._rebuild(topic)
+
+    def get(self, topic: SnapshotTopics) -> Optional[SnapshotModel]:
+        """
+        Gets the latest snapshot, building it if it has never been built.
+        :param topic: The snapshot topic
+        :return: The snapshot, None if the API is not ready
+        """
+        if topic not in self._snapshots:
+            return self._rebuild(topic)
+        return self._snapshots[topic]
+
+    async def wait_any(self, versions: dict[SnapshotTopics, int], timeout: float) -> list[SnapshotModel]:
+        """
+        Waits until any of the topics has a newer version than given, or the timeout passes.
+        Only the latest snapshot of each topic is returned, so that slow waiters skip ahead.
+        :param versions: Topic -> the version the waiter holds
+        :param timeout: The maximum seconds to wait
+        :return: The newer snapshots, empty if the timeout passed
+        """
+        newer = self._newer(versions)
+        if newer:
+            return newer
+        self._loop = asyncio.get_running_loop()
+        futures = [self._changed_future(topic) for topic in versions]
+        await asyncio.wait(futures, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        return self._newer(versions)
+
+    def _newer(self, versions: dict[SnapshotTopics, int]) -> list[SnapshotModel]:
+        """
+        Gets the snapshots newer than the given versions.
+        :param versions: Topic -> the version the waiter holds
+        :return: The newer snapshots
+        """
+        snapshots = [self.get(topic) for topic in versions]
+        return [i for i in snapshots if i is not None and i.version > versions[i.topic]]
+
+    def _held_version(self, topic: SnapshotTopics, tag: str) -> Optional[int]:
+        """
+        Parses the version a client holds.
+        :param topic: The snapshot topic
+        :param tag: "<epoch>.<version>", as in X-Snapshot-Version
+        :return: The version, None if it is malformed, from another boot, or newer than the latest one
+        """
+        epoch, _, version = tag.rpartition(".")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        snapshot = self.get(topic)
+        if snapshot is None or int(version) > snapshot.version:
+            return None
+        return int(version)
+
+    def _changed_future(self, topic: SnapshotTopics) -> asyncio.Future:
+        """
+        Gets the future resolved when the topic gets a new version. Must be called on the event loop.
+        :param topic: The snapshot topic
+        :return: The future
+        """
+        future = self._changed.get(topic)
+        if future is None or future.done() or future.get_loop() is not self._loop:
+            future = self._changed[topic] = self._loop.create_future()
+        return future
+
+    def _notify(self, topic: SnapshotTopics) -> None:
+        """
+        Resolves the future of a topic. Must be called on the event loop.
+        :param topic: The snapshot topic
+        """
+        future = self._changed.pop(topic, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def _patch(self, snapshot: SnapshotModel, base: int) -> Optional[tuple[bytes, bytes]]:
+        """
+        Gets the patch from a recent version to the snapshot.
+        :param snapshot: The latest snapshot
+        :param base: The version the client holds
+        :return: (patch, gzip patch), None if the base is too old or the patch is not smaller than the body
+        """
+        with self._lock:
+            if self._snapshots.get(snapshot.topic) is not snapshot:
+                # Published in between; the cache belongs to the newer version.
+                return None
+            patches = self._patches.setdefault(snapshot.topic, {})
+            if base in patches:
+                return patches[base]
+            base_body = self._history.get(snapshot.topic, {}).get(base)
+            patch = None
+            if base_body is not None:
+                operations = make_patch(json.loads(base_body), json.loads(snapshot.body))
+                body = json.dumps(operations, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                if len(body) < len(snapshot.body):
+                    patch = (body, gzip.compress(body, mtime=0))
+            patches[base] = patch
+            return patch
+
+    async def response(self, topic: SnapshotTopics, request: Request, since: Optional[str] = None,
+                       delta: Optional[str] = None) -> Response:
+        """
+        Serves the latest snapshot.
+        With since (long-poll), holds the request until the version moves past since,
+         sharing the per-topic future with every other waiter.
+        A since from another boot (or ahead of the latest version) is answered with the snapshot at once.
+        With delta, answers a JSON Patch against that version when it is smaller than the snapshot.
+        A delta from another boot names a different document, so it is answered with the full snapshot.
+        :param topic: The snapshot topic
+        :param request: The request
+        :param since: The X-Snapshot-Version the client holds, None to answer at once
+        :param delta: The X-Snapshot-Version the client can apply a patch to, None for the full snapshot
+        :return:
+            - Status code 200 with the (gzip) JSON or MessagePack (by Accept) body, or the (gzip) JSON patch
+            - Status code 304 when If-None-Match matches, or the long-poll timed out
+            - Status code 404 when API is not ready
+        """
+        held = self._held_version(topic, since) if since is not None else None
+        if held is not None:
+            await self.wait_any({topic: held}, LONG_POLL_TIMEOUT)
+        snapshot = self.get(topic)
+        if snapshot is None:
+            return JSONResponse(status_code=404,
+                                content=GenericResponseModel.NotReady.value)
+        if self._prefers_msgpack(request.headers.get("Accept")):
+            # Another representation of the same version, so another ETag
+            etag = f'{snapshot.etag[:-1]}-msgpack"'
+            media_type, body, gzip_body = "application/msgpack", snapshot.msgpack_body, snapshot.msgpack_gzip_body
+        else:
+            etag = snapshot.etag
+            media_type, body, gzip_body = "application/json", snapshot.body, snapshot.gzip_body
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept, Accept-Encoding",
+            "X-Snapshot-Version": snapshot.tag
+        }
+        if self._etag_matches(request.headers.get("If-None-Match"), etag) or \
+                (held is not None and snapshot.version <= held):
+            return Response(status_code=304, headers=headers)
+        accepts_gzip = encoding_quality(request.headers.get("Accept-Encoding"), "gzip") > 0
+        base = self._held_version(topic, delta) if delta is not None else None
+        patch = self._patch(snapshot, base) if base is not None and base < snapshot.version else None
+        if patch is not None:
+            # The ETag names the full document, not the patch.
+            del headers["ETag"]
+            headers["X-Patch-Base"] = delta
+            if accepts_gzip:
+                headers["Content-Encoding"] = "gzip"
+            return Response(patch[1] if accepts_gzip else patch[0],
+                            media_type="application/json-patch+json", headers=headers)
+        if accepts_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(gzip_body, media_type=media_type, headers=headers)
+        return Response(body, media_type=media_type, headers=headers)
+
+    @staticmethod
+    def _prefers_msgpack(accept: Optional[str]) -> bool:
+        """
+        Checks whether the client asks for MessagePack rather than JSON.
+        Only a MessagePack type named in Accept counts, so "*/*" (or no Accept) gets JSON.
+        :param accept: The Accept header
+        :return: Whether to answer MessagePack
+        """
+        msgpack_quality = max(media_type_quality(accept, i, wildcard=False) for i in MSGPACK_TYPES)
+        return msgpack_quality > 0 and msgpack_quality >= media_type_quality(accept, "application/json")
+
+    @staticmethod
+    def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        """
+        Checks whether If-None-Match matches the ETag.
+        :param if_none_match: The If-None-Match header
+        :param etag: The ETag, quoted
+        :return: Whether to answer 304
+        """
+        if not if_none_match:
+            return False
+        candidates = [i.strip().removeprefix("W/") for i in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+
+    def _rebuild(self, topic: SnapshotTopics) -> Optional[SnapshotModel]:
+        """
+        Rebuilds a snapshot.
+        :param topic: The snapshot topic
+        :return: The latest snapshot
+        """
+        with self._lock:
+            try:
+                model = self._builders[topic]()
+            except Exception:
+                logger.exception(f"Failed to build snapshot {topic.value}.")
+                return self._snapshots.get(topic)
+            if model is None:
+                self._snapshots[topic] = None
+                return None
+            body = model if isinstance(model, bytes) else model.model_dump_json(by_alias=True).encode("utf-8")
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            previous = self._snapshots.get(topic)
+            if previous is not None and previous.etag == etag:
+                return previous
+            version = self._versions.get(topic, 0) + 1
+            msgpack_body = msgpack.packb(json.loads(body) if isinstance(model, bytes)
+                                         else model.model_dump(mode="json", by_alias=True))
+            tag = f"{self.epoch}.{version}"
+            snapshot = SnapshotModel(
+                topic=topic,
+                version=version,
+                tag=tag,
+                etag=etag,
+                body=body,
+                gzip_body=gzip.compress(body, mtime=0),
+                msgpack_body=msgpack_body,
+                msgpack_gzip_body=gzip.compress(msgpack_body, mtime=0),
+                frame=f'{{"topic":"{topic.value}","version":"{tag}","data":{body.decode("utf-8")}}}'
+            )
+            self._versions[topic] = version
+            self._snapshots[topic] = snapshot
+            history = self._history.setdefault(topic, OrderedDict())
+            history[version] = body
+            while len(history) > PATCH_WINDOW:
+                history.popitem(last=False)
+            self._patches[topic] = {}
+            logger.trace(f"Published snapshot {topic.value} v{version}.")
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._notify, topic)
+        return snapshot
+
+
+# Why not put this into Env?
+# Routers register their builders on import, before Env is initialized.
+snapshot_manager = SnapshotManager()
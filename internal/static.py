@@ -0,0 +1,96 @@
+import json
+import os
+from typing import Optional
+
+import anyio
+from loguru import logger
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from sdk import encoding_quality
+
+__all__ = ["PrecompressedStaticFiles"]
+
+# Sidecar suffix by Content-Encoding, in the order of preference
+SIDECARS = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Accept type asking for the TopoJSON of a GeoJSON layer
+TOPOJSON_TYPE = "application/topo+json"
+REVALIDATE_CACHE = "no-cache"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Static files that serve the precompressed sidecars written by tools/static_compressor.
+
+    Both the original names and the fingerprinted names are served from dist;
+     the fingerprinted ones never change, so they are cached as immutable.
+    Clients resolve the fingerprinted names with /static/dist/manifest.json.
+    The TopoJSON of a layer (tools/topojson_exporter) is served at topojson/NAME.json,
+     or at geojson/NAME.json for requests accepting application/topo+json.
+    Files not in the manifest (or every file, before the tool has run) are served as-is.
+    """
+
+    def __init__(self, directory: str, dist_directory: str):
+        super().__init__(directory=directory)
+        self.dist_directory = dist_directory
+        # Request path -> (path in dist, whether the path is fingerprinted)
+        self._dist_paths: dict[str, tuple[str, bool]] = {}
+        self._init_manifest()
+
+    def _init_manifest(self) -> None:
+        """
+        Reads the manifest written by tools/static_compressor.
+        """
+        try:
+            with open(os.path.join(self.dist_directory, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest: dict[str, str] = json.load(f)
+        except FileNotFoundError:
+            logger.warning("No precompressed static files. Run tools/static_compressor to build them.")
+            return
+        for original, fingerprinted in manifest.items():
+            self._dist_paths[original] = (fingerprinted, False)
+            self._dist_paths[fingerprinted] = (fingerprinted, True)
+        logger.debug(f"Loaded {len(manifest)} precompressed static files.")
+
+    def _select(self, dist_path: str, accept_encoding: str) -> tuple[str, Optional[str]]:
+        """
+        Selects the sidecar the client accepts. Shall not be used externally.
+        :param dist_path: The path in dist
+        :param accept_encoding: The Accept-Encoding header
+        :return: Full path of the sidecar + its Content-Encoding (None for the original)
+        """
+        full_path = os.path.join(self.dist_directory, dist_path)
+        qualities = {encoding: encoding_quality(accept_encoding, encoding) for encoding, _ in SIDECARS}
+        # The highest q-value wins; the sort is stable, so ties keep the order of preference.
+        for encoding, suffix in sorted(SIDECARS, key=lambda i: qualities[i[0]], reverse=True):
+            if qualities[encoding] > 0 and os.path.isfile(full_path + suffix):
+                return full_path + suffix, encoding
+        return full_path, None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        """
+        Serves the sidecar the client accepts, falling back to StaticFiles for files not in the manifest.
+        """
+        path = path.replace(os.sep, "/")
+        headers = Headers(scope=scope)
+        if TOPOJSON_TYPE in headers.get("Accept", "") and path.startswith("geojson/"):
+            topojson_path = path.replace("geojson/", "topojson/", 1)
+            if topojson_path in self._dist_paths:
+                path = topojson_path
+        dist = self._dist_paths.get(path)
+        if dist is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+        dist_path, fingerprinted = dist
+        accept_encoding = headers.get("Accept-Encoding", "")
+        full_path, encoding = self._select(dist_path, accept_encoding)
+        stat_result = await anyio.to_thread.run_sync(os.stat, full_path)
+        response = self.file_response(full_path, stat_result, scope)
+        response.headers["Vary"] = "Accept, Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE if fingerprinted else REVALIDATE_CACHE
+        if encoding is not None:
+            # GZipMiddleware leaves responses with Content-Encoding alone.
+            response.headers["Content-Encoding"] = encoding
+        return response
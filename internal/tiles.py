@@ -0,0 +1,435 @@
+import gzip
+import hashlib
+import json
+import math
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from loguru import logger
+
+from schemas.tiles import TileLayers
+from sdk import func_timer, relpath
+
+__all__ = ["VectorTiles"]
+
+# Buffer around each tile, as a fraction of the tile size, so that clipped edges are not drawn at the seams
+TILE_BUFFER = 1 / 64
+# Pixels in a tile; simplification removes details smaller than half a pixel
+TILE_EXTENT = 256
+
+Point = list[float]
+Ring = list[Point]
+Bounds = tuple[float, float, float, float]
+
+
+def _tile_bounds(z: int, x: int, y: int, buffer: float = 0) -> Bounds:
+    """
+    Converts a (Web Mercator) tile into its longitude/latitude bounds. Shall not be used externally.
+    :return: (west, south, east, north)
+    """
+    n = 2 ** z
+
+    def latitude(tile_y: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return (
+        (x - buffer) / n * 360 - 180,
+        latitude(y + 1 + buffer),
+        (x + 1 + buffer) / n * 360 - 180,
+        latitude(y - buffer)
+    )
+
+
+def _points_bounds(points: list[Point]) -> Bounds:
+    """
+    Gets the bounds of points. Shall not be used externally.
+    """
+    longitudes = [i[0] for i in points]
+    latitudes = [i[1] for i in points]
+    return min(longitudes), min(latitudes), max(longitudes), max(latitudes)
+
+
+def _intersects(a: Bounds, b: Bounds) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _contains(outer: Bounds, inner: Bounds) -> bool:
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+
+def _clip_ring(ring: Ring, bounds: Bounds) -> Ring:
+    """
+    Clips a polygon ring to the bounds (Sutherland-Hodgman). Shall not be used externally.
+    :return: The clipped ring, closed; empty if it is outside the bounds
+    """
+    west, south, east, north = bounds
+    # (axis, limit, whether the inside is below the limit)
+    for axis, limit, below in ((0, west, False), (0, east, True), (1, south, False), (1, north, True)):
+        if not ring:
+            break
+        clipped = []
+        previous = ring[-1]
+        previous_inside = (previous[axis] <= limit) if below else (previous[axis] >= limit)
+        for point in ring:
+            inside = (point[axis] <= limit) if below else (point[axis] >= limit)
+            if inside != previous_inside:
+                ratio = (limit - previous[axis]) / (point[axis] - previous[axis])
+                crossing = [previous[0] + (point[0] - previous[0]) * ratio,
+                            previous[1] + (point[1] - previous[1]) * ratio]
+                crossing[axis] = limit
+                clipped.append(crossing)
+            if inside:
+                clipped.append(point)
+            previous, previous_inside = point, inside
+        ring = clipped
+    if ring and ring[0] != ring[-1]:
+        ring.append(ring[0])
+    return ring
+
+
+def _clip_line(line: Ring, bounds: Bounds) -> list[Ring]:
+    """
+    Clips a line to the bounds (Liang-Barsky, segment by segment). Shall not be used externally.
+    :return: The parts of the line inside the bounds
+    """
+    west, south, east, north = bounds
+    parts: list[Ring] = []
+    current: Ring = []
+    for start, end in zip(line, line[1:]):
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        t0, t1 = 0.0, 1.0
+        visible = True
+        for p, q in ((-dx, start[0] - west), (dx, east - start[0]), (-dy, start[1] - south), (dy, north - start[1])):
+            if p == 0:
+                if q < 0:
+                    visible = False
+                    break
+                continue
+            t = q / p
+            if p < 0:
+                t0 = max(t0, t)
+            else:
+                t1 = min(t1, t)
+            if t0 > t1:
+                visible = False
+                break
+        if not visible:
+            if current:
+                parts.append(current)
+                current = []
+            continue
+        clipped_start = [start[0] + dx * t0, start[1] + dy * t0]
+        clipped_end = [start[0] + dx * t1, start[1] + dy * t1]
+        if not current:
+            current = [clipped_start]
+        current.append(clipped_end)
+        if t1 < 1:
+            parts.append(current)
+            current = []
+    if current:
+        parts.append(current)
+    return [i for i in parts if len(i) >= 2]
+
+
+def _simplify(points: Ring, tolerance: float) -> Ring:
+    """
+    Simplifies a line or ring (Douglas-Peucker), keeping both ends. Shall not be used externally.
+    :param tolerance: Distance below which points are removed, in degrees
+    """
+    if len(points) < 3:
+        return points
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    squared_tolerance = tolerance * tolerance
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[last]
+        dx, dy = bx - ax, by - ay
+        length = dx * dx + dy * dy
+        farthest, farthest_distance = 0, 0.0
+        for index in range(first + 1, last):
+            px, py = points[index]
+            if length == 0:
+                distance = (px - ax) ** 2 + (py - ay) ** 2
+            else:
+                t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length))
+                distance = (px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2
+            if distance > farthest_distance:
+                farthest, farthest_distance = index, distance
+        if farthest_distance > squared_tolerance:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class _TileCache:
+    """
+    LRU cache of gzip tiles, bounded by size, in memory and (optionally) on disk.
+    """
+
+    def __init__(self, memory_size: int, disk_size: int, directory: Optional[str]):
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = memory_size
+        self._memory_used = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._disk_size = disk_size
+        self._disk_used = 0
+        self._directory = directory
+        self._lock = threading.Lock()
+        if directory is not None:
+            self._init_disk()
+
+    def _init_disk(self) -> None:
+        """
+        Indexes the tiles on disk, oldest first.
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        files = []
+        for root, _, names in os.walk(self._directory):
+            for name in names:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, os.path.relpath(path, self._directory), stat.st_size))
+        for _, key, size in sorted(files):
+            self._disk[key.replace(os.sep, "/")] = size
+            self._disk_used += size
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Evicts the least recently used tiles until both caches fit. Must be called with the lock.
+        """
+        while self._memory_used > self._memory_size and self._memory:
+            _, content = self._memory.popitem(last=False)
+            self._memory_used -= len(content)
+        while self._disk_used > self._disk_size and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            try:
+                os.remove(os.path.join(self._directory, key))
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        try:
+            with open(os.path.join(self._directory, key), "rb") as f:
+                content = f.read()
+        except OSError:
+            return None
+        self.put(key, content, to_disk=False)
+        return content
+
+    def put(self, key: str, content: bytes, to_disk: bool = True) -> None:
+        if to_disk and self._directory is not None:
+            path = os.path.join(self._directory, key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(content)
+                with self._lock:
+                    self._disk_used += len(content) - self._disk.pop(key, 0)
+                    self._disk[key] = len(content)
+            except OSError:
+                logger.exception(f"Failed to write tile {key} to disk.")
+        with self._lock:
+            self._memory_used += len(content) - len(self._memory.pop(key, b""))
+            self._memory[key] = content
+            self._evict()
+
+
+class VectorTiles:
+    """
+    VectorTiles class to cut the static GeoJSON layers into tiles.
+
+    Tiles are GeoJSON FeatureCollections (longitude/latitude) of the features clipped to the tile,
+     simplified to the tile's resolution and rounded to it.
+    Every tile is cut once: the gzip result is kept in a bounded memory + disk cache.
+    """
+
+    def __init__(self, max_zoom: int, memory_cache_size: int, disk_cache_size: int,
+                 disk_cache_directory: Optional[str]):
+        """
+        Initializes the instance.
+        :param max_zoom: The deepest zoom served
+        :param memory_cache_size: Bytes of tiles kept in memory
+        :param disk_cache_size: Bytes of tiles kept on disk
+        :param disk_cache_directory: The directory of the disk cache, None to keep tiles in memory only
+        """
+        self.max_zoom = max_zoom
+        # Layer -> [(feature, geometry bounds)]
+        self._layers: dict[TileLayers, list[tuple[dict, Bounds]]] = {}
+        self._fingerprints: dict[TileLayers, str] = {}
+        self._init_layers()
+        if disk_cache_directory is not None:
+            self._clean_disk_cache(disk_cache_directory)
+        self._cache = _TileCache(memory_cache_size, disk_cache_size, disk_cache_directory)
+        # Tile key -> lock held while the tile is being cut, so that it is cut once
+        self._cutting: dict[str, threading.Lock] = {}
+        self._cutting_lock = threading.Lock()
+        logger.success("VectorTiles instance initialized.")
+
+    @func_timer
+    def _init_layers(self) -> None:
+        """
+        Reads the layers and indexes their features by bounds.
+        """
+        for layer in TileLayers:
+            try:
+                with open(relpath(f"../static/geojson/{layer.value}.json"), "rb") as f:
+                    raw_content = f.read()
+                content = json.loads(raw_content)
+            except Exception:
+                logger.exception(f"Failed to read tile layer {layer.value}.")
+                continue
+            self._fingerprints[layer] = hashlib.blake2b(raw_content, digest_size=8).hexdigest()
+            if content.get("type") == "GeometryCollection":
+                features = [{"type": "Feature", "properties": {}, "geometry": i} for i in content["geometries"]]
+            else:
+                features = content.get("features", [])
+            indexed = []
+            for feature in features:
+                geometry = feature.get("geometry")
+                if not geometry:
+                    continue
+                indexed.append((feature, _points_bounds(self._flatten(geometry))))
+            self._layers[layer] = indexed
+
+    def _clean_disk_cache(self, directory: str) -> None:
+        """
+        Removes the tiles cut from previous versions of the layers.
+        """
+        if not os.path.isdir(directory):
+            return
+        fingerprints = {layer.value: fingerprint for layer, fingerprint in self._fingerprints.items()}
+        for layer in os.listdir(directory):
+            if not os.path.isdir(os.path.join(directory, layer)):
+                # Not a layer, e.g. a file left by hand.
+                continue
+            for fingerprint in os.listdir(os.path.join(directory, layer)):
+                if fingerprints.get(layer) != fingerprint:
+                    shutil.rmtree(os.path.join(directory, layer, fingerprint), ignore_errors=True)
+
+    @staticmethod
+    def _flatten(geometry: dict) -> list[Point]:
+        """
+        Gets every point of a geometry.
+        """
+        coordinates = geometry["coordinates"]
+        if geometry["type"] in ("Point",):
+            return [coordinates]
+        if geometry["type"] in ("LineString", "MultiPoint"):
+            return coordinates
+        if geometry["type"] in ("Polygon", "MultiLineString"):
+            return [point for part in coordinates for point in part]
+        return [point for polygon in coordinates for ring in polygon for point in ring]
+
+    def get_tile(self, layer: TileLayers, z: int, x: int, y: int) -> Optional[bytes]:
+        """
+        Gets a tile, cutting it if it has not been cut.
+        :param layer: The layer
+        :param z: Zoom
+        :param x: Column
+        :param y: Row
+        :return: The gzip GeoJSON of the tile, None if the tile does not exist
+        """
+        if layer not in self._layers or not (0 <= z <= self.max_zoom and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            return None
+        key = f"{layer.value}/{self._fingerprints[layer]}/{z}/{x}/{y}.json.gz"
+        content = self._cache.get(key)
+        if content is not None:
+            return content
+        with self._cutting_lock:
+            lock = self._cutting.setdefault(key, threading.Lock())
+        with lock:
+            content = self._cache.get(key)
+            if content is None:
+                content = gzip.compress(self._cut(layer, z, x, y), mtime=0)
+                self._cache.put(key, content)
+        with self._cutting_lock:
+            self._cutting.pop(key, None)
+        return content
+
+    @func_timer
+    def _cut(self, layer: TileLayers, z: int, x: int, y: int) -> bytes:
+        """
+        Cuts a tile.
+        :return: The GeoJSON of the tile
+        """
+        bounds = _tile_bounds(z, x, y, TILE_BUFFER)
+        west, south, east, north = _tile_bounds(z, x, y)
+        # Half a pixel, in degrees of longitude scaled to the tile's latitude
+        tolerance = (east - west) / TILE_EXTENT / 2 * math.cos(math.radians((north + south) / 2))
+        digits = max(0, math.ceil(-math.log10((east - west) / TILE_EXTENT))) + 1
+        features = []
+        for feature, feature_bounds in self._layers[layer]:
+            if not _intersects(bounds, feature_bounds):
+                continue
+            geometry = self._clip_geometry(feature["geometry"], bounds, _contains(bounds, feature_bounds),
+                                           tolerance, digits)
+            if geometry is not None:
+                features.append({"type": "Feature", "properties": feature.get("properties") or {},
+                                 "geometry": geometry})
+        return json.dumps({"type": "FeatureCollection", "features": features},
+                          ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def _clip_geometry(geometry: dict, bounds: Bounds, inside: bool, tolerance: float,
+                       digits: int) -> Optional[dict]:
+        """
+        Clips, simplifies and rounds a geometry.
+        :param inside: Whether the geometry is inside the bounds, so that it needs no clipping
+        :return: The geometry, None if nothing is left
+        """
+
+        def finish(points: Ring, minimum: int) -> Optional[Ring]:
+            points = [[round(i[0], digits), round(i[1], digits)] for i in _simplify(points, tolerance)]
+            return points if len(points) >= minimum else None
+
+        geometry_type = geometry["type"]
+        if geometry_type in ("Polygon", "MultiPolygon"):
+            polygons = [geometry["coordinates"]] if geometry_type == "Polygon" else geometry["coordinates"]
+            clipped_polygons = []
+            for polygon in polygons:
+                rings = []
+                for ring in polygon:
+                    ring = finish(ring if inside else _clip_ring(ring, bounds), 4)
+                    if ring is None and not rings:
+                        # The outer ring is gone, so are the holes.
+                        break
+                    if ring is not None:
+                        rings.append(ring)
+                if rings:
+                    clipped_polygons.append(rings)
+            if not clipped_polygons:
+                return None
+            if len(clipped_polygons) == 1:
+                return {"type": "Polygon", "coordinates": clipped_polygons[0]}
+            return {"type": "MultiPolygon", "coordinates": clipped_polygons}
+        if geometry_type in ("LineString", "MultiLineString"):
+            lines = [geometry["coordinates"]] if geometry_type == "LineString" else geometry["coordinates"]
+            clipped_lines = []
+            for line in lines:
+                for part in ([line] if inside else _clip_line(line, bounds)):
+                    part = finish(part, 2)
+                    if part is not None:
+                        clipped_lines.append(part)
+            if not clipped_lines:
+                return None
+            if len(clipped_lines) == 1:
+                return {"type": "LineString", "coordinates": clipped_lines[0]}
+            return {"type": "MultiLineString", "coordinates": clipped_lines}
+        # Points are not clipped.
+        return geometry
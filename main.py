@@ -16,7 +16,6 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 from starlette.responses import JSONResponse
-from starlette.staticfiles import StaticFiles
 from urllib3.exceptions import InsecureRequestWarning
 
 import config
@@ -29,86 +28,29 @@ from internal.geojson import GeoJson
 from internal.intensity2color import IntensityToColor
 from internal.modules_init import module_manager
 from internal.pswave import PSWave
+from internal.static import PrecompressedStaticFiles
+from internal.tiles import VectorTiles
 from routers import global_earthquake_router, earthquake_router, shake_level_router, tsunami_router, debug_router, \
-    heartbeat_router, index_router
+    heartbeat_router, index_router, push_router, compact_router, tiles_router, realtime_shindo_router
 from schemas.config import RunEnvironment
 from schemas.router import GenericResponseModel
-from sdk import relpath
-
-# --- Constants
-RUN_ENV = RunEnvironment(os.getenv("ENV")) \
-    if os.getenv("ENV") \
-    else RunEnvironment.development
-load_dotenv(f".{RUN_ENV.value}.env")
-
-# --- Config initialization
-config.init_config(RUN_ENV)
-Env.run_env = RUN_ENV
-
-# --- Error tracking initialization
-if Env.config.sentry.enabled:
-    if os.getenv("SENTRY_URL"):
-        logger.debug(f"SENTRY_URL={os.getenv('SENTRY_URL')}. sample_rate={Env.config.sentry.sample_rate}. "
-                     f"release={Env.version}")
-        _ = logger.add(
-            BreadcrumbHandler(level=logging.DEBUG),
-            diagnose=Env.config.logger.diagnose,
-            level=logging.DEBUG,
-        )
-        _ = logger.add(
-            EventHandler(level=logging.ERROR),
-            diagnose=Env.config.logger.diagnose,
-            level=logging.ERROR,
-        )
-        integrations = [
-            LoggingIntegration(level=None, event_level=None),
-        ]
-
-        sentry_sdk.init(
-            dsn=os.getenv("SENTRY_URL"),
-            traces_sample_rate=Env.config.sentry.sample_rate.traces,
-            sample_rate=Env.config.sentry.sample_rate.errors,
-            integrations=integrations,
-            environment=RUN_ENV.value,
-            release=f"quakemap-back@{Env.version}"
-        )
-        logger.success("Initialized sentry.")
-    else:
-        logger.critical("Failed to initialize sentry: "
-                        "No SENTRY_URL defined in environment.")
-        sys.exit(1)
-
-# --- Runtime initialization
-# noinspection PyUnresolvedReferences
-requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
-# Force IPV4: currently no ipv6 allowed
-# noinspection PyUnresolvedReferences
-requests.packages.urllib3.util.connection.HAS_IPV6 = False
+from sdk import relpath, close_sessions, close_async_sessions
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     yield
     module_manager.stop_program()
+    Env.intensity2color_instance.shutdown()
+    close_sessions()
+    await close_async_sessions()
 
 
-app = FastAPI(
-    lifespan=lifespan,
-    debug=Env.run_env == RunEnvironment.testing,
-    docs_url="/docs" if Env.config.utilities.doc else None,
-    redoc_url="/redoc" if Env.config.utilities.redoc else None
-)
-
-app.mount("/static", StaticFiles(directory=relpath("static")), name="static")
-
-if RUN_ENV != RunEnvironment.testing:
-    @app.exception_handler(RequestValidationError)
-    async def validation_exception_handler(_, __):
-        return JSONResponse(status_code=500,
-                            content=GenericResponseModel.ServerError.value)
+async def validation_exception_handler(_, __):
+    return JSONResponse(status_code=500,
+                        content=GenericResponseModel.ServerError.value)
 
 
-@app.exception_handler(StarletteHTTPException)
 async def custom_http_exception_handler(request, exc):
     if exc.status_code == 404:
         return JSONResponse(status_code=404,
@@ -117,38 +59,124 @@ async def custom_http_exception_handler(request, exc):
         return await http_exception_handler(request, exc)
 
 
-# --- Router initialization
-app.include_router(global_earthquake_router)
-app.include_router(earthquake_router)
-app.include_router(shake_level_router)
-app.include_router(tsunami_router)
-if Env.run_env == RunEnvironment.testing:
-    app.include_router(debug_router)
-app.include_router(heartbeat_router)
-app.include_router(index_router)
-
-# --- Middleware initialization
-if Env.config.utilities.cors:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_methods=["*"],
-        allow_headers=["*"],
+def create_app() -> FastAPI:
+    """
+    Initializes the config, error tracking, internals and modules, and builds the app.
+    :return: The app
+    """
+    # --- Constants
+    RUN_ENV = RunEnvironment(os.getenv("ENV")) \
+        if os.getenv("ENV") \
+        else RunEnvironment.development
+    load_dotenv(f".{RUN_ENV.value}.env")
+
+    # --- Config initialization
+    config.init_config(RUN_ENV)
+    Env.run_env = RUN_ENV
+
+    # --- Error tracking initialization
+    if Env.config.sentry.enabled:
+        if os.getenv("SENTRY_URL"):
+            logger.debug(f"SENTRY_URL={os.getenv('SENTRY_URL')}. sample_rate={Env.config.sentry.sample_rate}. "
+                         f"release={Env.version}")
+            _ = logger.add(
+                BreadcrumbHandler(level=logging.DEBUG),
+                diagnose=Env.config.logger.diagnose,
+                level=logging.DEBUG,
+            )
+            _ = logger.add(
+                EventHandler(level=logging.ERROR),
+                diagnose=Env.config.logger.diagnose,
+                level=logging.ERROR,
+            )
+            integrations = [
+                LoggingIntegration(level=None, event_level=None),
+            ]
+
+            sentry_sdk.init(
+                dsn=os.getenv("SENTRY_URL"),
+                traces_sample_rate=Env.config.sentry.sample_rate.traces,
+                sample_rate=Env.config.sentry.sample_rate.errors,
+                integrations=integrations,
+                environment=RUN_ENV.value,
+                release=f"quakemap-back@{Env.version}"
+            )
+            logger.success("Initialized sentry.")
+        else:
+            logger.critical("Failed to initialize sentry: "
+                            "No SENTRY_URL defined in environment.")
+            sys.exit(1)
+
+    # --- Runtime initialization
+    # noinspection PyUnresolvedReferences
+    requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+    # Force IPV4: currently no ipv6 allowed
+    # noinspection PyUnresolvedReferences
+    requests.packages.urllib3.util.connection.HAS_IPV6 = False
+
+    app = FastAPI(
+        lifespan=lifespan,
+        debug=Env.run_env == RunEnvironment.testing,
+        docs_url="/docs" if Env.config.utilities.doc else None,
+        redoc_url="/redoc" if Env.config.utilities.redoc else None
     )
-    logger.success("Added CORS middleware.")
-app.add_middleware(GZipMiddleware)
-logger.success("Added gzip middleware.")
-
-# --- Internals initialization
-Env.geojson_instance = GeoJson()
-Env.centroid_instance = Centroid()
-Env.intensity2color_instance = IntensityToColor()
-Env.pswave_instance = PSWave()
-if Env.config.dmdata.enabled:
-    Env.dmdata_instance = DMDataFetcher()
-Env.db_instance = Database()
-module_manager.init()
-debug_manager.init()
+
+    app.mount("/static", PrecompressedStaticFiles(directory=relpath("static"), dist_directory=relpath("static/dist")),
+              name="static")
+
+    if RUN_ENV != RunEnvironment.testing:
+        app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(StarletteHTTPException, custom_http_exception_handler)
+
+    # --- Router initialization
+    app.include_router(global_earthquake_router)
+    app.include_router(earthquake_router)
+    app.include_router(shake_level_router)
+    app.include_router(realtime_shindo_router)
+    app.include_router(tsunami_router)
+    app.include_router(push_router)
+    app.include_router(compact_router)
+    app.include_router(tiles_router)
+    if Env.run_env == RunEnvironment.testing:
+        app.include_router(debug_router)
+    app.include_router(heartbeat_router)
+    app.include_router(index_router)
+
+    # --- Middleware initialization
+    if Env.config.utilities.cors:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+        logger.success("Added CORS middleware.")
+    app.add_middleware(GZipMiddleware)
+    logger.success("Added gzip middleware.")
+
+    # --- Internals initialization
+    Env.geojson_instance = GeoJson()
+    Env.centroid_instance = Centroid()
+    Env.intensity2color_instance = IntensityToColor(
+        processes=Env.config.intensity.process_pool.workers if Env.config.intensity.process_pool.enabled else 0
+    )
+    Env.pswave_instance = PSWave()
+    Env.tiles_instance = VectorTiles(
+        max_zoom=Env.config.tiles.max_zoom,
+        memory_cache_size=Env.config.tiles.memory_cache_size * 1024 * 1024,
+        disk_cache_size=Env.config.tiles.disk_cache_size * 1024 * 1024,
+        disk_cache_directory=relpath(Env.config.tiles.disk_cache_directory)
+    )
+    if Env.config.dmdata.enabled:
+        Env.dmdata_instance = DMDataFetcher()
+    Env.db_instance = Database()
+    module_manager.init()
+    debug_manager.init()
+    return app
+
+
+# The Intensity2Color worker processes import this module as __mp_main__, and need none of the app.
+app = create_app() if __name__ != "__mp_main__" else None
 
 if __name__ == "__main__":
     # noinspection PyTypeChecker
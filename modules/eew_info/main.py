@@ -1,3 +1,4 @@
+import hashlib
 import time
 from typing import Optional
 
@@ -19,6 +20,11 @@ from schemas.sdk import ResponseTypeModel, ResponseTypes
 from sdk import func_timer, web_request, verify_none, json_to_model, relpath
 
 
+# Total seconds of each upstream fetch, retries included, so that a dead upstream
+#  gives up before the next poll (every 2s) instead of holding a scheduler thread.
+_FETCH_DEADLINE = 1.5
+
+
 class EEWInfo(BaseModule):
     """
     Earthquake Early Warning module.
@@ -27,9 +33,12 @@ class EEWInfo(BaseModule):
     def __init__(self):
         super(EEWInfo, self).__init__()
         self.info = EEWReturnModel()
+        # (report_id, report_number) -> (hash of the kmoni image, its intensities) of the latest kmoni EEW
+        self._kmoni_intensity_memo: Optional[tuple[tuple[str, int | str], str, IntensityToColorReturnModel]] = None
 
     def reload(self):
         self.info = EEWReturnModel()
+        self._kmoni_intensity_memo = None
 
     @func_timer
     def get_info(self) -> None:
@@ -46,6 +55,14 @@ class EEWInfo(BaseModule):
             logger.exception("Failed to get kmoni eew.")
         logger.info("Refreshed EEW info.")
 
+    @staticmethod
+    def _hedge_percentile() -> Optional[float]:
+        """
+        Gets the latency percentile after which latency-critical EEW fetches are hedged.
+        :return: The percentile, None if hedging is disabled
+        """
+        return Env.config.eew.hedge.percentile if Env.config.eew.hedge.enabled else None
+
     @func_timer
     def _get_svir_eew(self) -> None:
         """
@@ -69,6 +86,7 @@ class EEWInfo(BaseModule):
         if not Env.config.debug.iedred_eew.enabled:
             iedred_eew = web_request(url="https://api.iedred7584.com/eew/json/",
                                      proxy=Env.config.proxy,
+                                     deadline=_FETCH_DEADLINE,
                                      response_type=ResponseTypeModel(
                                          type=ResponseTypes.json_to_model,
                                          model=IedredEEWModel
@@ -86,10 +104,12 @@ class EEWInfo(BaseModule):
         if not (Env.config.debug.svir_eew.file_override.enabled and Env.config.debug.svir_eew.enabled):
             svir_eew = web_request(url="https://svir.jp/eew/data.json",
                                    proxy=Env.config.proxy,
+                                   deadline=_FETCH_DEADLINE,
                                    response_type=ResponseTypeModel(
                                        type=ResponseTypes.json_to_model,
                                        model=SvirEEWModel
-                                   ))
+                                   ),
+                                   hedge=self._hedge_percentile())
             verify_none(svir_eew.status)
             svir_eew = svir_eew.content
         else:
@@ -285,10 +305,12 @@ class EEWInfo(BaseModule):
         req_date, req_time = self._fetch_kmoni_time()
         response = web_request(url=f"http://www.kmoni.bosai.go.jp/webservice/hypo/eew/{req_time}.json",
                                proxy=Env.config.proxy,
+                               deadline=_FETCH_DEADLINE,
                                response_type=ResponseTypeModel(
                                    type=ResponseTypes.json_to_model,
                                    model=KmoniEEWModel
-                               ))
+                               ),
+                               hedge=self._hedge_percentile())
         verify_none(response.status)
         content: KmoniEEWModel = response.content
         if content.result.message != "":
@@ -314,8 +336,15 @@ class EEWInfo(BaseModule):
         else:
             logger.warning(f"Different type than forecast and warning: {content.alert_flag}")
             report_flag = EEWAlertTypeEnum.default
+        serial = (content.report_id, content.report_number)
+        if self._kmoni_intensity_memo is not None and self._kmoni_intensity_memo[0] == serial \
+                and isinstance(self.info.kmoni, EEWParseReturnModel):
+            # Same report: only the P/S wave radii change.
+            logger.debug("EEW report unchanged. Skipped kmoni image parsing.")
+            self._refresh_kmoni_pswave(self.info.kmoni, content.depth)
+            return
         parsed_intensity = EEWConvertedIntensityEnum[content.calculated_intensity.name]
-        intensity_model = self._parse_eew_intensity(req_date, req_time)
+        intensity_model = self._parse_eew_intensity(req_date, req_time, serial)
         origin_time = time.strptime(content.origin_time, "%Y%m%d%H%M%S")
         origin_timestamp = int(time.mktime(origin_time))
         pswave_time = self._parse_pswave_time(origin_timestamp, content.depth)
@@ -354,18 +383,38 @@ class EEWInfo(BaseModule):
             p_wave=pswave_time.p_time
         )
 
-    def _parse_eew_intensity(self, req_date: str, req_time: str) -> IntensityToColorReturnModel:
+    def _refresh_kmoni_pswave(self, eew: EEWParseReturnModel, depth: str) -> None:
+        """
+        Refreshes the P/S wave radii of the kmoni EEW, keeping everything else.
+        :param eew: The latest kmoni EEW
+        :param depth: The hypocenter depth
+        """
+        pswave_time = self._parse_pswave_time(eew.occur_timestamp, depth)
+        if not pswave_time:
+            logger.warning("No PSWave time available.")
+            pswave_time = PSWaveTimeModel()
+        self.info.kmoni = eew.model_copy(update={
+            "s_wave": pswave_time.s_time,
+            "p_wave": pswave_time.p_time
+        })
+
+    def _parse_eew_intensity(self, req_date: str, req_time: str,
+                             serial: tuple[str, int | str]) -> IntensityToColorReturnModel:
         """
         Parses EEW intensities from kmoni image.
+        The image is only parsed if it differs from the one of the previous report.
+        :param serial: (report_id, report_number) of the EEW
         :return: station intensities, area intensities, whether to recommend area coloring
         """
         if not Env.config.debug.kmoni_eew.image_override.enabled:
             response = web_request(
                 url=f"http://www.kmoni.bosai.go.jp/data/map_img/EstShindoImg/eew/{req_date}/{req_time}.eew.gif",
                 proxy=Env.config.proxy,
+                deadline=_FETCH_DEADLINE,
                 response_type=ResponseTypeModel(
                     type=ResponseTypes.raw_response
-                )
+                ),
+                hedge=self._hedge_percentile()
             )
             verify_none(response.status)
             content = response.content.content
@@ -374,7 +423,14 @@ class EEWInfo(BaseModule):
                 content = f.read()
                 f.close()
 
-        return Env.intensity2color_instance.intensity2color(content)
+        image_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+        if self._kmoni_intensity_memo is not None and self._kmoni_intensity_memo[1] == image_hash:
+            logger.debug("EEW image unchanged. Reused the intensities.")
+            intensity_model = self._kmoni_intensity_memo[2]
+        else:
+            intensity_model = Env.intensity2color_instance.intensity2color(content)
+        self._kmoni_intensity_memo = (serial, image_hash, intensity_model)
+        return intensity_model
 
     def _parse_pswave_time(self, origin_timestamp: int, depth: str) -> Optional[PSWaveTimeModel]:
         """
@@ -403,6 +459,7 @@ class EEWInfo(BaseModule):
         """
         time_model = web_request(url="http://www.kmoni.bosai.go.jp/webservice/server/pros/latest.json",
                                  proxy=Env.config.proxy,
+                                 deadline=_FETCH_DEADLINE,
                                  response_type=ResponseTypeModel(
                                      type=ResponseTypes.json_to_model,
                                      model=KmoniTimeModel
@@ -9,6 +9,10 @@ from schemas.sdk import ResponseTypes, ResponseTypeModel
 from sdk import func_timer, todo, web_request, verify_none
 
 
+# Total seconds of a fetch, retries included (polled every 5s)
+_FETCH_DEADLINE = 4
+
+
 class GlobalEarthquake(BaseModule):
     """
     Global earthquake module.
@@ -29,9 +33,13 @@ class GlobalEarthquake(BaseModule):
                                        model=CEICApiModel
                                    ),
                                    proxy=Env.config.proxy,
+                                   deadline=_FETCH_DEADLINE,
                                    cacheless=True,
-                                   verify=False)
+                                   verify=False,
+                                   conditional=True)
             verify_none(response.status)
+            if response.unchanged and self.info is not None:
+                return
             self.parse_info(response.content)
         else:
             todo()
@@ -15,6 +15,10 @@ from schemas.sdk import ResponseTypeModel, ResponseTypes
 from sdk import func_timer, web_request, verify_none, relpath
 
 
+# Total seconds of a fetch, retries included (polled every 2s)
+_FETCH_DEADLINE = 1.5
+
+
 class P2PInfo(BaseModule):
     """
     Earthquake Info module.
@@ -46,8 +50,14 @@ class P2PInfo(BaseModule):
                                        type=ResponseTypes.json  # Because the model is too complicated.
                                    ),
                                    max_retries=1,
-                                   proxy=Env.config.proxy)
+                                   proxy=Env.config.proxy,
+                                   deadline=_FETCH_DEADLINE,
+                                   conditional=True,
+                                   fingerprint=True)
             verify_none(response.status)
+            if response.unchanged and self._last_response_list:
+                logger.trace("P2P telegram not modified.")
+                return
             self.parse_info(response.content)
             self.fetched_once = True
         else:
@@ -61,15 +71,14 @@ class P2PInfo(BaseModule):
             # First time parsing
             parsing_list = [content[0]]
             logger.debug("First time parsing. Defaulted to the first message.")
-        elif self._last_response_list != content:
-            logger.debug("New earthquake information incoming. Splitting message.")
-            parsing_list = [y for y in content if y not in self._last_response_list]
-            logger.debug("Spilt message. Parsing now.")
         else:
-            # We assume that return_list is not None.
-            # Because no new information is coming, we chose not to parse it again.
-            logger.debug("No new earthquake information.")
-            return
+            # Unchanged telegrams are already filtered out by their fingerprint in get_info().
+            parsing_list = [y for y in content if y not in self._last_response_list]
+            if not parsing_list:
+                # Because no new information is coming, we chose not to parse it again.
+                logger.debug("No new earthquake information.")
+                return
+            logger.debug("New earthquake information incoming. Spilt message. Parsing now.")
         self._last_response_list = content
         # Reset content
         self.info = P2PTotalInfoModel()
@@ -0,0 +1,157 @@
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from loguru import logger
+
+from env import Env
+from modules.base_module import BaseModule
+from schemas.eew import KmoniTimeModel
+from schemas.realtime_shindo import RealtimeShindoModel, RealtimeShindoHistoryModel
+from schemas.sdk import ResponseTypeModel, ResponseTypes
+from sdk import func_timer, web_request, verify_none
+
+KMONI_URL = "http://www.kmoni.bosai.go.jp"
+
+
+class IntensityRingBuffer:
+    """
+    Rolling real-time intensities of every station, of the latest images.
+    """
+
+    def __init__(self, size: int, stations: int):
+        """
+        Initializes the buffer.
+        :param size: Images kept
+        :param stations: Stations of every image
+        """
+        self._times: list[str] = [""] * size
+        self._intensities = np.full((size, stations), np.nan)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, image_time: str, intensities: np.ndarray) -> None:
+        """
+        Appends the intensities of an image, replacing the oldest one when full.
+        :param image_time: Time of the image
+        :param intensities: Intensity of every station, NaN if not observed
+        """
+        with self._lock:
+            self._times[self._next] = image_time
+            self._intensities[self._next] = intensities
+            self._next = (self._next + 1) % len(self._times)
+            self._count = min(self._count + 1, len(self._times))
+
+    def history(self, station: int) -> tuple[list[str], np.ndarray]:
+        """
+        Gets the intensities of a station, oldest first.
+        :param station: Index of the station
+        :return: Times, intensities (NaN if not observed)
+        """
+        with self._lock:
+            rows = (np.arange(self._count) + self._next - self._count) % len(self._times)
+            return [self._times[i] for i in rows], self._intensities[rows, station]
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class RealtimeShindo(BaseModule):
+    """
+    Real-time intensity module.
+    Samples kmoni's real-time intensity image every second, with the Intensity2Color engine.
+    """
+
+    def __init__(self):
+        super(RealtimeShindo, self).__init__()
+        self.base_url = KMONI_URL
+        self._last_time: Optional[str] = None
+        self._history: Optional[IntensityRingBuffer] = None
+
+    def reload(self):
+        self.info = None
+        self._last_time = None
+        self._history = None
+
+    @func_timer
+    def get_info(self) -> None:
+        """
+        Gets the latest real-time intensity image from kmoni.
+        """
+        req_date, req_time = self._fetch_kmoni_time()
+        if req_time == self._last_time:
+            logger.trace("No new real-time intensity image.")
+            return
+        response = web_request(url=f"{self.base_url}/data/map_img/RealTimeImg/jma_s/{req_date}/{req_time}.jma_s.gif",
+                               proxy=Env.config.proxy,
+                               response_type=ResponseTypeModel(
+                                   type=ResponseTypes.raw_response
+                               ),
+                               max_retries=1,
+                               timeout=1)
+        verify_none(response.status)
+        self.parse_image(req_time, response.content.content)
+
+    def parse_image(self, image_time: str, raw_image: bytes) -> None:
+        """
+        Parses a real-time intensity image.
+        :param image_time: Time of the image, as %Y%m%d%H%M%S
+        :param raw_image: The image file
+        """
+        # A station isn't observed when its pixel has no color, not when it reads -3 (the lowest of the scale).
+        detail, _, observed = Env.intensity2color_instance.station_intensities(raw_image)
+        intensities = np.full(len(Env.centroid_instance.earthquake_station_centroid), np.nan)
+        intensities[Env.intensity2color_instance.station_centroid_index[observed]] = detail[observed]
+
+        if self._history is None:
+            self._history = IntensityRingBuffer(Env.config.realtime_shindo.history, len(intensities))
+        self._history.append(image_time, intensities)
+        self._last_time = image_time
+        self.info = RealtimeShindoModel(
+            time=image_time,
+            max_intensity=float(detail[observed].max()) if observed.any() else None,
+            intensity=self._to_list(intensities)
+        )
+        logger.debug(f"Refreshed real-time intensities of {image_time}.")
+
+    def history(self, station: int) -> Optional[RealtimeShindoHistoryModel]:
+        """
+        Gets the recent real-time intensities of a station.
+        :param station: Index of the station in Centroid.earthquake_station_centroid
+        :return: The intensities, None if there's no image yet
+        """
+        if self._history is None:
+            return None
+        times, intensities = self._history.history(station)
+        return RealtimeShindoHistoryModel(
+            time=times,
+            intensity=self._to_list(intensities)
+        )
+
+    @staticmethod
+    def _to_list(intensities: np.ndarray) -> list[Optional[float]]:
+        """
+        Converts intensities into a list. Shall not be used externally.
+        :param intensities: The intensities, NaN if not observed
+        :return: The intensities, None if not observed
+        """
+        return np.where(np.isnan(intensities), None, intensities).tolist()
+
+    def _fetch_kmoni_time(self) -> tuple[str, str]:
+        """
+        Gets kmoni's latest image time.
+        :return: a time tuple: (%Y%m%d, %Y%m%d%H%M%S)
+        """
+        time_model = web_request(url=f"{self.base_url}/webservice/server/pros/latest.json",
+                                 proxy=Env.config.proxy,
+                                 response_type=ResponseTypeModel(
+                                     type=ResponseTypes.json_to_model,
+                                     model=KmoniTimeModel
+                                 ),
+                                 max_retries=1,
+                                 timeout=1)
+        verify_none(time_model.status)
+        time_struct = time.strptime(time_model.content.latest_time, "%Y/%m/%d %H:%M:%S")
+        return time.strftime("%Y%m%d", time_struct), time.strftime("%Y%m%d%H%M%S", time_struct)
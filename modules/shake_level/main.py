@@ -9,6 +9,10 @@ from schemas.shake_level import ShakeLevelReturnModel, ShakeLevelApiModel
 from sdk import func_timer, web_request, verify_none
 
 
+# Total seconds of a fetch, retries included (polled every 2s)
+_FETCH_DEADLINE = 1.5
+
+
 class ShakeLevel(BaseModule):
     """
     Shake Level module.
@@ -28,8 +32,12 @@ class ShakeLevel(BaseModule):
                                        type=ResponseTypes.json_to_model,
                                        model=ShakeLevelReturnModel
                                    ),
-                                   proxy=Env.config.proxy)
+                                   proxy=Env.config.proxy,
+                                   deadline=_FETCH_DEADLINE,
+                                   conditional=True)
             verify_none(response.status)
+            if response.unchanged and self.info is not None:
+                return
             self.parse_info(response.content)
         else:
             self.parse_info(ShakeLevelReturnModel(
@@ -0,0 +1,55 @@
+import io
+from typing import Optional
+from xml.etree import ElementTree
+
+from schemas.jma import JMAListEntry, JMAListAuthor, JMAListContent, JMAListEntryLink
+
+__all__ = ["JMAFeedReader"]
+
+ATOM_NAMESPACE = "{http://www.w3.org/2005/Atom}"
+
+
+class JMAFeedReader:
+    @classmethod
+    def read_new_entries(cls, content: bytes, last_entry_id: Optional[str]) -> list[JMAListEntry]:
+        """
+        Reads JMA's Atom feed (e.g. eqvol.xml) newest-first,
+        and stops at the newest entry processed last time, leaving the rest of the feed unparsed.
+        :param content: The raw feed
+        :param last_entry_id: The id of the newest entry processed last time, None to read the whole feed
+        :return: The new entries, newest-first
+        """
+        entries = []
+        for _, element in ElementTree.iterparse(io.BytesIO(content), events=("end",)):
+            if element.tag != f"{ATOM_NAMESPACE}entry":
+                continue
+            entry_id = element.findtext(f"{ATOM_NAMESPACE}id")
+            if entry_id == last_entry_id:
+                break
+            entries.append(cls._to_entry(element, entry_id))
+            element.clear()
+        return entries
+
+    @classmethod
+    def _to_entry(cls, element: ElementTree.Element, entry_id: str) -> JMAListEntry:
+        """
+        Converts an Atom entry element to the entry model.
+        :param element: The entry element
+        :param entry_id: The entry id
+        :return: The entry
+        """
+        # Both are optional in Atom, so a missing one is taken as empty.
+        content = element.find(f"{ATOM_NAMESPACE}content")
+        if content is None:
+            content = ElementTree.Element(f"{ATOM_NAMESPACE}content")
+        link = element.find(f"{ATOM_NAMESPACE}link")
+        if link is None:
+            link = ElementTree.Element(f"{ATOM_NAMESPACE}link")
+        return JMAListEntry(
+            author=JMAListAuthor(name=element.findtext(f"{ATOM_NAMESPACE}author/{ATOM_NAMESPACE}name", "")),
+            content=JMAListContent(text=content.text or "", type=content.get("type", "")),
+            id=entry_id,
+            link=JMAListEntryLink(href=link.get("href", ""), type=link.get("type", "")),
+            title=element.findtext(f"{ATOM_NAMESPACE}title", ""),
+            updated=element.findtext(f"{ATOM_NAMESPACE}updated", "")
+        )
@@ -7,9 +7,10 @@ from loguru import logger
 
 from env import Env
 from modules.base_module import BaseModule
+from modules.tsunami.feed import JMAFeedReader
 from schemas.config import RunEnvironment
 from schemas.dmdata.generic import DmdataMessageTypes
-from schemas.jma import JMAList
+from schemas.jma import JMAListEntry
 from schemas.jma.generic import JMAControlStatus, JMAInfoType
 from schemas.jma.tsunami_expectation import JMAMessageTypeEnum, JMATsunamiExpectationApiModel, JMATsunamiForecastItem, \
     JMATsunamiFirstHeightCondition, \
@@ -24,6 +25,10 @@ from schemas.tsunami import TsunamiExpectationReturnModel, TsunamiParseOrigin, T
 from sdk import func_timer, web_request, verify_none, relpath, generate_list
 
 
+# Total seconds of a feed fetch, retries included (polled every 4s)
+_FETCH_DEADLINE = 3
+
+
 class TsunamiInfo(BaseModule):
     """
     Tsunami Info module.
@@ -38,7 +43,8 @@ class TsunamiInfo(BaseModule):
         self.tsunami_watch_in_effect = False
         self.tsunami_warning_in_effect = False
 
-        self.previous_tsunami_info: Optional[JMAList] = None
+        # The newest feed entry parsed so far
+        self.latest_entry_id: Optional[str] = None
 
     def reload(self) -> None:
         self.tsunami_expectation_info = TsunamiExpectationReturnModel()
@@ -47,7 +53,8 @@ class TsunamiInfo(BaseModule):
         self.tsunami_watch_in_effect = False
         self.tsunami_warning_in_effect = False
 
-        self.previous_tsunami_info: Optional[JMAList] = None
+        # The newest feed entry parsed so far
+        self.latest_entry_id: Optional[str] = None
 
     @func_timer
     def get_info(self) -> None:
@@ -59,36 +66,31 @@ class TsunamiInfo(BaseModule):
             return
         response = web_request(url="https://www.data.jma.go.jp/developer/xml/feed/eqvol.xml",
                                proxy=Env.config.proxy,
+                               deadline=_FETCH_DEADLINE,
                                response_type=ResponseTypeModel(
-                                   type=ResponseTypes.xml_to_model,
-                                   model=JMAList
-                               ))
+                                   type=ResponseTypes.raw_response
+                               ),
+                               conditional=True,
+                               fingerprint=True)
         verify_none(response.status)
-        self.parse_jma_list(response.content)
+        if response.unchanged and self.latest_entry_id is not None \
+                and not Env.config.debug.tsunami.enabled:
+            logger.debug("No new JMA XML info.")
+            return
+        # Only entries newer than the ones parsed are read from the feed.
+        self.parse_jma_list(JMAFeedReader.read_new_entries(response.content.content, self.latest_entry_id))
 
     @func_timer
-    def parse_jma_list(self, content: JMAList) -> None:
+    def parse_jma_list(self, entries: list[JMAListEntry]) -> None:
         """
         Parses JMA list.
-        :param content: The JMA list model
+        :param entries: The new entries of the JMA list, newest-first
         """
-        if self.previous_tsunami_info is None:
-            logger.debug("New JMA XML updated. Parsing messages.")
-        elif self.previous_tsunami_info.model_dump() != content.model_dump():
-            logger.debug("New JMA XML updated. Parsing messages.")
-        elif not Env.config.debug.tsunami.enabled:
-            logger.debug("No new JMA XML info.")
-            return
+        logger.debug(f"New JMA XML updated with {len(entries)} new entries. Parsing messages.")
 
         info_urls = {}
         watch_urls = {}
-        for i in content.feed.entry:
-            # Omit already parsed ones
-            if self.previous_tsunami_info is not None:
-                if i in self.previous_tsunami_info.feed.entry:
-                    logger.trace(f"Already parsed {i.id}. Skipping.")
-                    continue
-
+        for i in entries:
             # Url format: https://<url>/developer/xml/data/<id>
             # Id format: <yyyyMMddhhmmss>_<typically 0>_<id>_<code>.xml
             # Url storage: { url: time } in info_urls and watch_urls
@@ -101,8 +103,9 @@ class TsunamiInfo(BaseModule):
             elif message_type == JMAMessageTypeEnum.tsunami_watch:
                 watch_urls[i.id] = message_time
 
-        # Set previous XML to current one
-        self.previous_tsunami_info = content
+        # Remember where to stop reading next time
+        if entries:
+            self.latest_entry_id = entries[0].id
 
         if (not info_urls) and (not Env.config.debug.tsunami.enabled) and \
                 (not watch_urls) and (not Env.config.debug.tsunami_watch.enabled):
@@ -141,12 +144,12 @@ class TsunamiInfo(BaseModule):
             # Parse the latest first.
             self.get_tsunami_watch(list(reversed(watch_info_urls)))
 
-    def parse_dmdata(self, xml_message: dict, parse_type: DmdataMessageTypes):
+    def parse_dmdata(self, content: JMATsunamiExpectationApiModel | JMATsunamiWatchApiModel,
+                     parse_type: DmdataMessageTypes):
         """Parses dmdata messages.
-        :param xml_message: The message
+        :param content: The message
         :param parse_type: Tsunami expectation/watch information"""
         if parse_type == DmdataMessageTypes.tsunami_warning:
-            content = JMATsunamiExpectationApiModel.model_validate(xml_message)
             if not self._parse_flag(content):
                 logger.warning(f"Drill/Other tsunami message: {content.report.control.status.name}. Skipped.")
                 return
@@ -156,7 +159,6 @@ class TsunamiInfo(BaseModule):
                 content.report.head.report_date
             )
         elif parse_type == DmdataMessageTypes.tsunami_info:
-            content = JMATsunamiWatchApiModel.model_validate(xml_message)
             if content.report.head.title != "津波観測に関する情報":
                 logger.warning(f"Tsunami observation message: {content.report.head.title} not parsed.")
                 return
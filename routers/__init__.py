@@ -1,7 +1,11 @@
+from .compact import compact_router
 from .debug import debug_router
 from .earthquake_info import earthquake_router
 from .global_earthquake import global_earthquake_router
 from .heartbeat import heartbeat_router
 from .index import index_router
+from .push import push_router
+from .realtime_shindo import realtime_shindo_router
 from .shake_level import shake_level_router
+from .tiles import tiles_router
 from .tsunami import tsunami_router
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from fastapi import APIRouter
+from starlette.requests import Request
+
+from internal.compact import CompactConverter
+from internal.snapshot import snapshot_manager
+from routers.earthquake_info import build_earthquake_info
+from schemas.compact import CompactDictionaryModel, CompactEarthquakeInfoModel
+from schemas.router import GENERIC_STATUS
+from schemas.snapshot import SnapshotTopics
+
+__all__ = ["compact_router"]
+
+compact_router = APIRouter(
+    prefix="/api/v2",
+    tags=["v2"]
+)
+
+
+def build_compact_dictionary() -> CompactDictionaryModel:
+    """
+    Builds the compact dictionary of areas and stations.
+    :return: The dictionary
+    """
+    from env import Env
+    return Env.centroid_instance.compact_dictionary
+
+
+def build_compact_earthquake_info() -> CompactEarthquakeInfoModel | None:
+    """
+    Builds compact earthquake info from P2P and EEW.
+    :return: The compact earthquake info, None when API is not ready
+    """
+    info = build_earthquake_info()
+    if info is None:
+        return None
+    return CompactConverter.convert_earthquake_info(info)
+
+
+snapshot_manager.register(SnapshotTopics.dictionary_v2, build_compact_dictionary, [])
+snapshot_manager.register(SnapshotTopics.earthquake_v2, build_compact_earthquake_info, ["p2p_info", "eew_info"])
+
+
+@compact_router.get("/dictionary",
+                    response_model=CompactDictionaryModel,
+                    tags=["v2"],
+                    responses=GENERIC_STATUS)
+async def get_compact_dictionary(request: Request):
+    """
+    Gets the areas and stations that the v2 payloads refer to by index.
+    Only changes with the centroid assets, so it can be cached for long.
+    :return:
+        - Status code 200 when OK
+        - Status code 304 when not modified
+    """
+    response = await snapshot_manager.response(SnapshotTopics.dictionary_v2, request)
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    return response
+
+
+@compact_router.get("/earthquake_info",
+                    response_model=CompactEarthquakeInfoModel,
+                    tags=["v2"],
+                    responses=GENERIC_STATUS)
+async def get_compact_earthquake_info(request: Request, since: Optional[str] = None, delta: Optional[str] = None):
+    """
+    Gets earthquake info from P2P and EEW, in the compact schema.
+    With since (the X-Snapshot-Version held), waits until a newer version is published,
+     unless since is from another boot of the server.
+    With delta (the X-Snapshot-Version held), may answer a JSON Patch (application/json-patch+json) against it.
+    :return:
+        - Status code 200 when OK, with the info or the patch
+        - Status code 304 when not modified, or no newer version before the timeout
+        - Status code 404 when API is not ready
+    """
+    return await snapshot_manager.response(SnapshotTopics.earthquake_v2, request, since, delta)
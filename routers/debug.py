@@ -12,6 +12,7 @@ from starlette.responses import JSONResponse
 
 from env import Env
 from internal.debug import debug_manager
+from internal.snapshot import snapshot_manager
 from schemas.dmdata.generic import DmdataMessageTypes
 from schemas.dmdata.socket import DmdataSocketData, DmdataSocketDataHead
 from schemas.eew import EEWReturnModel
@@ -312,6 +313,7 @@ async def clear_eew():
     """
     from internal.modules_init import module_manager
     module_manager.classes["eew_info"].info = EEWReturnModel()
+    snapshot_manager.publish("eew_info")
 
     return JSONResponse(
         status_code=200,
@@ -329,6 +331,7 @@ async def set_p2p_message(info_type: EarthquakeIssueTypeEnum):
     Env.config.debug.p2p_info.enabled = True
     Env.config.debug.p2p_info.file = relpath(f"../test/assets/p2p/{info_type.value}.json")
     module_manager.classes["p2p_info"].get_info()
+    snapshot_manager.publish("p2p_info")
     return JSONResponse(
         status_code=200,
         content=GenericResponseModel.OK.value
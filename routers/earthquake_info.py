@@ -1,11 +1,17 @@
+from typing import Optional
+
 from fastapi import APIRouter
+from starlette.requests import Request
 from starlette.responses import PlainTextResponse
 
 from env import Env
 from internal.modules_init import module_manager
+from internal.snapshot import snapshot_manager
 from modules.eew_info.middleware import EEWInfoMiddleWare
-from schemas.p2p_info import EarthquakeInfoReturnModel
+from schemas.eew import EEWParseReturnModel
+from schemas.p2p_info import EarthquakeInfoReturnModel, EEWInfoReturnModel
 from schemas.router import GENERIC_STATUS
+from schemas.snapshot import SnapshotTopics
 
 earthquake_router = APIRouter(
     prefix="/api",
@@ -13,23 +19,121 @@ earthquake_router = APIRouter(
 )
 
 
+def build_earthquake_info() -> EarthquakeInfoReturnModel | None:
+    """
+    Builds earthquake info from P2P and EEW.
+    :return: The earthquake info, None when API is not ready
+    """
+    p2p_info = module_manager.get_module_info("p2p_info")
+    eew_info = module_manager.get_module_info("eew_info")
+    if p2p_info is None:
+        return None
+    return EarthquakeInfoReturnModel(
+        info=p2p_info.earthquake,
+        eew=EEWInfoMiddleWare.use_svir_or_kmoni(eew_info)
+    )
+
+
+def build_eew_info() -> EEWInfoReturnModel | None:
+    """
+    Builds EEW info alone, for the push channel.
+    :return: The EEW info, None when API is not ready
+    """
+    eew_info = module_manager.get_module_info("eew_info")
+    if eew_info is None:
+        return None
+    return EEWInfoReturnModel(eew=EEWInfoMiddleWare.use_svir_or_kmoni(eew_info))
+
+
+def build_earthquake_geojson() -> bytes | None:
+    """
+    Builds the area GeoJSON colored by the intensities of the latest earthquake.
+    :return: The GeoJSON, None when API is not ready
+    """
+    p2p_info = module_manager.get_module_info("p2p_info")
+    if p2p_info is None:
+        return None
+    # The latest entry may have no areas, e.g. the destination report following the scale prompt of DMData.
+    latest = next((i for i in reversed(p2p_info.earthquake) if i.area_intensity and i.area_intensity.areas), None)
+    if latest is None:
+        return Env.geojson_instance.get_intensity_geojson(("",), {})
+    return Env.geojson_instance.get_intensity_geojson(
+        (str(latest.id), latest.receive_time),
+        {name: area.intensity.value for name, area in latest.area_intensity.areas.items()}
+    )
+
+
+def build_eew_geojson() -> bytes | None:
+    """
+    Builds the area GeoJSON colored by the area intensities of the current EEW.
+    :return: The GeoJSON, None when API is not ready
+    """
+    eew_info = module_manager.get_module_info("eew_info")
+    if eew_info is None:
+        return None
+    eew = EEWInfoMiddleWare.use_svir_or_kmoni(eew_info)
+    if not isinstance(eew, EEWParseReturnModel) or not eew.area_coloring.areas:
+        return Env.geojson_instance.get_intensity_geojson(("",), {})
+    return Env.geojson_instance.get_intensity_geojson(
+        (eew.type, eew.report_id, str(eew.report_num)),
+        {name: area.intensity for name, area in eew.area_coloring.areas.items()}
+    )
+
+
+snapshot_manager.register(SnapshotTopics.earthquake, build_earthquake_info, ["p2p_info", "eew_info"])
+snapshot_manager.register(SnapshotTopics.eew, build_eew_info, ["eew_info"])
+snapshot_manager.register(SnapshotTopics.earthquake_geojson, build_earthquake_geojson, ["p2p_info"])
+snapshot_manager.register(SnapshotTopics.eew_geojson, build_eew_geojson, ["eew_info"])
+
+
 @earthquake_router.get("/earthquake_info",
                        response_model=EarthquakeInfoReturnModel,
                        tags=["earthquake"],
                        responses=GENERIC_STATUS)
-async def get_p2p_info():
+async def get_p2p_info(request: Request, since: Optional[str] = None, delta: Optional[str] = None):
     """
     Gets earthquake info from P2P and EEW.
+    With since (the X-Snapshot-Version held), waits until a newer version is published,
+     unless since is from another boot of the server.
+    With delta (the X-Snapshot-Version held), may answer a JSON Patch (application/json-patch+json) against it.
+    :return:
+        - Status code 200 when OK, with the info or the patch
+        - Status code 304 when not modified, or no newer version before the timeout
+        - Status code 404 when API is not ready
+    """
+    return await snapshot_manager.response(SnapshotTopics.earthquake, request, since, delta)
+
+
+@earthquake_router.get("/earthquake_geojson",
+                       tags=["earthquake"],
+                       responses=GENERIC_STATUS)
+async def get_earthquake_geojson(request: Request, since: Optional[str] = None):
+    """
+    Gets the areas (GeoJSON) colored by the intensities of the latest earthquake.
+    With since (the X-Snapshot-Version held), waits until a newer version is published,
+     unless since is from another boot of the server.
     :return:
         - Status code 200 when OK
+        - Status code 304 when not modified, or no newer version before the timeout
         - Status code 404 when API is not ready
     """
-    p2p_info = module_manager.get_module_info("p2p_info")
-    eew_info = module_manager.get_module_info("eew_info")
-    return EarthquakeInfoReturnModel(
-        info=p2p_info.earthquake,
-        eew=EEWInfoMiddleWare.use_svir_or_kmoni(eew_info)
-    )
+    return await snapshot_manager.response(SnapshotTopics.earthquake_geojson, request, since)
+
+
+@earthquake_router.get("/eew_geojson",
+                       tags=["earthquake"],
+                       responses=GENERIC_STATUS)
+async def get_eew_geojson(request: Request, since: Optional[str] = None):
+    """
+    Gets the areas (GeoJSON) colored by the area intensities of the current EEW.
+    With since (the X-Snapshot-Version held), waits until a newer version is published,
+     unless since is from another boot of the server.
+    :return:
+        - Status code 200 when OK
+        - Status code 304 when not modified, or no newer version before the timeout
+        - Status code 404 when API is not ready
+    """
+    return await snapshot_manager.response(SnapshotTopics.eew_geojson, request, since)
 
 
 @earthquake_router.get("/raw_data",
@@ -1,9 +1,11 @@
 from fastapi import APIRouter
-from starlette.responses import JSONResponse
+from starlette.requests import Request
 
 from internal.modules_init import module_manager
+from internal.snapshot import snapshot_manager
 from schemas.global_earthquake import GlobalEarthquakeApiModel
-from schemas.router import GENERIC_STATUS, GenericResponseModel
+from schemas.router import GENERIC_STATUS
+from schemas.snapshot import SnapshotTopics
 
 __all__ = ["global_earthquake_router"]
 
@@ -13,21 +15,34 @@ global_earthquake_router = APIRouter(
 )
 
 
+def build_global_earthquake_info() -> GlobalEarthquakeApiModel | None:
+    """
+    Builds global earthquake info from the module.
+    :return: The global earthquake info, None when API is not ready
+    """
+    info = module_manager.get_module_info("global_earthquake")
+    if info is None:
+        return None
+    return GlobalEarthquakeApiModel(
+        status=0,
+        data=info
+    )
+
+
+snapshot_manager.register(SnapshotTopics.global_earthquake, build_global_earthquake_info,
+                          ["global_earthquake"])
+
+
 @global_earthquake_router.get("/global_earthquake_info",
                               response_model=GlobalEarthquakeApiModel,
                               tags=["global_earthquake"],
                               responses=GENERIC_STATUS)
-async def get_global_earthquake_info():
+async def get_global_earthquake_info(request: Request):
     """
     Gets global earthquake info from the module.
     :return:
         - Status code 200 when OK
+        - Status code 304 when not modified
         - Status code 404 when API is not ready
     """
-    if module_manager.get_module_info("global_earthquake") is None:
-        return JSONResponse(status_code=404,
-                            content=GenericResponseModel.NotReady.value)
-    return GlobalEarthquakeApiModel(
-        status=0,
-        data=module_manager.get_module_info("global_earthquake")
-    )
+    return await snapshot_manager.response(SnapshotTopics.global_earthquake, request)
@@ -3,6 +3,8 @@ from fastapi import APIRouter
 __all__ = ["heartbeat_router"]
 
 from schemas.dmdata.generic import DmdataStatusModel
+from schemas.sdk import CircuitBreakerModel, HedgeStatsModel
+from sdk import breaker_states, hedge_stats
 
 heartbeat_router = APIRouter(
     tags=["heartbeat"]
@@ -18,3 +20,23 @@ async def heartbeat_dmdata():
     """
     from env import Env
     return Env.dmdata_instance.status
+
+
+@heartbeat_router.get("/heartbeat/upstreams",
+                      response_model=dict[str, CircuitBreakerModel],
+                      tags=["heartbeat"])
+async def heartbeat_upstreams():
+    """
+    Checks the circuit breaker state of every upstream host.
+    """
+    return breaker_states()
+
+
+@heartbeat_router.get("/heartbeat/hedges",
+                      response_model=dict[str, HedgeStatsModel],
+                      tags=["heartbeat"])
+async def heartbeat_hedges():
+    """
+    Checks the hedged request statistics of every upstream host.
+    """
+    return hedge_stats()
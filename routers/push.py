@@ -0,0 +1,126 @@
+import asyncio
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from loguru import logger
+from starlette.responses import JSONResponse, StreamingResponse
+
+from internal.snapshot import snapshot_manager
+from schemas.router import GenericResponseModel
+from schemas.snapshot import SnapshotTopics
+
+__all__ = ["push_router"]
+
+push_router = APIRouter(
+    prefix="/api",
+    tags=["push"]
+)
+
+# Seconds to wait for new snapshots before a keep-alive
+_KEEPALIVE_INTERVAL = 15
+# Seconds a WebSocket client may take to receive a frame before it is dropped
+_SEND_TIMEOUT = 5
+# The static dictionary is fetched once instead of pushed
+_PUSH_TOPICS = [i for i in SnapshotTopics if i != SnapshotTopics.dictionary_v2]
+# The GeoJSON topics are large, and real-time intensities change every second, so only pushed on request
+_DEFAULT_TOPICS = [i for i in _PUSH_TOPICS
+                   if i not in (SnapshotTopics.earthquake_geojson, SnapshotTopics.eew_geojson,
+                                SnapshotTopics.realtime_shindo)]
+
+
+def _parse_topics(topics: str) -> Optional[list[SnapshotTopics]]:
+    """
+    Parses the comma-separated topics. Shall not be used externally.
+    :param topics: e.g. "eew,tsunami"; empty for all topics but the GeoJSON and real-time intensity ones
+    :return: The topics, None if any of them is invalid
+    """
+    if not topics:
+        return _DEFAULT_TOPICS
+    try:
+        subscribed = list(dict.fromkeys(SnapshotTopics(i.strip()) for i in topics.split(",")))
+    except ValueError:
+        return None
+    return subscribed if all(i in _PUSH_TOPICS for i in subscribed) else None
+
+
+async def _drain(websocket: WebSocket) -> None:
+    """
+    Reads (and ignores) client messages until the client disconnects. Shall not be used externally.
+    :param websocket: The WebSocket
+    """
+    try:
+        while True:
+            await websocket.receive_text()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+
+@push_router.websocket("/push")
+async def push_websocket(websocket: WebSocket, topics: str = ""):
+    """
+    Pushes the snapshots of the subscribed topics as they change.
+    Every message is {"topic": ..., "version": <X-Snapshot-Version>, "data": <the same body as the API>}.
+    A slow client only gets the latest version of each topic, and is dropped if it stalls.
+    """
+    subscribed = _parse_topics(topics)
+    if subscribed is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    versions = {topic: 0 for topic in subscribed}
+    receiver = asyncio.create_task(_drain(websocket))
+    try:
+        while True:
+            waiter = asyncio.create_task(snapshot_manager.wait_any(versions, _KEEPALIVE_INTERVAL))
+            await asyncio.wait([waiter, receiver], return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                waiter.cancel()
+                break
+            for snapshot in waiter.result():
+                await asyncio.wait_for(websocket.send_text(snapshot.frame), _SEND_TIMEOUT)
+                versions[snapshot.topic] = snapshot.version
+    except asyncio.TimeoutError:
+        logger.debug("Dropped a stalled push client.")
+        await websocket.close(code=1013)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        receiver.cancel()
+
+
+async def _sse_frames(versions: dict[SnapshotTopics, int]) -> AsyncIterator[str]:
+    """
+    Yields the server-sent events of the subscribed topics. Shall not be used externally.
+    :param versions: Topic -> the version the client holds
+    :return: The events
+    """
+    while True:
+        snapshots = await snapshot_manager.wait_any(versions, _KEEPALIVE_INTERVAL)
+        if not snapshots:
+            yield ": keep-alive\n\n"
+            continue
+        for snapshot in snapshots:
+            versions[snapshot.topic] = snapshot.version
+            yield f"id: {snapshot.tag}\nevent: {snapshot.topic.value}\ndata: {snapshot.frame}\n\n"
+
+
+@push_router.get("/push/sse",
+                 response_class=StreamingResponse,
+                 tags=["push"])
+async def push_sse(topics: str = ""):
+    """
+    Pushes the snapshots of the subscribed topics as server-sent events, for clients without WebSocket.
+    :return:
+        - Status code 200 with the event stream
+        - Status code 400 when a topic is invalid
+    """
+    subscribed = _parse_topics(topics)
+    if subscribed is None:
+        return JSONResponse(status_code=400,
+                            content=GenericResponseModel.BadRequest.value)
+    return StreamingResponse(
+        _sse_frames({topic: 0 for topic in subscribed}),
+        media_type="text/event-stream",
+        # Content-Encoding keeps GZipMiddleware from buffering the stream
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"}
+    )
@@ -0,0 +1,72 @@
+__all__ = ["realtime_shindo_router"]
+
+from typing import Optional
+
+from fastapi import APIRouter
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from env import Env
+from internal.modules_init import module_manager
+from internal.snapshot import snapshot_manager
+from schemas.realtime_shindo import RealtimeShindoModel, RealtimeShindoHistoryModel
+from schemas.router import GENERIC_STATUS, GenericResponseModel
+from schemas.snapshot import SnapshotTopics
+
+realtime_shindo_router = APIRouter(
+    prefix="/api",
+    tags=["realtime_shindo"]
+)
+
+
+def build_realtime_shindo() -> RealtimeShindoModel | None:
+    """
+    Builds the real-time intensities from the module.
+    :return: The real-time intensities, None when API is not ready
+    """
+    return module_manager.get_module_info("realtime_shindo")
+
+
+snapshot_manager.register(SnapshotTopics.realtime_shindo, build_realtime_shindo, ["realtime_shindo"])
+
+
+@realtime_shindo_router.get("/realtime_shindo",
+                            response_model=RealtimeShindoModel,
+                            tags=["realtime_shindo"],
+                            responses=GENERIC_STATUS)
+async def get_realtime_shindo(request: Request, since: Optional[str] = None, delta: Optional[str] = None):
+    """
+    Gets the latest real-time intensity of every observation station.
+    With since (the X-Snapshot-Version held), waits until a newer version is published,
+     unless since is from another boot of the server.
+    With delta (the X-Snapshot-Version held), may answer a JSON Patch (application/json-patch+json) against it.
+    :return:
+        - Status code 200 when OK, with the info or the patch
+        - Status code 304 when not modified, or no newer version before the timeout
+        - Status code 404 when API is not ready
+    """
+    return await snapshot_manager.response(SnapshotTopics.realtime_shindo, request, since, delta)
+
+
+@realtime_shindo_router.get("/realtime_shindo/history/{station}",
+                            response_model=RealtimeShindoHistoryModel,
+                            tags=["realtime_shindo"],
+                            responses=GENERIC_STATUS)
+async def get_realtime_shindo_history(station: int):
+    """
+    Gets the recent real-time intensities of an observation station.
+    :param station: Index of the station in the v2 dictionary's observation_stations
+    :return:
+        - Status code 200 when OK
+        - Status code 400 when the station is invalid
+        - Status code 404 when API is not ready
+    """
+    if not 0 <= station < len(Env.centroid_instance.earthquake_station_centroid):
+        return JSONResponse(status_code=400,
+                            content=GenericResponseModel.BadRequest.value)
+    module = module_manager.classes.get("realtime_shindo")
+    history = module.history(station) if module is not None else None
+    if history is None:
+        return JSONResponse(status_code=404,
+                            content=GenericResponseModel.NotReady.value)
+    return history
@@ -1,11 +1,15 @@
 __all__ = ["shake_level_router"]
 
+from typing import Optional
+
 from fastapi import APIRouter
-from starlette.responses import JSONResponse
+from starlette.requests import Request
 
 from internal.modules_init import module_manager
-from schemas.router import GENERIC_STATUS, GenericResponseModel
+from internal.snapshot import snapshot_manager
+from schemas.router import GENERIC_STATUS
 from schemas.shake_level import ShakeLevelApiModel
+from schemas.snapshot import SnapshotTopics
 
 shake_level_router = APIRouter(
     prefix="/api",
@@ -13,19 +17,34 @@ shake_level_router = APIRouter(
 )
 
 
+def build_shake_level_info() -> ShakeLevelApiModel | None:
+    """
+    Builds shake level info from the module.
+    :return: The shake level info, None when API is not ready
+    """
+    info = module_manager.get_module_info("shake_level")
+    if info is None:
+        return None
+    # Only the fields of the API model are exposed.
+    return ShakeLevelApiModel.model_validate(info, from_attributes=True)
+
+
+snapshot_manager.register(SnapshotTopics.shake_level, build_shake_level_info, ["shake_level"])
+
+
 @shake_level_router.get("/shake_level",
                         response_model=ShakeLevelApiModel,
                         tags=["shake_level"],
                         responses=GENERIC_STATUS)
-async def get_shake_level_info():
+async def get_shake_level_info(request: Request, since: Optional[str] = None, delta: Optional[str] = None):
     """
     Gets shake level info from the module.
+    With since (the X-Snapshot-Version held), waits until a newer version is published,
+     unless since is from another boot of the server.
+    With delta (the X-Snapshot-Version held), may answer a JSON Patch (application/json-patch+json) against it.
     :return:
-        - Status code 200 when OK
+        - Status code 200 when OK, with the info or the patch
+        - Status code 304 when not modified, or no newer version before the timeout
         - Status code 404 when API is not ready
     """
-    info = module_manager.get_module_info("shake_level")
-    if info is None:
-        return JSONResponse(status_code=404,
-                            content=GenericResponseModel.NotReady.value)
-    return info
+    return await snapshot_manager.response(SnapshotTopics.shake_level, request, since, delta)
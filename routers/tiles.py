@@ -0,0 +1,45 @@
+import gzip
+
+from fastapi import APIRouter
+from starlette.requests import Request
+from starlette.responses import Response, JSONResponse
+
+from schemas.router import GENERIC_STATUS, GenericResponseModel
+from schemas.tiles import TileLayers
+from sdk import encoding_quality
+
+__all__ = ["tiles_router"]
+
+tiles_router = APIRouter(
+    prefix="/tiles",
+    tags=["tiles"]
+)
+
+
+@tiles_router.get("/{layer}/{z}/{x}/{y}",
+                  tags=["tiles"],
+                  responses=GENERIC_STATUS)
+def get_tile(layer: str, z: int, x: int, y: int, request: Request):
+    """
+    Gets a tile of a static GeoJSON layer, clipped to the tile and simplified to its zoom.
+    Runs in the thread pool, since cutting an uncached tile is CPU-bound.
+    :return:
+        - Status code 200 with the GeoJSON of the tile
+        - Status code 404 when the layer or the tile does not exist
+    """
+    from env import Env
+    if layer not in TileLayers._value2member_map_:
+        return JSONResponse(status_code=404,
+                            content=GenericResponseModel.NotFound.value)
+    content = Env.tiles_instance.get_tile(TileLayers(layer), z, x, y)
+    if content is None:
+        return JSONResponse(status_code=404,
+                            content=GenericResponseModel.NotFound.value)
+    headers = {
+        "Cache-Control": "public, max-age=86400",
+        "Vary": "Accept-Encoding"
+    }
+    if encoding_quality(request.headers.get("Accept-Encoding"), "gzip") > 0:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content, media_type="application/json", headers=headers)
+    return Response(gzip.decompress(content), media_type="application/json", headers=headers)
@@ -1,11 +1,18 @@
 __all__ = ["tsunami_router"]
 
+import json
+from typing import Optional
+
 from fastapi import APIRouter
 from loguru import logger
+from starlette.requests import Request
 from starlette.responses import PlainTextResponse
 
+from env import Env
 from internal.modules_init import module_manager
+from internal.snapshot import snapshot_manager
 from schemas.router import GENERIC_STATUS
+from schemas.snapshot import SnapshotTopics
 from schemas.tsunami import TsunamiTotalInfoModel
 
 tsunami_router = APIRouter(
@@ -72,22 +79,16 @@ async def get_tsunami_state_wrapper():
     return get_tsunami_status()
 
 
-@tsunami_router.get("/tsunami_info",
-                    response_model=TsunamiTotalInfoModel,
-                    tags=["tsunami"],
-                    responses=GENERIC_STATUS)
-async def get_tsunami_info():
+def build_tsunami_info() -> TsunamiTotalInfoModel | bytes | None:
     """
-    Gets the tsunami info.
-    :return:
-        - Status code 200 when OK
-        - Status code 404 when API is not ready
+    Builds the tsunami info.
+    The map areas are taken from the GeoJson instance's serialized copy, instead of serializing them again.
+    :return: The tsunami info, None when API is not ready
     """
     info = module_manager.classes.get("tsunami")
-    if info is not None:
-        is_tsunami_jma = get_is_tsunami(info.tsunami_watch_in_effect)
-    else:
-        is_tsunami_jma = "0"
+    if info is None:
+        return None
+    is_tsunami_jma = get_is_tsunami(info.tsunami_watch_in_effect)
 
     p2p_info = module_manager.get_module_info("p2p_info")
     if p2p_info is not None:
@@ -95,10 +96,53 @@ async def get_tsunami_info():
     else:
         map_info = None
 
-    return TsunamiTotalInfoModel(
+    model = TsunamiTotalInfoModel(
         status=get_tsunami_status(),
         status_forecast=is_tsunami_jma,
         map=map_info,
         info=info.tsunami_expectation_info,
         watch=info.tsunami_obs_info
     )
+    if model.map is None or model.map.areas is None:
+        return model
+    areas = Env.geojson_instance.get_tsunami_geojson_json(model.map.areas)
+    if areas is None:
+        return model
+    return _serialize_tsunami_info(model, areas)
+
+
+def _serialize_tsunami_info(model: TsunamiTotalInfoModel, areas: bytes) -> bytes:
+    """
+    Serializes the tsunami info, with the serialized map areas. Shall not be used externally.
+    :param model: The tsunami info, with the map
+    :param areas: The serialized map areas
+    :return: The serialized tsunami info, the same document as model_dump_json
+    """
+    members = {key: json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+               for key, value in model.model_dump(mode="json", exclude={"map"}).items()}
+    members["map"] = b'{"time":' + json.dumps(model.map.time, ensure_ascii=False).encode("utf-8") + \
+                     b',"areas":' + areas + b'}'
+    # In the order of the fields, as model_dump_json
+    return b"{" + b",".join(f'"{key}":'.encode("utf-8") + members[key]
+                            for key in TsunamiTotalInfoModel.model_fields) + b"}"
+
+
+snapshot_manager.register(SnapshotTopics.tsunami, build_tsunami_info, ["tsunami", "p2p_info"])
+
+
+@tsunami_router.get("/tsunami_info",
+                    response_model=TsunamiTotalInfoModel,
+                    tags=["tsunami"],
+                    responses=GENERIC_STATUS)
+async def get_tsunami_info(request: Request, since: Optional[str] = None, delta: Optional[str] = None):
+    """
+    Gets the tsunami info.
+    With since (the X-Snapshot-Version held), waits until a newer version is published,
+     unless since is from another boot of the server.
+    With delta (the X-Snapshot-Version held), may answer a JSON Patch (application/json-patch+json) against it.
+    :return:
+        - Status code 200 when OK, with the info or the patch
+        - Status code 304 when not modified, or no newer version before the timeout
+        - Status code 404 when API is not ready
+    """
+    return await snapshot_manager.response(SnapshotTopics.tsunami, request, since, delta)
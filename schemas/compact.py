@@ -0,0 +1,88 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from schemas.eew import EEWAlertTypeEnum, KmoniReturnHypocenterModel, EEWCancelledModel
+from schemas.p2p_info import EarthquakeIssueTypeEnum, EarthquakeTsunamiCommentsModel, \
+    EarthquakeReturnEpicenterModel, BlankDict
+
+
+# ========== Dictionary
+# Columnar: the i-th element of every list describes the i-th entry,
+# and the live payloads refer to the entries by i.
+class CompactAreasModel(BaseModel):
+    code: list[str] = []
+    name: list[str] = []
+    latitude: list[float] = []
+    longitude: list[float] = []
+
+
+class CompactStationsModel(BaseModel):
+    name: list[str] = []
+    # Index into the areas, -1 if the station is not in any area
+    area: list[int] = []
+    latitude: list[float] = []
+    longitude: list[float] = []
+
+
+class CompactDictionaryModel(BaseModel):
+    areas: CompactAreasModel
+    # Intensity stations of earthquake reports (Centroid.station_centroid)
+    stations: CompactStationsModel
+    # Observation stations of EEW estimations (Centroid.earthquake_station_centroid)
+    observation_stations: CompactStationsModel
+
+
+# ========== Live
+class CompactIntensitiesModel(BaseModel):
+    index: list[int] = []
+    # Intensity codes, as P2P's scale (10 = 1, 45 = 5-, 46 = 5-?, 50 = 5+, ..., 70 = 7)
+    intensity: list[int] = []
+    # Detailed (non-rounded) intensities, only for EEW observation stations
+    detail: Optional[list[float]] = None
+
+
+class CompactEEWModel(BaseModel):
+    status: int
+    type: str
+    is_plum: bool
+    is_cancel: bool
+    is_test: bool
+    max_intensity: int
+    max_lg_intensity: int
+    report_time: str
+    report_timestamp: int
+    report_num: int
+    report_flag: EEWAlertTypeEnum
+    report_id: str
+    occur_timestamp: int
+    is_final: bool
+    magnitude: str
+    hypocenter: KmoniReturnHypocenterModel
+    # Index into the observation stations
+    stations: CompactIntensitiesModel
+    # Index into the areas
+    areas: CompactIntensitiesModel
+    recommended_areas: bool
+    s_wave: Optional[float] = None
+    p_wave: Optional[float] = None
+
+
+class CompactEarthquakeModel(BaseModel):
+    id: Optional[str]
+    type: EarthquakeIssueTypeEnum
+    occur_time: str
+    receive_time: str
+    magnitude: str
+    max_intensity: int
+    tsunami_comments: EarthquakeTsunamiCommentsModel
+    hypocenter: EarthquakeReturnEpicenterModel | BlankDict
+    # Index into the stations
+    stations: CompactIntensitiesModel
+    # Index into the areas
+    areas: CompactIntensitiesModel
+
+
+class CompactEarthquakeInfoModel(BaseModel):
+    info: list[CompactEarthquakeModel]
+    eew: dict | CompactEEWModel | EEWCancelledModel
@@ -14,6 +14,7 @@ class ModulesEnableModel(BaseModel):
     p2p_earthquake: bool
     shake_level: bool
     global_earthquake: bool
+    realtime_shindo: bool
 
 
 class UtilitiesEnableModel(BaseModel):
@@ -28,9 +29,15 @@ class EEWTargetEnum(str, Enum):
     iedred = "iedred"
 
 
+class EEWHedgeConfigModel(BaseModel):
+    enabled: bool
+    percentile: float
+
+
 class EEWConfigModel(BaseModel):
     target: EEWTargetEnum
     only_dmdata: bool
+    hedge: EEWHedgeConfigModel
 
 
 class _GenericDebugModel(BaseModel):
@@ -83,6 +90,28 @@ class TsunamiConfigModel(BaseModel):
     color: _TsunamiColorModel
 
 
+class _IntensityColorModel(BaseModel):
+    one: str
+    two: str
+    three: str
+    four: str
+    five_lower: str
+    five_upper: str
+    six_lower: str
+    six_upper: str
+    seven: str
+
+
+class IntensityProcessPoolConfigModel(BaseModel):
+    enabled: bool
+    workers: int
+
+
+class IntensityConfigModel(BaseModel):
+    color: _IntensityColorModel
+    process_pool: IntensityProcessPoolConfigModel
+
+
 class LoggerConfigModel(BaseModel):
     level: LogLevelEnum
     backtrace: bool
@@ -95,6 +124,10 @@ class GlobalEarthquakeConfigModel(BaseModel):
     list_count: int
 
 
+class RealtimeShindoConfigModel(BaseModel):
+    history: int
+
+
 class ServerModel(BaseModel):
     host: str
     port: str
@@ -111,6 +144,29 @@ class DMDataConfigModel(BaseModel):
     jquake: DMDataJquakeConfigModel
 
 
+class NetworkPoolConfigModel(BaseModel):
+    default_size: int
+    hosts: dict[str, int] = {}
+
+
+class NetworkBreakerConfigModel(BaseModel):
+    failure_threshold: int
+    reset_timeout: float
+
+
+class NetworkConfigModel(BaseModel):
+    pool: NetworkPoolConfigModel
+    breaker: NetworkBreakerConfigModel
+
+
+class TilesConfigModel(BaseModel):
+    max_zoom: int
+    # Megabytes
+    memory_cache_size: int
+    disk_cache_size: int
+    disk_cache_directory: str
+
+
 class SentrySampleRateModel(BaseModel):
     traces: float
     errors: float
@@ -124,14 +180,18 @@ class SentryConfigModel(BaseModel):
 class ConfigModel(BaseModel):
     logger: LoggerConfigModel
     proxy: ProxyConfigModel
+    network: NetworkConfigModel
     modules: ModulesEnableModel
     utilities: UtilitiesEnableModel
     eew: EEWConfigModel
     tsunami: TsunamiConfigModel
+    intensity: IntensityConfigModel
     server: ServerModel
     dmdata: DMDataConfigModel
     debug: DebugConfigModel
     global_earthquake: GlobalEarthquakeConfigModel
+    realtime_shindo: RealtimeShindoConfigModel
+    tiles: TilesConfigModel
     sentry: SentryConfigModel
 
 
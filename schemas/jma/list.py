@@ -25,13 +25,3 @@ class JMAListEntry(BaseModel):
     title: str
     updated: str
 
-
-class JMAListFeed(BaseModel):
-    entry: list[JMAListEntry]
-    id: str
-    title: str
-    updated: str
-
-
-class JMAList(BaseModel):
-    feed: JMAListFeed
@@ -7,6 +7,7 @@ class ModulesEnum(str, Enum):
     p2p_earthquake = "p2p_info"
     shake_level = "shake_level"
     global_earthquake = "global_earthquake"
+    realtime_shindo = "realtime_shindo"
 
 
 class ModulesClassEnum(str, Enum):
@@ -15,3 +16,4 @@ class ModulesClassEnum(str, Enum):
     p2p_earthquake = "P2PInfo"
     shake_level = "ShakeLevel"
     global_earthquake = "GlobalEarthquake"
+    realtime_shindo = "RealtimeShindo"
@@ -238,6 +238,10 @@ class P2PTotalInfoModel(BaseModel):
     tsunami_in_effect: str = "0"
 
 
+class EEWInfoReturnModel(BaseModel):
+    eew: dict | EEWParseReturnModel | EEWCancelledModel
+
+
 class EarthquakeInfoReturnModel(BaseModel):
     info: list[EarthquakeReturnModel]
     eew: dict | EEWParseReturnModel | EEWCancelledModel
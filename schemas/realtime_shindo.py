@@ -0,0 +1,18 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class RealtimeShindoModel(BaseModel):
+    # Time of the image, as %Y%m%d%H%M%S (JST)
+    time: str
+    max_intensity: Optional[float] = None
+    # Real-time intensity of every observation station, in the order of Centroid.earthquake_station_centroid
+    # (the v2 dictionary's observation_stations); None if the station isn't observed
+    intensity: list[Optional[float]] = []
+
+
+class RealtimeShindoHistoryModel(BaseModel):
+    # Oldest first
+    time: list[str] = []
+    intensity: list[Optional[float]] = []
@@ -1,7 +1,8 @@
+import copy
 from enum import Enum
 from typing import Any, Optional, TypeVar, Type
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 OnlyModel = TypeVar("OnlyModel", bound=Type[BaseModel])
 
@@ -23,9 +24,73 @@ class ResponseTypeModel(BaseModel):
 
 class ResponseModel(BaseModel):
     status: bool = False
+    # The upstream content has not changed since the previous request.
+    unchanged: bool = False
+    _content: Any = PrivateAttr(default=None)
+    # The content is the cached one, copied on the first read
+    _shared: bool = PrivateAttr(default=False)
+
+    def __init__(self, content: Any = None, **data: Any):
+        super().__init__(**data)
+        self._content = content
+
+    @property
+    def content(self) -> Any:
+        """
+        The converted response.
+        Shared (cached) content is copied on the first read, so that callers may modify it,
+         while callers returning on unchanged never pay for the copy.
+        """
+        if self._shared:
+            self._content = copy.deepcopy(self._content)
+            self._shared = False
+        return self._content
+
+    def share(self) -> "ResponseModel":
+        """
+        Makes a copy of the response sharing its content, which the copy only copies on the first read.
+        The content of this response must not be modified afterward.
+        :return: The response
+        """
+        response = self.model_copy()
+        response._shared = True
+        return response
+
+
+class CachedResponseModel(BaseModel):
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fingerprint: Optional[str] = None
     content: Any = None
 
 
+class CircuitStates(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreakerModel(BaseModel):
+    state: CircuitStates = CircuitStates.closed
+    # Consecutive failures
+    failures: int = 0
+    # When the breaker opened or let the last probe through (unix time)
+    opened_at: Optional[float] = None
+    # A half-open probe request is in flight.
+    probing: bool = False
+
+
+class HedgeStatsModel(BaseModel):
+    # Requests sent with hedging
+    requests: int = 0
+    # Requests which sent a second attempt
+    hedged: int = 0
+    # Requests answered by the second attempt first
+    wins: int = 0
+    # The latest delay before sending a second attempt (seconds), None if not enough samples yet
+    threshold: Optional[float] = None
+
+
 class RequestTypes(str, Enum):
     post = "post"
     get = "get"
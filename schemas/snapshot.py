@@ -0,0 +1,36 @@
+from enum import Enum
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SnapshotTopics(str, Enum):
+    eew = "eew"
+    earthquake = "earthquake"
+    tsunami = "tsunami"
+    shake_level = "shake_level"
+    global_earthquake = "global"
+    # Compact (v2) schema
+    earthquake_v2 = "earthquake_v2"
+    dictionary_v2 = "dictionary_v2"
+    # Colored area GeoJSON
+    earthquake_geojson = "earthquake_geojson"
+    eew_geojson = "eew_geojson"
+    realtime_shindo = "realtime_shindo"
+
+
+class SnapshotModel(BaseModel):
+    topic: SnapshotTopics
+    # Increases every time the serialized state changes
+    version: int
+    # "<epoch>.<version>", which the clients hold
+    tag: str
+    # Strong ETag of the body, quoted
+    etag: str
+    body: bytes
+    gzip_body: bytes
+    # The same document in MessagePack
+    msgpack_body: bytes
+    msgpack_gzip_body: bytes
+    # The push message: {"topic": ..., "version": <tag>, "data": <body>}
+    frame: str
+    model_config = ConfigDict(frozen=True)
@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class TileLayers(str, Enum):
+    # Value: the file stem under static/geojson
+    countries = "countries_without_japan"
+    japan = "japan"
+    japan_area_line = "japan_area_line"
+    japan_areas = "japan_with_sub_areas"
+    tsunami_areas = "tsunami_areas"
+    tsunami_japan = "tsunami_japan"
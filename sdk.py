@@ -2,13 +2,27 @@
  HomeNetwork Python SDK (Pydantic v2)
  Licensed under GPL.
  2022-2024 Allen Da.
- Current Version - 1.2.1
+ Current Version - 1.9.0
 
  Changelog:
     - 1.2:
         Customizable log_func in func_timer()
     - 1.2.1:
         Do not log model conversion errors when using web_request()->json_to_multiple_models
+    - 1.3:
+        Pooled keep-alive sessions per host in web_request()
+    - 1.4:
+        async_web_request() on a pooled asyncio HTTP client
+    - 1.5:
+        Conditional requests (ETag/Last-Modified) in web_request() & async_web_request()
+    - 1.6:
+        Body fingerprints in web_request() & async_web_request() to skip converting unchanged responses
+    - 1.7:
+        Coalesce identical concurrent requests (single-flight) in web_request() & async_web_request()
+    - 1.8:
+        Per-host circuit breakers & total deadline in web_request() & async_web_request()
+    - 1.9:
+        Hedged requests in web_request()
 """
 __all__ = [
     # Formation conversion
@@ -16,34 +30,88 @@ __all__ = [
     # File operation
     "read_csv", "read_json", "open_file",
     # API operation
-    "web_request",
+    "web_request", "async_web_request", "configure_pools", "close_sessions", "close_async_sessions",
+    "configure_breakers", "breaker_states", "hedge_stats",
     # Misc operation
-    "relpath", "func_timer", "parse_jsonp", "generate_list",
+    "relpath", "func_timer", "parse_jsonp", "generate_list", "encoding_quality", "media_type_quality",
     # Assert operation
     "todo", "verify_none", "verify_not_used", "verify_type"
 ]
 
+import asyncio
+import collections
+import copy
 import csv
 import functools
+import hashlib
 import json
+import math
 import re
+import threading
 import time
 import types
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from http.cookiejar import DefaultCookiePolicy
 from typing import TypeVar, Type, Optional, Callable, TextIO, Any, Tuple, List, Union
+from urllib.parse import urlsplit
 
-import requests
+import httpx
 import xmltodict
 import yaml
 from loguru import logger
 from pydantic import BaseModel
-from requests import ReadTimeout, Response
+from requests import ReadTimeout, Response, Session
+from requests.adapters import HTTPAdapter
 
 from schemas.config import ProxyConfigModel
-from schemas.sdk import ResponseTypeModel, ResponseModel, ResponseTypes, RequestTypes
+from schemas.sdk import ResponseTypeModel, ResponseModel, ResponseTypes, RequestTypes, CachedResponseModel, \
+    CircuitBreakerModel, CircuitStates, HedgeStatsModel
 
 OnlyModel = TypeVar("OnlyModel", bound=Type[BaseModel])
 T = TypeVar("T")
 
+# --- Connection pools
+# One session (thus one keep-alive pool) per upstream host.
+_DEFAULT_POOL_SIZE = 10
+_pool_sizes: dict[str, int] = {}
+_sessions: dict[str, Session] = {}
+_sessions_lock = threading.Lock()
+# One client per event loop, proxy and verify option; httpx clients cannot be shared across loops.
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, httpx.AsyncClient]] = \
+    weakref.WeakKeyDictionary()
+
+# --- Circuit breakers
+# One breaker per upstream host, so that dead upstreams fail fast instead of holding the scheduler threads.
+_DEFAULT_FAILURE_THRESHOLD = 5
+_DEFAULT_RESET_TIMEOUT = 30.0
+_breaker_threshold = _DEFAULT_FAILURE_THRESHOLD
+_breaker_reset_timeout = _DEFAULT_RESET_TIMEOUT
+_breakers: dict[str, CircuitBreakerModel] = {}
+_breakers_lock = threading.Lock()
+
+# --- Hedging
+# Recent latencies per host, to decide when a hedged request sends its second attempt.
+_HEDGE_MIN_SAMPLES = 10
+_HEDGE_SAMPLES = 100
+_HEDGE_WORKERS = 10
+_latencies: dict[str, collections.deque[float]] = {}
+_hedge_stats: dict[str, HedgeStatsModel] = {}
+_hedge_lock = threading.Lock()
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+
+# --- Single-flight
+# Requests in flight, so that identical concurrent requests share one upstream fetch.
+_flights: dict[str, "_Flight"] = {}
+_flights_lock = threading.Lock()
+_async_flights: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, "_AsyncFlight"]] = \
+    weakref.WeakKeyDictionary()
+
+# --- Response cache
+# Validators, body fingerprint and parsed content of the previous response, per request.
+_response_cache: dict[str, CachedResponseModel] = {}
+_response_cache_lock = threading.Lock()
+
 
 class VerifyFailedException(Exception):
     """
@@ -180,6 +248,57 @@ def parse_jsonp(jsonp_str: str) -> str:
         verify_not_used("JSONP", "Invalid JSONP")
 
 
+def _qualities(header: Optional[str]) -> dict[str, float]:
+    """
+    Parses the q-values of an Accept or Accept-Encoding header.
+    Shall not be used externally.
+
+    :param header: The header, e.g. "br;q=0, gzip;q=0.8, *"
+    :return: Lowercase name -> q-value
+    """
+    qualities = {}
+    for item in (header or "").split(","):
+        name, *parameters = [i.strip() for i in item.split(";")]
+        if not name:
+            continue
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+    return qualities
+
+
+def encoding_quality(accept_encoding: Optional[str], encoding: str) -> float:
+    """
+    Gets how much an Accept-Encoding header prefers an encoding.
+    :param accept_encoding: The Accept-Encoding header, e.g. "br;q=0, gzip;q=0.8, *"
+    :param encoding: The content coding, e.g. "gzip"
+    :return: The q-value, 0 if the encoding is not acceptable
+    """
+    qualities = _qualities(accept_encoding)
+    return qualities.get(encoding.lower(), qualities.get("*", 0.0))
+
+
+def media_type_quality(accept: Optional[str], media_type: str, wildcard: bool = True) -> float:
+    """
+    Gets how much an Accept header prefers a media type.
+    :param accept: The Accept header, e.g. "application/msgpack, application/json;q=0.5"
+    :param media_type: The media type, e.g. "application/json"
+    :param wildcard: Whether "type/*" and "*/*" match as well
+    :return: The q-value, 0 if the media type is not acceptable
+    """
+    qualities = _qualities(accept)
+    media_type = media_type.lower()
+    if not wildcard:
+        return qualities.get(media_type, 0.0)
+    return qualities.get(media_type, qualities.get(f"{media_type.split('/')[0]}/*", qualities.get("*/*", 0.0)))
+
+
 def func_timer(func: Optional[Callable[..., T]] = None, log_func: Optional[Callable] = None) -> T:
     """
     Profiles a function's time usage.
@@ -308,6 +427,403 @@ def generate_list(name: T) -> list[T]:
         return [name]
 
 
+def configure_pools(default_size: int = _DEFAULT_POOL_SIZE, hosts: Optional[dict[str, int]] = None) -> None:
+    """
+    Configures the connection pool sizes used by web_request.
+    Sessions that are already open are closed, and will be re-created with the new sizes.
+
+    :param default_size: The pool size for hosts that are not specified
+    :param hosts: Host -> pool size pairs
+    """
+    global _DEFAULT_POOL_SIZE
+    verify_type(default_size, int)
+    _DEFAULT_POOL_SIZE = default_size
+    _pool_sizes.clear()
+    if hosts:
+        _pool_sizes.update(hosts)
+    close_sessions()
+
+
+def close_sessions() -> None:
+    """
+    Closes all the pooled sessions.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _get_session(url: str) -> Session:
+    """
+    Gets the pooled session of the URL's host.
+    Shall not be used externally.
+
+    :param url: The URL
+    :return: The session
+    """
+    host = urlsplit(url).hostname or ""
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            pool_size = _pool_sizes.get(host, _DEFAULT_POOL_SIZE)
+            session = Session()
+            # Requests are stateless: never keep cookies between calls.
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+            logger.debug(f"Created pooled session for {host} with size {pool_size}.")
+    return session
+
+
+def configure_breakers(failure_threshold: int = _DEFAULT_FAILURE_THRESHOLD,
+                       reset_timeout: float = _DEFAULT_RESET_TIMEOUT) -> None:
+    """
+    Configures the per-host circuit breakers. Resets all breakers.
+
+    :param failure_threshold: Consecutive failures of a host before its breaker opens
+    :param reset_timeout: Seconds an open breaker waits before letting a probe request through
+    """
+    global _breaker_threshold, _breaker_reset_timeout
+    with _breakers_lock:
+        _breaker_threshold = failure_threshold
+        _breaker_reset_timeout = reset_timeout
+        _breakers.clear()
+
+
+def breaker_states() -> dict[str, CircuitBreakerModel]:
+    """
+    Gets the circuit breaker state of every host requested so far.
+
+    :return: Host -> breaker state
+    """
+    with _breakers_lock:
+        return {host: breaker.model_copy() for host, breaker in _breakers.items()}
+
+
+def _breaker_allows(host: str) -> bool:
+    """
+    Checks whether the breaker of a host lets a request through.
+    Moves an open breaker to half-open after the reset timeout, and lets one probe through per reset timeout.
+    Shall not be used externally.
+
+    :param host: The host
+    :return: Whether to send the request
+    """
+    with _breakers_lock:
+        breaker = _breakers.setdefault(host, CircuitBreakerModel())
+        if breaker.state == CircuitStates.closed:
+            return True
+        if time.time() - breaker.opened_at < _breaker_reset_timeout:
+            return False
+        if breaker.state == CircuitStates.open:
+            logger.info(f"Circuit breaker half-open: host {host}.")
+            breaker.state = CircuitStates.half_open
+        elif breaker.probing:
+            # The probe never reported back (e.g. cancelled); give another one a chance.
+            logger.debug(f"Circuit breaker probe timed out: host {host}.")
+        breaker.probing = True
+        breaker.opened_at = time.time()
+        return True
+
+
+def _breaker_record(host: str, success: bool) -> None:
+    """
+    Records the outcome of a request to a host.
+    Shall not be used externally.
+
+    :param host: The host
+    :param success: Whether the host answered properly
+    """
+    with _breakers_lock:
+        breaker = _breakers.setdefault(host, CircuitBreakerModel())
+        breaker.probing = False
+        if success:
+            if breaker.state != CircuitStates.closed:
+                logger.info(f"Circuit breaker closed: host {host}.")
+            breaker.state = CircuitStates.closed
+            breaker.failures = 0
+            return
+        breaker.failures += 1
+        if breaker.state == CircuitStates.half_open or \
+                (breaker.state == CircuitStates.closed and breaker.failures >= _breaker_threshold):
+            logger.warning(f"Circuit breaker opened: host {host} after {breaker.failures} failure(s).")
+            breaker.state = CircuitStates.open
+            breaker.opened_at = time.time()
+
+
+def _backoff_delay(retries: int, max_retries: int, deadline_at: float) -> float:
+    """
+    Calculates how long to wait before the next attempt, within the deadline.
+    Shall not be used externally.
+
+    :param retries: The attempts made so far
+    :param max_retries: The maximum times to retry
+    :param deadline_at: The monotonic time of the deadline
+    :return: The seconds to wait
+    """
+    if retries >= max_retries:
+        return 0
+    return max(min(retries * retries, deadline_at - time.monotonic()), 0)
+
+
+def hedge_stats() -> dict[str, HedgeStatsModel]:
+    """
+    Gets the hedging statistics of every host requested with hedging so far.
+
+    :return: Host -> hedging statistics
+    """
+    with _hedge_lock:
+        return {host: stats.model_copy() for host, stats in _hedge_stats.items()}
+
+
+def _hedge_delay(host: str, percentile: float) -> Optional[float]:
+    """
+    Calculates after how long a hedged request sends its second attempt.
+    Shall not be used externally.
+
+    :param host: The host
+    :param percentile: The percentile (0-1) of recent latencies
+    :return: The seconds to wait, None if there are not enough samples yet
+    """
+    with _hedge_lock:
+        samples = sorted(_latencies.get(host, ()))
+    if len(samples) < _HEDGE_MIN_SAMPLES:
+        return None
+    return samples[min(int(len(samples) * percentile), len(samples) - 1)]
+
+
+def _record_latency(host: str, started: float, future: Future) -> None:
+    """
+    Records the latency of a finished attempt.
+    Shall not be used externally.
+
+    :param host: The host
+    :param started: The monotonic time the attempt started
+    :param future: The finished attempt
+    """
+    if future.cancelled() or future.exception() is not None:
+        return
+    with _hedge_lock:
+        _latencies.setdefault(host, collections.deque(maxlen=_HEDGE_SAMPLES)).append(time.monotonic() - started)
+
+
+def _hedged_send(host: str, send: Callable[[], Response], percentile: float) -> Response:
+    """
+    Sends a request, and sends it once more if it does not answer within the latency percentile.
+    The first response to arrive wins; the other one is discarded when it arrives.
+    Shall not be used externally.
+
+    :param host: The host
+    :param send: Sends the request once
+    :param percentile: The percentile (0-1) of recent latencies
+    :return: The first response
+    """
+    global _hedge_executor
+    delay = _hedge_delay(host, percentile)
+    with _hedge_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(_HEDGE_WORKERS, thread_name_prefix="hedge")
+        stats = _hedge_stats.setdefault(host, HedgeStatsModel())
+        stats.requests += 1
+        stats.threshold = delay
+
+    attempts: list[Future] = []
+
+    def submit() -> None:
+        attempt = _hedge_executor.submit(send)
+        attempt.add_done_callback(functools.partial(_record_latency, host, time.monotonic()))
+        attempts.append(attempt)
+
+    submit()
+    if delay is not None:
+        try:
+            return attempts[0].result(timeout=delay)
+        except FutureTimeoutError:
+            logger.debug(f"No response within {delay:.3f}s: host {host}. Hedging.")
+            submit()
+            with _hedge_lock:
+                stats.hedged += 1
+    exception = None
+    for attempt in as_completed(attempts):
+        if attempt.exception() is not None:
+            exception = attempt.exception()
+            continue
+        if attempt is not attempts[0]:
+            with _hedge_lock:
+                stats.wins += 1
+        return attempt.result()
+    raise exception
+
+
+def _cache_key(url: str,
+               request_type: RequestTypes,
+               response_type: ResponseTypeModel,
+               headers: Optional[dict] = None,
+               form_data: Optional[dict | str] = None,
+               bearer_token: Optional[str] = None,
+               proxy: Optional[ProxyConfigModel] = None,
+               verify: bool = True) -> str:
+    """
+    Generates the response cache key of a request.
+    (method + URL + headers + body + proxy + verification, and what is made out of the response)
+    Shall not be used externally.
+
+    :param url: The URL, without cache-less seed
+    :param request_type: The request type
+    :param response_type: The response type
+    :param headers: The request headers of the caller
+    :param form_data: The form data
+    :param bearer_token: The bearer token
+    :param proxy: The proxy
+    :param verify: Whether to verify https certificate
+    :return: The key
+    """
+    body = form_data if isinstance(form_data, str) else json.dumps(form_data, sort_keys=True, default=str)
+    extra = json.dumps([sorted((headers or {}).items()), bearer_token,
+                        proxy.model_dump() if proxy else None, verify], default=str)
+    return f"{request_type.value} {url} {response_type.type.value} {response_type.model} {body} {extra}"
+
+
+def _add_conditional_headers(cache_key: str, headers: dict) -> None:
+    """
+    Adds the validators of the cached response to the request headers.
+    Shall not be used externally.
+
+    :param cache_key: The response cache key
+    :param headers: The request headers
+    """
+    with _response_cache_lock:
+        cached = _response_cache.get(cache_key)
+    if cached is None:
+        return
+    if cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+
+def _cached_response(cache_key: str, fingerprint: Optional[str] = None) -> Optional[ResponseModel]:
+    """
+    Returns the cached content as unchanged.
+    Shall not be used externally.
+
+    :param cache_key: The response cache key
+    :param fingerprint: The fingerprint of the new body, None to skip comparing it
+    :return: ResponseModel, None if nothing is cached (or the fingerprint differs)
+    """
+    with _response_cache_lock:
+        cached = _response_cache.get(cache_key)
+    if cached is None or (fingerprint is not None and cached.fingerprint != fingerprint):
+        return None
+    # Callers may modify what they get, which must not leak into the cache or into other callers;
+    #  entries are replaced, never modified, so the content is only copied when read.
+    return ResponseModel(
+        status=True,
+        content=cached.content,
+        unchanged=True
+    ).share()
+
+
+def _fingerprint(body: bytes) -> str:
+    """
+    Generates the fingerprint of a response body.
+    Shall not be used externally.
+
+    :param body: The raw response body
+    :return: The fingerprint
+    """
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _store_response(cache_key: str,
+                    response: Response | httpx.Response,
+                    result: ResponseModel,
+                    fingerprint: Optional[str] = None) -> None:
+    """
+    Stores the validators and the fingerprint of a successful response along with its parsed content.
+    Shall not be used externally.
+
+    :param cache_key: The response cache key
+    :param response: The response
+    :param result: The converted response
+    :param fingerprint: The fingerprint of the body, if any
+    """
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not result.status or not (etag or last_modified or fingerprint):
+        with _response_cache_lock:
+            _response_cache.pop(cache_key, None)
+        return
+    cached = CachedResponseModel(
+        etag=etag,
+        last_modified=last_modified,
+        fingerprint=fingerprint,
+        content=copy.deepcopy(result.content)
+    )
+    with _response_cache_lock:
+        _response_cache[cache_key] = cached
+
+
+class _Flight:
+    """
+    An in-flight request shared by identical concurrent callers.
+    Shall not be used externally.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[ResponseModel] = None
+        self.exception: Optional[BaseException] = None
+        # Callers waiting for the result; final once the flight is no longer in _flights
+        self.joiners = 0
+
+
+class _AsyncFlight:
+    """
+    An in-flight request shared by identical concurrent callers on one event loop.
+    Shall not be used externally.
+    """
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        # Callers waiting for the result
+        self.joiners = 0
+
+
+def _flight_key(cache_key: str, conditional: bool, fingerprint: bool) -> str:
+    """
+    Generates the single-flight key of a request. (the response cache key, and how the cache is used)
+    Shall not be used externally.
+
+    :param cache_key: The response cache key
+    :param conditional: Whether the request is conditional
+    :param fingerprint: Whether the request is fingerprinted
+    :return: The key
+    """
+    return f"{cache_key} {conditional} {fingerprint}"
+
+
+def _should_coalesce(coalesce: Optional[bool], request_type: RequestTypes) -> bool:
+    """
+    Decides whether a request joins identical in-flight requests.
+    Shall not be used externally.
+
+    :param coalesce: What the caller asked for, None for the default
+    :param request_type: The request type
+    :return: Whether to coalesce
+    """
+    if coalesce is None:
+        # Merging POST/DELETE requests would merge their side effects into one.
+        return request_type == RequestTypes.get
+    return coalesce
+
+
 def web_request(url: str,
                 response_type: ResponseTypeModel,
                 max_retries: int = 3,
@@ -318,7 +834,12 @@ def web_request(url: str,
                 headers: dict = None,
                 request_type: RequestTypes = RequestTypes.get,
                 form_data: dict | str = None,
-                bearer_token: str = None) \
+                bearer_token: str = None,
+                conditional: bool = False,
+                fingerprint: bool = False,
+                deadline: Optional[Union[int, float]] = None,
+                hedge: Optional[float] = None,
+                coalesce: Optional[bool] = None) \
         -> ResponseModel:
     """
     Makes web request.
@@ -334,62 +855,178 @@ def web_request(url: str,
     :param request_type: The request type (POSt, GET, etc.)
     :param form_data: The form data to append
     :param bearer_token: The bearer token for OAuth2 API endpoints
+    :param conditional: Whether to send the previous validators, and reuse the previous content
+                        when the upstream answers 304 (ResponseModel.unchanged is set)
+    :param fingerprint: Whether to hash the body, and reuse the previous content without converting
+                        when the hash is the same (ResponseModel.unchanged is set)
+    :param deadline: The total time budget of all attempts and waits in between,
+                     None for no budget (every attempt and wait runs)
+    :param hedge: The percentile (0-1) of recent latencies of the host, after which a second identical
+                  request is sent, and the first response to arrive wins; None disables hedging
+    :param coalesce: Whether to share one in-flight request with identical concurrent callers,
+                     None to only share GET requests (every other request has its own side effects)
     :return: ResponseModel
     """
+    fetch = functools.partial(_web_request, url, response_type, max_retries, timeout, proxy, cacheless, verify,
+                              headers, request_type, form_data, bearer_token, conditional, fingerprint,
+                              deadline, hedge)
+    if not _should_coalesce(coalesce, request_type):
+        return fetch()
+    key = _flight_key(_cache_key(url, request_type, response_type, headers, form_data, bearer_token, proxy, verify),
+                      conditional, fingerprint)
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+        else:
+            flight.joiners += 1
+    if not leader:
+        logger.trace(f"Joined in-flight request: url {url}.")
+        flight.done.wait()
+        if flight.exception is not None:
+            raise flight.exception
+        return flight.result.share()
+    try:
+        result = fetch()
+        with _flights_lock:
+            _flights.pop(key, None)
+        # The leader keeps its own response; the joiners share a copy,
+        #  made before the leader's caller can modify the content.
+        if flight.joiners:
+            flight.result = copy.deepcopy(result)
+        return result
+    except BaseException as e:
+        flight.exception = e
+        raise
+    finally:
+        with _flights_lock:
+            if _flights.get(key) is flight:
+                del _flights[key]
+        flight.done.set()
+
+
+def _web_request(url: str,
+                 response_type: ResponseTypeModel,
+                 max_retries: int = 3,
+                 timeout: Union[int, float] = 3.5,
+                 proxy: Optional[ProxyConfigModel] = None,
+                 cacheless: bool = False,
+                 verify: bool = True,
+                 headers: dict = None,
+                 request_type: RequestTypes = RequestTypes.get,
+                 form_data: dict | str = None,
+                 bearer_token: str = None,
+                 conditional: bool = False,
+                 fingerprint: bool = False,
+                 deadline: Optional[Union[int, float]] = None,
+                 hedge: Optional[float] = None) \
+        -> ResponseModel:
+    """
+    Makes web request, without coalescing.
+    Shall not be used externally.
+
+    See web_request for the parameters.
+    """
     retries = 0
     response: Optional[Response] = None
-    if headers is None:
-        headers = {}
+    headers = dict(headers) if headers else {}
+    cache_key = _cache_key(url, request_type, response_type, headers, form_data, bearer_token, proxy, verify)
     logger.trace(f"Web request with url {url} -> {response_type}, "
                  f"timeout {timeout} and cache-less {cacheless}")
     if cacheless:
         url += f"&time={int(time.time())}"
     if bearer_token:
         headers["Authorization"] = f"Bearer {bearer_token}"
+    if conditional:
+        _add_conditional_headers(cache_key, headers)
+    host = urlsplit(url).hostname or ""
+    # Without a deadline, every attempt and every wait in between runs.
+    deadline_at = time.monotonic() + deadline if deadline is not None else math.inf
+    succeeded = False
     while retries < max_retries:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            logger.warning(f"Deadline exceeded: url {url}.")
+            break
+        if not _breaker_allows(host):
+            # The breaker has warned when it opened; polls in the meantime shouldn't flood the log.
+            logger.debug(f"Circuit breaker open: host {host}. Failing fast.")
+            return ResponseModel()
         try:
-            response = requests.request(method=str(request_type.value),
-                                        url=url,
-                                        proxies=proxy.model_dump(),
-                                        timeout=timeout,
-                                        verify=verify,
-                                        headers=headers,
-                                        data=form_data)
+            send = functools.partial(_get_session(url).request,
+                                     method=str(request_type.value),
+                                     url=url,
+                                     proxies=proxy.model_dump() if proxy else None,
+                                     timeout=min(timeout, remaining),
+                                     verify=verify,
+                                     headers=headers,
+                                     data=form_data)
+            response = _hedged_send(host, send, hedge) if hedge is not None else send()
         except ReadTimeout:
             logger.warning(
                 f"Connection timed out: url {url} with timeout {timeout}. Retrying for the {retries} time(s)."
             )
+            _breaker_record(host, False)
             retries += 1
-            time.sleep(retries * retries)
+            time.sleep(_backoff_delay(retries, max_retries, deadline_at))
             continue
         except Exception:
             logger.exception(f"Failed to fetch. Retrying for the {retries} time(s).")
+            _breaker_record(host, False)
             retries += 1
-            time.sleep(retries * retries)
+            time.sleep(_backoff_delay(retries, max_retries, deadline_at))
             continue
 
         # --- Response verification
-        if response.status_code != 200:
+        # Only server errors count against the host, other responses prove that it is alive.
+        _breaker_record(host, response.status_code < 500)
+        cached = _cached_response(cache_key) if response.status_code == 304 else None
+        if cached is not None:
+            logger.trace(f"Not modified: url {url}.")
+            return cached
+        elif response.status_code != 200:
             logger.warning(f"Failed response verification: code: {response.status_code} != 200. "
                            f"Retrying for the {retries} time(s).")
             retries += 1
-            time.sleep(retries * retries)
+            time.sleep(_backoff_delay(retries, max_retries, deadline_at))
             continue
         elif response.text == "":
             logger.warning(f"Failed response verification: text: is none. Retrying for the {retries} time(s).")
             retries += 1
-            time.sleep(retries * retries)
+            time.sleep(_backoff_delay(retries, max_retries, deadline_at))
             continue
         else:
             # Successful
+            succeeded = True
             break
 
-    if response is None:
+    if not succeeded:
         logger.error("Maximum retries exceeded without succeeding.")
         return ResponseModel()
+    digest = None
+    if fingerprint:
+        digest = _fingerprint(response.content)
+        cached = _cached_response(cache_key, digest)
+        if cached is not None:
+            logger.trace(f"Same fingerprint: url {url}.")
+            return cached
     response.encoding = "utf-8"
+    result = _convert_response(response, response_type)
+    if conditional or fingerprint:
+        _store_response(cache_key, response, result, digest)
+    return result
 
-    # --- Response conversion
+
+def _convert_response(response: Response | httpx.Response, response_type: ResponseTypeModel) -> ResponseModel:
+    """
+    Converts a fetched response into what the caller asked for.
+    Shall not be used externally.
+
+    :param response: The response, either from requests or from httpx
+    :param response_type: What should be returned
+    :return: ResponseModel
+    """
     verify_type(response_type, ResponseTypeModel)
     if response_type.type == ResponseTypes.json_to_model:
         try:
@@ -488,3 +1125,222 @@ def web_request(url: str,
             return ResponseModel()
     else:
         verify_not_used("web_request => response_type", "declaration (exhaustive handling)")
+
+
+async def _get_async_client(proxy: Optional[ProxyConfigModel], verify: bool) -> httpx.AsyncClient:
+    """
+    Gets the pooled asyncio client of the running event loop.
+    Shall not be used externally.
+
+    :param proxy: The proxy to use
+    :param verify: Whether to verify https certificate
+    :return: The client
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    key = ((proxy.http, proxy.https) if proxy else None, verify)
+    client = clients.get(key)
+    if client is None:
+        limits = httpx.Limits(max_keepalive_connections=_DEFAULT_POOL_SIZE)
+        mounts = {}
+        if proxy and proxy.http:
+            mounts["http://"] = httpx.AsyncHTTPTransport(proxy=proxy.http, verify=verify, limits=limits)
+        if proxy and proxy.https:
+            mounts["https://"] = httpx.AsyncHTTPTransport(proxy=proxy.https, verify=verify, limits=limits)
+        # requests follows redirects by default, so do the same.
+        client = httpx.AsyncClient(verify=verify, limits=limits, mounts=mounts, follow_redirects=True)
+        clients[key] = client
+    return client
+
+
+async def close_async_sessions() -> None:
+    """
+    Closes the pooled asyncio clients of the running event loop.
+    """
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+async def async_web_request(url: str,
+                            response_type: ResponseTypeModel,
+                            max_retries: int = 3,
+                            timeout: Union[int, float] = 3.5,
+                            proxy: Optional[ProxyConfigModel] = None,
+                            cacheless: bool = False,
+                            verify: bool = True,
+                            headers: dict = None,
+                            request_type: RequestTypes = RequestTypes.get,
+                            form_data: dict | str = None,
+                            bearer_token: str = None,
+                            conditional: bool = False,
+                            fingerprint: bool = False,
+                            deadline: Optional[Union[int, float]] = None,
+                            coalesce: Optional[bool] = None) \
+        -> ResponseModel:
+    """
+    Makes web request on the running event loop.
+    Behaves the same as web_request, but never blocks the calling thread.
+
+    :param url: The URL
+    :param response_type: What should this function return
+    :param max_retries: The maximum times to retry
+    :param timeout: The timeout
+    :param proxy: The proxy to use
+    :param cacheless: Whether to ignore cache by adding seed
+    :param verify: Whether to verify https certificate
+    :param headers: The request header to append
+    :param request_type: The request type (POSt, GET, etc.)
+    :param form_data: The form data to append
+    :param bearer_token: The bearer token for OAuth2 API endpoints
+    :param conditional: Whether to send the previous validators, and reuse the previous content
+                        when the upstream answers 304 (ResponseModel.unchanged is set)
+    :param fingerprint: Whether to hash the body, and reuse the previous content without converting
+                        when the hash is the same (ResponseModel.unchanged is set)
+    :param deadline: The total time budget of all attempts and waits in between,
+                     None for no budget (every attempt and wait runs)
+    :param coalesce: Whether to share one in-flight request with identical concurrent callers on this loop,
+                     None to only share GET requests (every other request has its own side effects)
+    :return: ResponseModel
+    """
+    fetch = functools.partial(_async_web_request, url, response_type, max_retries, timeout, proxy, cacheless, verify,
+                              headers, request_type, form_data, bearer_token, conditional, fingerprint,
+                              deadline)
+    if not _should_coalesce(coalesce, request_type):
+        return await fetch()
+    key = _flight_key(_cache_key(url, request_type, response_type, headers, form_data, bearer_token, proxy, verify),
+                      conditional, fingerprint)
+    loop = asyncio.get_running_loop()
+    flights = _async_flights.setdefault(loop, {})
+    if key in flights:
+        logger.trace(f"Joined in-flight request: url {url}.")
+        flights[key].joiners += 1
+        result = await asyncio.shield(flights[key].future)
+        return result.share()
+    flight = flights[key] = _AsyncFlight(loop.create_future())
+    try:
+        result = await fetch()
+        # The leader keeps its own response; the joiners share a copy,
+        #  made before the leader's caller can modify the content.
+        flight.future.set_result(copy.deepcopy(result) if flight.joiners else None)
+        return result
+    except asyncio.CancelledError:
+        flight.future.cancel()
+        raise
+    except BaseException as e:
+        flight.future.set_exception(e)
+        # Retrieve it once, so that it is not reported as never retrieved when no one joined.
+        flight.future.exception()
+        raise
+    finally:
+        flights.pop(key, None)
+
+
+async def _async_web_request(url: str,
+                             response_type: ResponseTypeModel,
+                             max_retries: int = 3,
+                             timeout: Union[int, float] = 3.5,
+                             proxy: Optional[ProxyConfigModel] = None,
+                             cacheless: bool = False,
+                             verify: bool = True,
+                             headers: dict = None,
+                             request_type: RequestTypes = RequestTypes.get,
+                             form_data: dict | str = None,
+                             bearer_token: str = None,
+                             conditional: bool = False,
+                             fingerprint: bool = False,
+                             deadline: Optional[Union[int, float]] = None) \
+        -> ResponseModel:
+    """
+    Makes web request on the running event loop, without coalescing.
+    Shall not be used externally.
+
+    See async_web_request for the parameters.
+    """
+    retries = 0
+    response: Optional[httpx.Response] = None
+    headers = dict(headers) if headers else {}
+    cache_key = _cache_key(url, request_type, response_type, headers, form_data, bearer_token, proxy, verify)
+    logger.trace(f"Async web request with url {url} -> {response_type}, "
+                 f"timeout {timeout} and cache-less {cacheless}")
+    if cacheless:
+        url += f"&time={int(time.time())}"
+    if bearer_token:
+        headers["Authorization"] = f"Bearer {bearer_token}"
+    if conditional:
+        _add_conditional_headers(cache_key, headers)
+    client = await _get_async_client(proxy, verify)
+    host = urlsplit(url).hostname or ""
+    # Without a deadline, every attempt and every wait in between runs.
+    deadline_at = time.monotonic() + deadline if deadline is not None else math.inf
+    succeeded = False
+    while retries < max_retries:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            logger.warning(f"Deadline exceeded: url {url}.")
+            break
+        if not _breaker_allows(host):
+            # The breaker has warned when it opened; polls in the meantime shouldn't flood the log.
+            logger.debug(f"Circuit breaker open: host {host}. Failing fast.")
+            return ResponseModel()
+        try:
+            response = await client.request(method=str(request_type.value).upper(),
+                                            url=url,
+                                            timeout=min(timeout, remaining),
+                                            headers=headers,
+                                            data=form_data if isinstance(form_data, dict) else None,
+                                            content=form_data if isinstance(form_data, str) else None)
+            # httpx refuses to change the encoding once the text has been decoded.
+            response.encoding = "utf-8"
+        except httpx.TimeoutException:
+            logger.warning(
+                f"Connection timed out: url {url} with timeout {timeout}. Retrying for the {retries} time(s)."
+            )
+            _breaker_record(host, False)
+            retries += 1
+            await asyncio.sleep(_backoff_delay(retries, max_retries, deadline_at))
+            continue
+        except Exception:
+            logger.exception(f"Failed to fetch. Retrying for the {retries} time(s).")
+            _breaker_record(host, False)
+            retries += 1
+            await asyncio.sleep(_backoff_delay(retries, max_retries, deadline_at))
+            continue
+
+        # --- Response verification
+        # Only server errors count against the host, other responses prove that it is alive.
+        _breaker_record(host, response.status_code < 500)
+        cached = _cached_response(cache_key) if response.status_code == 304 else None
+        if cached is not None:
+            logger.trace(f"Not modified: url {url}.")
+            return cached
+        elif response.status_code != 200:
+            logger.warning(f"Failed response verification: code: {response.status_code} != 200. "
+                           f"Retrying for the {retries} time(s).")
+            retries += 1
+            await asyncio.sleep(_backoff_delay(retries, max_retries, deadline_at))
+            continue
+        elif response.text == "":
+            logger.warning(f"Failed response verification: text: is none. Retrying for the {retries} time(s).")
+            retries += 1
+            await asyncio.sleep(_backoff_delay(retries, max_retries, deadline_at))
+            continue
+        else:
+            # Successful
+            succeeded = True
+            break
+
+    if not succeeded:
+        logger.error("Maximum retries exceeded without succeeding.")
+        return ResponseModel()
+    digest = None
+    if fingerprint:
+        digest = _fingerprint(response.content)
+        cached = _cached_response(cache_key, digest)
+        if cached is not None:
+            logger.trace(f"Same fingerprint: url {url}.")
+            return cached
+    result = _convert_response(response, response_type)
+    if conditional or fingerprint:
+        _store_response(cache_key, response, result, digest)
+    return result
@@ -0,0 +1,85 @@
+import sys
+import unittest
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+from env import Env
+from internal.centroid import Centroid
+from internal.compact import CompactConverter
+from schemas.compact import CompactEarthquakeInfoModel, CompactDictionaryModel
+from schemas.p2p_info import EarthquakeReturnModel, EarthquakeInfoReturnModel, EarthquakeIssueTypeEnum, \
+    EarthquakeIntensityEnum, EarthquakePointsScaleEnum, EarthquakeTsunamiCommentsModel, \
+    EarthquakeDomesticTsunamiEnum, EarthquakeForeignTsunamiEnum, EarthquakeReturnEpicenterModel, \
+    EarthquakeAreaIntensityModel, EarthquakeAreaIntensityPointModel, EarthquakeStationIntensityPointModel
+
+INTENSITIES = [(EarthquakeIntensityEnum.seven, EarthquakePointsScaleEnum.seven),
+               (EarthquakeIntensityEnum.five_lower, EarthquakePointsScaleEnum.five_lower),
+               (EarthquakeIntensityEnum.one, EarthquakePointsScaleEnum.one)]
+
+
+def _earthquake(area_names: list[str], station_names: list[str]) -> EarthquakeReturnModel:
+    """
+    Generates an earthquake report with the intensities of INTENSITIES.
+    :param area_names: The areas, one per intensity
+    :param station_names: The stations, one per intensity
+    :return: The report
+    """
+    return EarthquakeReturnModel(
+        id="test",
+        type=EarthquakeIssueTypeEnum.DetailScale,
+        occur_time="2024/01/01 16:10",
+        receive_time="2024/01/01 16:13:54",
+        magnitude="7.6",
+        max_intensity=EarthquakeIntensityEnum.seven,
+        tsunami_comments=EarthquakeTsunamiCommentsModel(domestic=EarthquakeDomesticTsunamiEnum.Warning,
+                                                        foreign=EarthquakeForeignTsunamiEnum.Unknown),
+        hypocenter=EarthquakeReturnEpicenterModel(name="石川県能登地方", latitude=37.5, longitude=137.3,
+                                                  depth="10km"),
+        area_intensity=EarthquakeAreaIntensityModel(
+            areas={name: EarthquakeAreaIntensityPointModel(name=name, intensity=intensity, latitude="0",
+                                                           longitude="0", intensity_code=code)
+                   for name, (intensity, code) in zip(area_names, INTENSITIES)},
+            station={name: EarthquakeStationIntensityPointModel(name=name, intensity=intensity, latitude="0",
+                                                                longitude="0", intensity_code=code,
+                                                                region_code="", region_name="")
+                     for name, (intensity, code) in zip(station_names, INTENSITIES)}
+        )
+    )
+
+
+class TestCompact(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Env.centroid_instance = Centroid()
+
+    def test_round_trip(self):
+        """This test includes:
+        - areas and stations -> indices resolving to the same names and intensity codes
+        - names not in the dictionary -> left out
+        - the serialized payload and dictionary -> parsed back the same
+        """
+        dictionary = CompactDictionaryModel.model_validate_json(
+            Env.centroid_instance.compact_dictionary.model_dump_json())
+        area_names = dictionary.areas.name[:2] + ["存在しない地域"]
+        station_names = dictionary.stations.name[:2] + ["存在しない観測点"]
+        earthquake = _earthquake(area_names, station_names)
+        compact = CompactConverter.convert_earthquake_info(EarthquakeInfoReturnModel(info=[earthquake], eew={}))
+        compact = CompactEarthquakeInfoModel.model_validate_json(compact.model_dump_json())
+
+        report = compact.info[0]
+        self.assertEqual(report.id, earthquake.id)
+        self.assertEqual(report.hypocenter, earthquake.hypocenter)
+        self.assertEqual(report.max_intensity, EarthquakePointsScaleEnum.seven.value)
+        self.assertEqual({dictionary.areas.name[i]: code for i, code in zip(report.areas.index,
+                                                                           report.areas.intensity)},
+                         {name: code.value for name, (_, code) in zip(area_names[:2], INTENSITIES)})
+        self.assertEqual({dictionary.stations.name[i]: code for i, code in zip(report.stations.index,
+                                                                              report.stations.intensity)},
+                         {name: code.value for name, (_, code) in zip(station_names[:2], INTENSITIES)})
+        self.assertEqual(compact.eew, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import base64
+import gzip
+import json
+import sys
+import unittest
+
+import xmltodict
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+from internal.dmdata.decoder import decode_telegram, telegram_to_model, TELEGRAM_MODELS
+from schemas.dmdata.generic import DmdataMessageTypes
+from schemas.jma.eew import JMAEEWApiModel
+from schemas.jma.tsunami_expectation import JMATsunamiExpectationApiModel
+from sdk import relpath
+
+
+def _read_socket_body(name: str) -> str:
+    """
+    Reads the telegram body of a recorded socket message.
+    :param name: The file name in assets/dmdata
+    :return: The base64 gzip body
+    """
+    with open(relpath(f"./assets/dmdata/{name}"), "r", encoding="utf-8") as f:
+        return json.load(f)["body"]
+
+
+def _encode(xml: bytes) -> str:
+    """
+    Encodes an XML file as DMData does (gzip -> base64).
+    :param xml: The XML
+    :return: The base64 gzip body
+    """
+    return base64.b64encode(gzip.compress(xml)).decode("ascii")
+
+
+class TestTelegramDecoder(unittest.TestCase):
+    def test_decode_telegram(self):
+        """This test includes:
+        - socket telegram -> same XML and dict as decoding at once
+        - telegram wrapped by whitespace -> same XML
+        - truncated telegram -> exception
+        """
+        body = _read_socket_body("test_eew1.json")
+        xml = gzip.decompress(base64.b64decode(body))
+        telegram = decode_telegram(body)
+        self.assertEqual(telegram.xml, xml)
+        self.assertEqual(telegram.to_dict(), xmltodict.parse(xml, encoding="utf-8"))
+
+        wrapped = "\n".join(body[i:i + 76] for i in range(0, len(body), 76))
+        self.assertEqual(decode_telegram(wrapped).xml, xml)
+
+        with self.assertRaises(Exception):
+            decode_telegram(body[:-3])
+
+    def test_telegram_to_model(self):
+        """This test includes:
+        - socket telegrams -> same model as validating the dict form
+        - recorded EEW and tsunami telegrams -> same model as validating the dict form
+        """
+        cases = [(_read_socket_body("test_eew1.json"), DmdataMessageTypes.eew_forecast),
+                 (_read_socket_body("test_eew6.json"), DmdataMessageTypes.eq_intensity_destination)]
+        for folder, message_type in [("eew_forecast/36_02_01_100915_VXSE41.xml", DmdataMessageTypes.eew_forecast),
+                                     ("eew_warning/37_04_01_110311_VXSE43.xml", DmdataMessageTypes.eew_warning),
+                                     ("tsunami_expectation/38-39_03_01_210805_VTSE41.xml",
+                                      DmdataMessageTypes.tsunami_warning),
+                                     ("tsunami_watch/32-39_12_03_191025_VTSE51.xml", DmdataMessageTypes.tsunami_info)]:
+            with open(relpath(f"./assets/{folder}"), "rb") as f:
+                cases.append((_encode(f.read()), message_type))
+        for body, message_type in cases:
+            with self.subTest(message_type):
+                telegram = decode_telegram(body)
+                model, report_only = TELEGRAM_MODELS[message_type]
+                expected = telegram.to_dict()
+                expected = model.model_validate(expected["Report"] if report_only else expected)
+                self.assertEqual(telegram_to_model(telegram, message_type), expected)
+
+        self.assertIsInstance(telegram_to_model(decode_telegram(cases[0][0]), DmdataMessageTypes.eew_forecast),
+                              JMAEEWApiModel)
+        self.assertIsInstance(telegram_to_model(decode_telegram(cases[4][0]), DmdataMessageTypes.tsunami_warning),
+                              JMATsunamiExpectationApiModel)
+
+
+if __name__ == "__main__":
+    unittest.main()
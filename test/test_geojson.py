@@ -0,0 +1,95 @@
+import json
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+from env import Env
+from internal.geojson import GeoJson
+from routers.earthquake_info import build_earthquake_geojson
+from schemas.config import ConfigModel
+from schemas.p2p_info import EarthquakeReturnModel, EarthquakeIssueTypeEnum, EarthquakeIntensityEnum, \
+    EarthquakePointsScaleEnum, EarthquakeTsunamiCommentsModel, EarthquakeDomesticTsunamiEnum, \
+    EarthquakeForeignTsunamiEnum, EarthquakeReturnEpicenterModel, EarthquakeAreaIntensityModel, \
+    EarthquakeAreaIntensityPointModel
+from sdk import yaml_to_model
+
+
+def _earthquake(issue_type: EarthquakeIssueTypeEnum, areas: dict[str, EarthquakeIntensityEnum]) \
+        -> EarthquakeReturnModel:
+    """
+    Generates an earthquake report.
+    :param issue_type: The report type
+    :param areas: Area name -> intensity, empty for a report without areas
+    :return: The report
+    """
+    return EarthquakeReturnModel(
+        id=issue_type.value,
+        type=issue_type,
+        occur_time="2024/01/01 16:10",
+        receive_time="2024/01/01 16:12:00",
+        magnitude="7.6",
+        max_intensity=EarthquakeIntensityEnum.seven,
+        tsunami_comments=EarthquakeTsunamiCommentsModel(domestic=EarthquakeDomesticTsunamiEnum.Warning,
+                                                        foreign=EarthquakeForeignTsunamiEnum.Unknown),
+        hypocenter=EarthquakeReturnEpicenterModel(name="石川県能登地方", latitude=37.5, longitude=137.3,
+                                                  depth="10km"),
+        area_intensity=EarthquakeAreaIntensityModel(
+            areas={name: EarthquakeAreaIntensityPointModel(name=name, intensity=intensity, latitude="0",
+                                                           longitude="0", intensity_code=EarthquakePointsScaleEnum[
+                                                               intensity.name])
+                   for name, intensity in areas.items()},
+            station={}
+        ) if areas else {}
+    )
+
+
+class TestIntensityGeoJson(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Env.config = yaml_to_model("../config/testing.yaml", ConfigModel)
+        Env.geojson_instance = GeoJson()
+        cls.names = list(Env.geojson_instance._area_codes)[:2]
+
+    def test_cache(self):
+        """This test includes:
+        - areas -> a feature each, with its intensity and color; unknown areas left out
+        - same key -> the cached GeoJSON (not built again)
+        - new key -> built again with the new intensities
+        """
+        first = Env.geojson_instance.get_intensity_geojson(("cache", "1"), {self.names[0]: "5-", "存在しない地域": "7"})
+        features = json.loads(first)["features"]
+        self.assertEqual([(i["properties"]["name"], i["properties"]["intensity"],
+                           i["properties"]["intensity_color"]) for i in features],
+                         [(self.names[0], "5-", Env.config.intensity.color.five_lower)])
+
+        self.assertIs(Env.geojson_instance.get_intensity_geojson(("cache", "1"), {self.names[1]: "7"}), first)
+
+        second = Env.geojson_instance.get_intensity_geojson(("cache", "2"), {self.names[1]: "7"})
+        self.assertEqual([(i["properties"]["name"], i["properties"]["intensity"])
+                          for i in json.loads(second)["features"]], [(self.names[1], "7")])
+
+    def test_latest_areas(self):
+        """This test includes:
+        - latest report without areas (DMData's destination after the scale prompt) -> areas of the scale prompt
+        - no report with areas -> empty FeatureCollection
+        """
+        scale = _earthquake(EarthquakeIssueTypeEnum.ScalePrompt, {self.names[0]: EarthquakeIntensityEnum.seven})
+        destination = _earthquake(EarthquakeIssueTypeEnum.Destination, {})
+        with patch("routers.earthquake_info.module_manager.get_module_info",
+                   return_value=SimpleNamespace(earthquake=[scale, destination])):
+            features = json.loads(build_earthquake_geojson())["features"]
+        self.assertEqual([(i["properties"]["name"], i["properties"]["intensity"]) for i in features],
+                         [(self.names[0], "7")])
+
+        with patch("routers.earthquake_info.module_manager.get_module_info",
+                   return_value=SimpleNamespace(earthquake=[destination])):
+            self.assertEqual(json.loads(build_earthquake_geojson())["features"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import io
+import sys
+import unittest
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+import numpy as np
+from PIL import Image
+
+from env import Env
+from internal.centroid import Centroid
+from internal.intensity2color import IntensityToColor
+from schemas.intensity2color import IntensityToColorReturnModel, StationIntensityModel
+
+# EEW-sized (352x400) palettized image, in kmoni's color scale from -3 to 7,
+#  plus colors around the hue / saturation / value thresholds, every station painted with one of them
+EEW_IMAGE = "assets/kmoni/eew_scale.gif"
+# (lower bound, converted intensity, intensity level) of the per-pixel thresholds
+THRESHOLDS = [(6.5, "7", 9), (6.0, "6+", 8), (5.5, "6-", 7), (5.0, "5+", 6), (4.5, "5-", 5),
+              (3.5, "4", 4), (2.5, "3", 3), (1.5, "2", 2), (0.5, "1", 1)]
+
+
+def _color_to_position(color: tuple[int, int, int]) -> float:
+    """
+    Per-pixel color (HSV of 0-255) to intensity space, as before the palette table.
+    :param color: The pixel color
+    :return: The location in intensity space
+    """
+    p = 0
+    h = color[0] / 255
+    s = color[1] / 255
+    v = color[2] / 255
+    if v > 0.1 and s > 0.75:
+        if h > 0.1476:
+            p = 280.31 * pow(h, 6) - 916.05 * pow(h, 5) + 1142.6 * pow(h, 4) - 709.95 * pow(h, 3) \
+                + 234.65 * pow(h, 2) - 40.27 * h + 3.2217
+        if 0.1476 >= h > 0.001:
+            p = 151.4 * pow(h, 4) - 49.32 * pow(h, 3) + 6.753 * pow(h, 2) - 2.481 * h + 0.9033
+        if h <= 0.001:
+            p = -0.005171 * pow(v, 2) - 0.3282 * v + 1.2236
+    return max(p, 0)
+
+
+def _per_pixel_intensities(raw_image: bytes) -> IntensityToColorReturnModel:
+    """
+    Parses the image station by station, with the thresholds of before the palette table.
+    :param raw_image: The EEW image file
+    :return: The station intensities, area intensities, whether to recommend area coloring
+    """
+    return_model = IntensityToColorReturnModel()
+    with Image.open(io.BytesIO(raw_image)) as image_fp:
+        image = image_fp.convert("HSV").load()
+    area_intensity_max: dict[str, int] = {}
+    for i in Env.centroid_instance.earthquake_station_centroid:
+        try:
+            pixel_color = image[int(i.point.X), int(i.point.Y)]
+        except Exception:
+            continue
+        pixel_intensity = round(_color_to_position(pixel_color) * 10 - 3, 2)
+        if pixel_intensity <= 0.5:
+            continue
+        intensity, level = next((name, level) for bound, name, level in THRESHOLDS if pixel_intensity >= bound)
+        area_intensity_max[i.sub_region_code] = max(area_intensity_max.get(i.sub_region_code, 0), level)
+        full_name = i.region + i.name
+        return_model.station_intensities[full_name] = StationIntensityModel(
+            name=full_name,
+            area_code=i.region_code,
+            sub_area_code=i.sub_region_code,
+            latitude=i.location.latitude,
+            longitude=i.location.longitude,
+            intensity=intensity,
+            detail_intensity=pixel_intensity,
+            is_area=False
+        )
+    return_model.area_intensities, return_model.recommend_areas \
+        = Env.intensity2color_instance._parse_area_intensities(area_intensity_max)
+    return return_model
+
+
+class TestIntensityToColor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Env.centroid_instance = Centroid()
+        Env.intensity2color_instance = IntensityToColor()
+        with open(EEW_IMAGE, "rb") as f:
+            cls.raw_image = f.read()
+
+    def _assert_same(self, raw_image: bytes):
+        """
+        Asserts the palette table parses the image the same as the per-pixel thresholds.
+        :param raw_image: The EEW image file
+        """
+        expected = _per_pixel_intensities(raw_image)
+        result = Env.intensity2color_instance.intensity2color(raw_image)
+        self.assertEqual(result.station_intensities.keys(), expected.station_intensities.keys())
+        for name, station in expected.station_intensities.items():
+            self.assertEqual(result.station_intensities[name].model_dump(), station.model_dump(), name)
+        self.assertEqual(result.area_intensities, expected.area_intensities)
+        self.assertEqual(result.recommend_areas, expected.recommend_areas)
+
+    def test_palette_parity(self):
+        """This test includes:
+        - palettized image -> same stations, intensities, detail intensities and areas as per-pixel
+        - every intensity level present
+        """
+        self._assert_same(self.raw_image)
+        levels = {i.intensity for i in Env.intensity2color_instance.intensity2color(self.raw_image)
+                  .station_intensities.values()}
+        self.assertEqual(levels, {i[1] for i in THRESHOLDS})
+
+    def test_rgb_parity(self):
+        """This test includes:
+        - the same image, not palettized -> same as per-pixel
+        """
+        with Image.open(io.BytesIO(self.raw_image)) as image_fp:
+            raw_image = io.BytesIO()
+            image_fp.convert("RGB").save(raw_image, "PNG")
+        self._assert_same(raw_image.getvalue())
+
+    def test_worker_processes(self):
+        """This test includes:
+        - parsed by a worker process -> same as in this process
+        - worker killed -> parsed in this process, pool started again on the next image
+        - shut down -> parsed in this process, pool not started again
+        """
+        instance = IntensityToColor(processes=1)
+        expected = instance.parse_station_intensities(self.raw_image)
+        try:
+            pools = []
+            for _ in range(2):
+                for result, value in zip(instance.station_intensities(self.raw_image), expected):
+                    np.testing.assert_array_equal(result, value)
+                pool = instance._pool
+                self.assertIsNotNone(pool)
+                self.assertNotIn(pool, pools)
+                pools.append(pool)
+
+                for process in list(pool._processes.values()):
+                    process.kill()
+                    process.join()
+                for result, value in zip(instance.station_intensities(self.raw_image), expected):
+                    np.testing.assert_array_equal(result, value)
+                self.assertIsNone(instance._pool)
+        finally:
+            instance.shutdown()
+        instance.station_intensities(self.raw_image)
+        self.assertIsNone(instance._pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import sys
+import unittest
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+from internal.pswave import PSWave
+
+
+class TestPSWave(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pswave = PSWave()
+
+    def test_tabulated_depth(self):
+        """This test includes:
+        - tabulated time -> its distance (S: 3.504s at 10km -> 6km)
+        - time between two tabulated ones -> interpolated (P: 3.329s~3.630s at 10km -> 16km~18km)
+        - tabulated time of the first row -> its distance (P: 1.773s at 10km -> 0km)
+        """
+        result = self.pswave.parse_pswave_time(10, 3.504)
+        self.assertEqual(result.s_time, 6)
+        self.assertAlmostEqual(result.p_time, 16 + 2 * (3.504 - 3.329) / (3.630 - 3.329))
+
+        result = self.pswave.parse_pswave_time(10, 1.773)
+        self.assertEqual(result.p_time, 0)
+        self.assertIsNone(result.s_time)
+
+    def test_interpolated_depth(self):
+        """This test includes:
+        - depth between two tabulated ones -> interpolated between their distances
+            (P: 4.217s at 14km -> 20km, at 16km -> between 18km and 20km)
+        - S wave not yet departed at one of the depths -> None
+        """
+        result = self.pswave.parse_pswave_time(15, 4.217)
+        deeper = 18 + 2 * (4.217 - 4.127) / (4.387 - 4.127)
+        self.assertAlmostEqual(result.p_time, (20 + deeper) / 2)
+        self.assertIsNone(result.s_time)
+
+    def test_outside_table(self):
+        """This test includes:
+        - time before the first row -> None
+        - time after the last row -> None
+        - depth outside the table, or too deep -> None
+        - time too long -> None
+        """
+        for depth, time_passed in [(10, 1.0), (700, 1000), (-1, 10), (701, 10), (10, 2001)]:
+            result = self.pswave.parse_pswave_time(depth, time_passed)
+            self.assertIsNone(result.p_time, (depth, time_passed))
+            self.assertIsNone(result.s_time, (depth, time_passed))
+
+
+if __name__ == "__main__":
+    unittest.main()
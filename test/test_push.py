@@ -0,0 +1,142 @@
+import asyncio
+import json
+import sys
+import unittest
+from typing import Callable, Optional
+from unittest.mock import patch
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from internal.snapshot import SnapshotManager
+from routers.push import push_router
+from schemas.snapshot import SnapshotTopics
+
+
+class _Client:
+    """
+    Wraps the app like a client would use it:
+     an HTTP client disconnects after some server-sent events, and the finished connections are recorded.
+    """
+
+    def __init__(self, app, events: int, on_event: Optional[Callable[[int], None]] = None):
+        """
+        :param app: The ASGI app
+        :param events: Server-sent events to receive before disconnecting
+        :param on_event: Called with the count of the events received so far
+        """
+        self.app = app
+        self.events = events
+        self.on_event = on_event
+        self.finished: list[str] = []
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            self.finished.append(scope["type"])
+            return
+        enough = asyncio.Event()
+        received = 0
+        requested = False
+        completed = False
+
+        async def client_receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return await receive()
+            await enough.wait()
+            return {"type": "http.disconnect"}
+
+        async def client_send(message):
+            nonlocal received, completed
+            if message["type"] == "http.response.body":
+                completed = not message.get("more_body", False)
+                for _ in range(message.get("body", b"").count(b"\ndata: ")):
+                    received += 1
+                    if self.on_event is not None:
+                        self.on_event(received)
+                if received >= self.events:
+                    enough.set()
+            await send(message)
+
+        await self.app(scope, client_receive, client_send)
+        if not completed:
+            # The stream was cut by the disconnect; let the test client read what was sent.
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        self.finished.append(scope["type"])
+
+
+class TestPush(unittest.TestCase):
+    def setUp(self):
+        self.state = {"value": 1}
+        self.manager = SnapshotManager()
+        self.manager.register(SnapshotTopics.shake_level, lambda: json.dumps(self.state).encode("utf-8"), ["test"])
+        patcher = patch("routers.push.snapshot_manager", self.manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        app = FastAPI()
+        app.include_router(push_router)
+        self.app = app
+
+    def _publish(self, value: int) -> None:
+        """
+        Changes the state and publishes it.
+        :param value: The new value
+        """
+        self.state = {"value": value}
+        self.manager.publish("test")
+
+    def test_websocket(self):
+        """This test includes:
+        - connected -> the latest version at once
+        - published -> the new version
+        - client disconnected -> dropped (the handler returns)
+        - invalid topic -> closed
+        """
+        client = _Client(self.app, 0)
+        with TestClient(client).websocket_connect("/api/push?topics=shake_level") as websocket:
+            frame = json.loads(websocket.receive_text())
+            self.assertEqual(frame, {"topic": "shake_level", "version": f"{self.manager.epoch}.1",
+                                     "data": {"value": 1}})
+            self._publish(2)
+            frame = json.loads(websocket.receive_text())
+            self.assertEqual(frame["version"], f"{self.manager.epoch}.2")
+            self.assertEqual(frame["data"], {"value": 2})
+        self.assertEqual(client.finished, ["websocket"])
+
+        with self.assertRaises(WebSocketDisconnect) as exc:
+            with TestClient(self.app).websocket_connect("/api/push?topics=invalid"):
+                pass
+        self.assertEqual(exc.exception.code, 1008)
+
+    def test_sse(self):
+        """This test includes:
+        - connected -> the latest version at once, as an event with the version as its id
+        - published -> the new version
+        - client disconnected -> dropped (the stream ends)
+        - invalid topic -> 400
+        """
+        client = _Client(self.app, 2, lambda received: self._publish(2) if received == 1 else None)
+        with patch("routers.push._KEEPALIVE_INTERVAL", 0.5):
+            response = TestClient(client).get("/api/push/sse?topics=shake_level")
+        self.assertEqual(response.headers["Content-Type"], "text/event-stream; charset=utf-8")
+        events = [i for i in response.text.split("\n\n") if i.startswith("id: ")]
+        self.assertEqual(len(events), 2)
+        for event, value in zip(events, [1, 2]):
+            event_id, event_type, data = event.split("\n")
+            self.assertEqual(event_id, f"id: {self.manager.epoch}.{value}")
+            self.assertEqual(event_type, "event: shake_level")
+            self.assertEqual(json.loads(data.removeprefix("data: "))["data"], {"value": value})
+        self.assertEqual(client.finished, ["http"])
+
+        self.assertEqual(TestClient(self.app).get("/api/push/sse?topics=invalid").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
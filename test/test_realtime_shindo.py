@@ -0,0 +1,169 @@
+import io
+import json
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+import numpy as np
+from PIL import Image
+
+from env import Env
+from internal.centroid import Centroid
+from internal.intensity2color import IntensityToColor
+from modules.realtime_shindo.main import RealtimeShindo, IntensityRingBuffer
+from schemas.config import ConfigModel
+from sdk import yaml_to_model, close_sessions
+
+# Real-time intensity image (352x400, transparent background) in kmoni's color scale,
+#  every station painted along the scale except the ones of KNOWN_INTENSITIES
+REALTIME_IMAGE = "assets/kmoni/realtime_scale.gif"
+# Station -> intensity in REALTIME_IMAGE, None if not observed
+KNOWN_INTENSITIES = {
+    # The lowest color of the scale (0, 0, 205)
+    "平塚ST1": -3.0,
+    # Red (255, 0, 0)
+    "浜坂": 5.9,
+    # Dark red (128, 0, 0)
+    "三重": 7.58,
+    # Transparent
+    "小牧": None,
+    # Black, without color
+    "天龍": None
+}
+FIRST_TIME = "20240101161010"
+SECOND_TIME = "20240101161011"
+
+
+def _blank_image() -> bytes:
+    """
+    Makes a real-time intensity image without any station observed.
+    :return: The GIF
+    """
+    image = Image.new("P", (352, 400), 0)
+    image.putpalette([0, 0, 0] * 256)
+    raw_image = io.BytesIO()
+    image.save(raw_image, "GIF", transparency=0)
+    return raw_image.getvalue()
+
+
+class _KmoniRequestHandler(BaseHTTPRequestHandler):
+    """Local stand-in for kmoni, serving recorded images."""
+    protocol_version = "HTTP/1.1"
+    latest_time = FIRST_TIME
+    images: dict[str, bytes] = {}
+    paths: list[str] = []
+
+    def do_GET(self):
+        _KmoniRequestHandler.paths.append(self.path)
+        if self.path == "/webservice/server/pros/latest.json":
+            t = _KmoniRequestHandler.latest_time
+            body = json.dumps({
+                "security": {"realm": "", "hash": ""},
+                "latest_time": f"{t[:4]}/{t[4:6]}/{t[6:8]} {t[8:10]}:{t[10:12]}:{t[12:]}",
+                "request_time": t,
+                "result": {"status": "success", "message": ""}
+            }).encode("utf-8")
+        else:
+            body = _KmoniRequestHandler.images.get(self.path.rsplit("/", 1)[-1].split(".")[0])
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRealtimeShindo(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Env.config = yaml_to_model("../config/testing.yaml", ConfigModel)
+        Env.centroid_instance = Centroid()
+        Env.intensity2color_instance = IntensityToColor()
+        names = [i.name for i in Env.centroid_instance.earthquake_station_centroid]
+        cls.known = {names.index(name): intensity for name, intensity in KNOWN_INTENSITIES.items()}
+        with open(REALTIME_IMAGE, "rb") as f:
+            _KmoniRequestHandler.images = {
+                FIRST_TIME: f.read(),
+                SECOND_TIME: _blank_image()
+            }
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _KmoniRequestHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        close_sessions()
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.module = RealtimeShindo()
+        self.module.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        _KmoniRequestHandler.latest_time = FIRST_TIME
+        _KmoniRequestHandler.paths = []
+
+    def test_station_array(self):
+        """This test includes:
+        - colored stations -> their intensity, the lowest of the scale (-3.0) too
+        - transparent or black stations -> None
+        - every other station -> observed
+        """
+        self.module.get_info()
+        info = self.module.info
+        self.assertEqual(info.time, FIRST_TIME)
+        self.assertEqual(len(info.intensity), len(Env.centroid_instance.earthquake_station_centroid))
+        self.assertEqual(info.max_intensity, 7.58)
+        for i, intensity in enumerate(info.intensity):
+            if i in self.known:
+                self.assertEqual(intensity, self.known[i], i)
+            else:
+                self.assertIsNotNone(intensity, i)
+
+    def test_unchanged_image(self):
+        """This test includes:
+        - same latest time -> image not fetched again
+        """
+        self.module.get_info()
+        self.module.get_info()
+        self.assertEqual(len([i for i in _KmoniRequestHandler.paths if i.endswith(".gif")]), 1)
+
+    def test_history(self):
+        """This test includes:
+        - two images -> intensities of a station, oldest first
+        - not ready -> None
+        """
+        self.assertIsNone(self.module.history(0))
+        self.module.get_info()
+        _KmoniRequestHandler.latest_time = SECOND_TIME
+        self.module.get_info()
+        self.assertIsNone(self.module.info.max_intensity)
+        for i in self.known:
+            history = self.module.history(i)
+            self.assertEqual(history.time, [FIRST_TIME, SECOND_TIME])
+            self.assertEqual(history.intensity, [self.known[i], None])
+
+    def test_ring_buffer(self):
+        """This test includes:
+        - more images than the size -> the latest ones, oldest first
+        """
+        buffer = IntensityRingBuffer(3, 2)
+        for i in range(5):
+            buffer.append(str(i), np.array([i, np.nan]))
+        self.assertEqual(len(buffer), 3)
+        times, intensities = buffer.history(0)
+        self.assertEqual(times, ["2", "3", "4"])
+        self.assertEqual(intensities.tolist(), [2, 3, 4])
+        self.assertTrue(np.isnan(buffer.history(1)[1]).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
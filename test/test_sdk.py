@@ -2,12 +2,18 @@
  HomeNetwork Python SDK (Pydantic v2) unittest suite
  Licensed under GPL.
  2022-2024 Allen Da.
- Current Version - 1.2.1
+ Current Version - 1.9.0
 """
+import asyncio
+import copy
 import json
 import random
 import sys
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from io import StringIO
 from unittest.mock import patch
 
@@ -15,11 +21,13 @@ from unittest.mock import patch
 sys.path.insert(0, "../")
 sys.path.append(".")
 
+from loguru import logger
 from pydantic import BaseModel
 
 from sdk import *
 # noinspection PyProtectedMember
 from sdk import VerifyFailedException
+from schemas.sdk import ResponseTypeModel, ResponseTypes, CircuitStates, RequestTypes, ResponseModel
 
 JSONP_TEST_STRING = f"callback_{random.getrandbits(16)}" + '({"test": "works"})'
 
@@ -208,6 +216,36 @@ class TestSDKMisc(unittest.TestCase):
             _ = parse_jsonp("INVALID_JSONP")
         self.assertEqual(exc.exception.__str__(), "VERIFY failed: Use before Invalid JSONP: JSONP.")
 
+    def test_encoding_quality(self):
+        """This test includes:
+        - listed encoding -> 1, or its q-value
+        - q=0 -> 0
+        - wildcard -> its q-value for unlisted encodings
+        - no header or unlisted encoding -> 0
+        """
+        self.assertEqual(encoding_quality("gzip, deflate, br", "gzip"), 1)
+        self.assertEqual(encoding_quality("br;q=1.0, GZIP; q=0.5", "gzip"), 0.5)
+        self.assertEqual(encoding_quality("gzip;q=0, br", "gzip"), 0)
+        self.assertEqual(encoding_quality("br, *;q=0.1", "gzip"), 0.1)
+        self.assertEqual(encoding_quality("*, gzip;q=0", "gzip"), 0)
+        self.assertEqual(encoding_quality(None, "gzip"), 0)
+        self.assertEqual(encoding_quality("identity", "gzip"), 0)
+
+    def test_media_type_quality(self):
+        """This test includes:
+        - listed media type -> 1, or its q-value (parameters other than q ignored)
+        - "type/*" and "*/*" -> their q-values, the most specific one first
+        - without wildcards -> only the listed media type
+        - no header or unlisted media type -> 0
+        """
+        self.assertEqual(media_type_quality("application/json; charset=utf-8", "application/json"), 1)
+        self.assertEqual(media_type_quality("application/msgpack;q=0.5, */*", "application/msgpack"), 0.5)
+        self.assertEqual(media_type_quality("application/*;q=0.3, */*;q=0.1", "application/json"), 0.3)
+        self.assertEqual(media_type_quality("text/html, */*;q=0.1", "application/json"), 0.1)
+        self.assertEqual(media_type_quality("*/*", "application/msgpack", wildcard=False), 0)
+        self.assertEqual(media_type_quality(None, "application/json"), 0)
+        self.assertEqual(media_type_quality("text/html", "application/json"), 0)
+
     def test_generate_list(self):
         """This test includes:
         - boolean -> []
@@ -295,5 +333,365 @@ class TestSDKConversion(unittest.TestCase):
         self.assertIsNone(content)
 
 
+class _TestRequestHandler(BaseHTTPRequestHandler):
+    """Local stand-in for upstream APIs."""
+    protocol_version = "HTTP/1.1"
+    client_ports: list[int] = []
+    paths: list[str] = []
+    flaky_hits = 0
+    unstable_hits = 0
+
+    def do_GET(self):
+        _TestRequestHandler.client_ports.append(self.client_address[1])
+        _TestRequestHandler.paths.append(self.path)
+        if self.path == "/slow":
+            time.sleep(0.3)
+        if self.path == "/flaky":
+            # Only the first request is slow.
+            _TestRequestHandler.flaky_hits += 1
+            if _TestRequestHandler.flaky_hits == 1:
+                time.sleep(1)
+        if self.path == "/unstable":
+            # Only the first request fails.
+            _TestRequestHandler.unstable_hits += 1
+            if _TestRequestHandler.unstable_hits == 1:
+                self.send_response(500)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/json")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/error":
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/etag" and self.headers.get("If-None-Match") == '"test"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"test": "It works!"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/etag":
+            self.send_header("ETag", '"test"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSDKWeb(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _TestRequestHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        close_sessions()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_web_request(self):
+        """This test includes:
+        - json_to_model -> ComplexType
+        - json -> dict
+        """
+        response = web_request(f"{self.url}/json", ResponseTypeModel(
+            type=ResponseTypes.json_to_model,
+            model=ComplexType
+        ))
+        self.assertTrue(response.status)
+        self.assertEqual(response.content, ComplexType(test="It works!"))
+
+        response = web_request(f"{self.url}/json", ResponseTypeModel(type=ResponseTypes.json))
+        self.assertTrue(response.status)
+        self.assertEqual(response.content, {"test": "It works!"})
+
+    def test_keep_alive(self):
+        """This test includes:
+        - consecutive requests to the same host -> same connection
+        - configure_pools -> new connection
+        """
+        _TestRequestHandler.client_ports.clear()
+        for _ in range(3):
+            web_request(f"{self.url}/json", ResponseTypeModel(type=ResponseTypes.json))
+        self.assertEqual(len(set(_TestRequestHandler.client_ports)), 1)
+
+        configure_pools(2, {"127.0.0.1": 1})
+        web_request(f"{self.url}/json", ResponseTypeModel(type=ResponseTypes.json))
+        self.assertEqual(len(set(_TestRequestHandler.client_ports)), 2)
+        configure_pools()
+
+    def test_conditional_web_request(self):
+        """This test includes:
+        - first conditional request -> ComplexType, changed
+        - repeated conditional request (304) -> cached ComplexType, unchanged
+        - unconditional request -> ComplexType, changed
+        - async conditional request (304) -> cached ComplexType, unchanged
+        """
+        response_type = ResponseTypeModel(type=ResponseTypes.json_to_model, model=ComplexType)
+        response = web_request(f"{self.url}/etag", response_type, conditional=True)
+        self.assertTrue(response.status)
+        self.assertFalse(response.unchanged)
+        self.assertEqual(response.content, ComplexType(test="It works!"))
+
+        response = web_request(f"{self.url}/etag", response_type, conditional=True)
+        self.assertTrue(response.status)
+        self.assertTrue(response.unchanged)
+        self.assertEqual(response.content, ComplexType(test="It works!"))
+
+        response = web_request(f"{self.url}/etag", response_type)
+        self.assertFalse(response.unchanged)
+
+        async def fetch():
+            result = await async_web_request(f"{self.url}/etag", response_type, conditional=True)
+            await close_async_sessions()
+            return result
+
+        response = asyncio.run(fetch())
+        self.assertTrue(response.unchanged)
+        self.assertEqual(response.content, ComplexType(test="It works!"))
+
+    def test_cached_response_isolation(self):
+        """This test includes:
+        - modified cached content -> next caller gets the original content
+        - unchanged content -> copied only when read
+        - different headers -> not served from the other request's cache
+        """
+        response_type = ResponseTypeModel(type=ResponseTypes.json)
+        web_request(f"{self.url}/etag", response_type, conditional=True)
+        with patch("copy.deepcopy", wraps=copy.deepcopy) as deepcopy:
+            response = web_request(f"{self.url}/etag", response_type, conditional=True)
+            deepcopy.assert_not_called()
+            self.assertTrue(response.unchanged)
+            self.assertEqual(response.content, {"test": "It works!"})
+            deepcopy.assert_called_once()
+        response.content["test"] = "Modified"
+        response = web_request(f"{self.url}/etag", response_type, conditional=True)
+        self.assertEqual(response.content, {"test": "It works!"})
+
+        _TestRequestHandler.paths.clear()
+        response = web_request(f"{self.url}/etag", response_type, conditional=True, headers={"X-Test": "1"})
+        self.assertFalse(response.unchanged)
+        self.assertEqual(response.content, {"test": "It works!"})
+
+    def test_fingerprint_web_request(self):
+        """This test includes:
+        - first fingerprinted request -> ComplexType, changed
+        - same body -> cached ComplexType (not converted again), unchanged
+        - different response type -> dict, changed
+        """
+        response_type = ResponseTypeModel(type=ResponseTypes.json_to_model, model=ComplexType)
+        response = web_request(f"{self.url}/json", response_type, fingerprint=True)
+        self.assertTrue(response.status)
+        self.assertFalse(response.unchanged)
+        self.assertEqual(response.content, ComplexType(test="It works!"))
+
+        with patch("sdk._convert_response") as convert:
+            response = web_request(f"{self.url}/json", response_type, fingerprint=True)
+            convert.assert_not_called()
+        self.assertTrue(response.status)
+        self.assertTrue(response.unchanged)
+        self.assertEqual(response.content, ComplexType(test="It works!"))
+
+        response = web_request(f"{self.url}/json", ResponseTypeModel(type=ResponseTypes.json), fingerprint=True)
+        self.assertFalse(response.unchanged)
+        self.assertEqual(response.content, {"test": "It works!"})
+
+    def test_coalesced_web_request(self):
+        """This test includes:
+        - identical concurrent requests -> one upstream request, ComplexType * 5 (not shared)
+        - identical concurrent requests on one event loop -> one upstream request, ComplexType * 3
+        - coalesce=False -> one upstream request each
+        - identical concurrent POST requests -> one upstream request each
+        """
+        response_type = ResponseTypeModel(type=ResponseTypes.json_to_model, model=ComplexType)
+        _TestRequestHandler.paths.clear()
+        with ThreadPoolExecutor(5) as executor:
+            responses = list(executor.map(lambda _: web_request(f"{self.url}/slow", response_type), range(5)))
+        self.assertEqual([i.content for i in responses], [ComplexType(test="It works!")] * 5)
+        self.assertEqual(len({id(i.content) for i in responses}), 5)
+        self.assertEqual(_TestRequestHandler.paths.count("/slow"), 1)
+
+        async def fetch():
+            result = await asyncio.gather(*[
+                async_web_request(f"{self.url}/slow", response_type) for _ in range(3)
+            ])
+            await close_async_sessions()
+            return result
+
+        _TestRequestHandler.paths.clear()
+        responses = asyncio.run(fetch())
+        self.assertEqual([i.content for i in responses], [ComplexType(test="It works!")] * 3)
+        self.assertEqual(_TestRequestHandler.paths.count("/slow"), 1)
+
+        _TestRequestHandler.paths.clear()
+        with ThreadPoolExecutor(2) as executor:
+            list(executor.map(lambda _: web_request(f"{self.url}/slow", response_type, coalesce=False), range(2)))
+        self.assertEqual(_TestRequestHandler.paths.count("/slow"), 2)
+
+        _TestRequestHandler.paths.clear()
+        with ThreadPoolExecutor(2) as executor:
+            list(executor.map(lambda _: web_request(f"{self.url}/slow", response_type, request_type=RequestTypes.post,
+                                                    form_data={"test": 1}), range(2)))
+        self.assertEqual(_TestRequestHandler.paths.count("/slow"), 2)
+
+    def test_coalesced_leader(self):
+        """This test includes:
+        - no one joined -> the leader gets the fetched response itself (not copied)
+        - joined -> the leader gets the fetched response, the joiner a copy unaffected by the leader's changes
+        - same on one event loop
+        """
+        response_type = ResponseTypeModel(type=ResponseTypes.json)
+        fetched = ResponseModel(status=True, content={"test": "It works!"})
+        with patch("sdk._web_request", return_value=fetched), \
+                patch("copy.deepcopy", wraps=copy.deepcopy) as deepcopy:
+            response = web_request(f"{self.url}/json", response_type)
+            self.assertIs(response, fetched)
+            self.assertEqual(response.content, {"test": "It works!"})
+            deepcopy.assert_not_called()
+
+        def slow_fetch(*_):
+            time.sleep(0.3)
+            return ResponseModel(status=True, content={"test": "It works!"})
+
+        def lead():
+            response = web_request(f"{self.url}/json", response_type)
+            response.content["test"] = "Modified"
+            return response
+
+        with patch("sdk._web_request", side_effect=slow_fetch), ThreadPoolExecutor(2) as executor:
+            leader = executor.submit(lead)
+            time.sleep(0.1)
+            joiner = executor.submit(web_request, f"{self.url}/json", response_type)
+            self.assertEqual(leader.result().content, {"test": "Modified"})
+            self.assertEqual(joiner.result().content, {"test": "It works!"})
+
+        fetched_async = []
+
+        async def async_slow_fetch(*_):
+            await asyncio.sleep(0.1)
+            fetched_async.append(ResponseModel(status=True, content={"test": "It works!"}))
+            return fetched_async[-1]
+
+        async def fetch():
+            with patch("sdk._async_web_request", side_effect=async_slow_fetch):
+                alone = await async_web_request(f"{self.url}/json", response_type)
+                responses = await asyncio.gather(*[
+                    async_web_request(f"{self.url}/json", response_type) for _ in range(2)
+                ])
+                responses[0].content["test"] = "Modified"
+            return alone, responses
+
+        alone, responses = asyncio.run(fetch())
+        self.assertIs(alone, fetched_async[0])
+        self.assertEqual([i.content for i in responses], [{"test": "Modified"}, {"test": "It works!"}])
+
+    def test_circuit_breaker(self):
+        """This test includes:
+        - failures below threshold -> closed
+        - failures reaching threshold -> open
+        - request while open -> failed fast, no upstream request, no error logged
+        - request after reset timeout -> probe, closed
+        - deadline shorter than response -> failed within deadline
+        """
+        response_type = ResponseTypeModel(type=ResponseTypes.json)
+        configure_breakers(2, 0.3)
+        try:
+            _TestRequestHandler.paths.clear()
+            self.assertFalse(web_request(f"{self.url}/error", response_type, max_retries=1).status)
+            self.assertEqual(breaker_states()["127.0.0.1"].state, CircuitStates.closed)
+            self.assertFalse(web_request(f"{self.url}/error", response_type, max_retries=1).status)
+            self.assertEqual(breaker_states()["127.0.0.1"].state, CircuitStates.open)
+
+            logs = StringIO()
+            handler = logger.add(logs, level="DEBUG", format="{level} {message}")
+            try:
+                self.assertFalse(web_request(f"{self.url}/json", response_type).status)
+            finally:
+                logger.remove(handler)
+            self.assertNotIn("/json", _TestRequestHandler.paths)
+            self.assertIn("Circuit breaker open", logs.getvalue())
+            self.assertNotIn("ERROR", logs.getvalue())
+
+            time.sleep(0.3)
+            self.assertTrue(web_request(f"{self.url}/json", response_type).status)
+            self.assertEqual(breaker_states()["127.0.0.1"].state, CircuitStates.closed)
+
+            start = time.monotonic()
+            self.assertFalse(web_request(f"{self.url}/slow", response_type, deadline=0.1).status)
+            self.assertLess(time.monotonic() - start, 0.3)
+        finally:
+            configure_breakers()
+
+    def test_retry_backoff(self):
+        """This test includes:
+        - failure, then success without a deadline -> retried after the backoff, ComplexType
+        """
+        response_type = ResponseTypeModel(type=ResponseTypes.json_to_model, model=ComplexType)
+        _TestRequestHandler.unstable_hits = 0
+        response = web_request(f"{self.url}/unstable", response_type, max_retries=2, timeout=0.2)
+        self.assertTrue(response.status)
+        self.assertEqual(response.content, ComplexType(test="It works!"))
+        self.assertEqual(_TestRequestHandler.unstable_hits, 2)
+
+    def test_hedged_web_request(self):
+        """This test includes:
+        - not enough latency samples -> no hedging
+        - slow first attempt -> second attempt wins, ComplexType
+        """
+        response_type = ResponseTypeModel(type=ResponseTypes.json_to_model, model=ComplexType)
+        for _ in range(10):
+            self.assertTrue(web_request(f"{self.url}/json", response_type, hedge=0.9).status)
+        self.assertEqual(hedge_stats()["127.0.0.1"].requests, 10)
+
+        start = time.monotonic()
+        response = web_request(f"{self.url}/flaky", response_type, hedge=0.9)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(response.content, ComplexType(test="It works!"))
+        stats = hedge_stats()["127.0.0.1"]
+        self.assertGreaterEqual(stats.hedged, 1)
+        self.assertGreaterEqual(stats.wins, 1)
+
+    def test_async_web_request(self):
+        """This test includes:
+        - json_to_model -> ComplexType
+        - concurrent requests on one event loop -> ComplexType * 3
+        - redirect -> ComplexType of the redirected location, same as web_request
+        """
+        response_type = ResponseTypeModel(type=ResponseTypes.json_to_model, model=ComplexType)
+
+        async def fetch():
+            single = await async_web_request(f"{self.url}/json", response_type)
+            many = await asyncio.gather(*[
+                async_web_request(f"{self.url}/json", response_type) for _ in range(3)
+            ])
+            redirected = await async_web_request(f"{self.url}/redirect", response_type)
+            await close_async_sessions()
+            return single, many, redirected
+
+        response, responses, redirected = asyncio.run(fetch())
+        self.assertTrue(response.status)
+        self.assertEqual(response.content, ComplexType(test="It works!"))
+        self.assertEqual([i.content for i in responses], [ComplexType(test="It works!")] * 3)
+        self.assertTrue(redirected.status)
+        self.assertEqual(redirected.content, ComplexType(test="It works!"))
+        self.assertEqual(web_request(f"{self.url}/redirect", response_type).content, redirected.content)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,238 @@
+import asyncio
+import gzip
+import json
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+import msgpack
+from starlette.requests import Request
+
+from internal.json_patch import make_patch
+from internal.snapshot import SnapshotManager
+from schemas.snapshot import SnapshotTopics
+
+
+def _request(headers: dict = None) -> Request:
+    """
+    Makes a request to a snapshot endpoint.
+    :param headers: The request headers
+    :return: The request
+    """
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
+    })
+
+
+def _apply_patch(document, operations: list[dict]):
+    """
+    Applies a JSON Patch (RFC 6902) the way a client does.
+    :param document: The document, modified in place
+    :param operations: The operations
+    :return: The patched document
+    """
+    for operation in operations:
+        tokens = [i.replace("~1", "/").replace("~0", "~") for i in operation["path"].split("/")[1:]]
+        if not tokens:
+            document = operation["value"]
+            continue
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token) if isinstance(parent, list) else token]
+        key = tokens[-1]
+        if isinstance(parent, list):
+            if operation["op"] == "add":
+                parent.insert(len(parent) if key == "-" else int(key), operation["value"])
+            elif operation["op"] == "remove":
+                del parent[int(key)]
+            else:
+                parent[int(key)] = operation["value"]
+        elif operation["op"] == "remove":
+            del parent[key]
+        else:
+            parent[key] = operation["value"]
+    return document
+
+
+class TestJsonPatch(unittest.TestCase):
+    def test_make_patch(self):
+        """This test includes:
+        - changed, added and removed keys -> new document
+        - list shrunk / grown -> new document (removals from the end, appends)
+        - nested lists and changed types -> new document
+        - keys with "/" and "~" -> escaped
+        - same document -> no operation
+        """
+        old = {
+            "time": "2024/01/01 16:10:00",
+            "max_intensity": "5-",
+            "areas": [{"name": "石川県能登", "intensity": "5-"}, {"name": "新潟県上越", "intensity": "4"},
+                      {"name": "富山県東部", "intensity": "3"}],
+            "points": [[1, 2], [3, 4]],
+            "tsunami": None,
+            "a/b~c": 1,
+            "removed": True
+        }
+        new = {
+            "time": "2024/01/01 16:10:30",
+            "max_intensity": "7",
+            "areas": [{"name": "石川県能登", "intensity": "7"}],
+            "points": [[1, 2, 5], [3, 4], [6, 7], [8, 9]],
+            "tsunami": {"comment": "大津波警報"},
+            "a/b~c": 2,
+            "added": [1]
+        }
+        for before, after in [(old, new), (new, old)]:
+            operations = make_patch(json.loads(json.dumps(before)), after)
+            self.assertEqual(_apply_patch(json.loads(json.dumps(before)), operations), after)
+        self.assertIn({"op": "replace", "path": "/a~1b~0c", "value": 2}, make_patch(old, new))
+        self.assertEqual(make_patch(old, json.loads(json.dumps(old))), [])
+
+
+class TestSnapshotManager(unittest.TestCase):
+    def setUp(self):
+        self.state = {"value": 1}
+        self.manager = SnapshotManager()
+        self.manager.register(SnapshotTopics.shake_level, lambda: json.dumps(self.state).encode("utf-8"), ["test"])
+
+    def _respond(self, since: str = None, timeout: float = 0.2, delta: str = None):
+        """
+        Serves the snapshot, with a short long-poll timeout.
+        :param since: The version the client holds
+        :param timeout: The long-poll timeout
+        :param delta: The version the client can apply a patch to
+        :return: The response, and the seconds it took
+        """
+        async def respond():
+            started = time.monotonic()
+            with patch("internal.snapshot.LONG_POLL_TIMEOUT", timeout):
+                response = await self.manager.response(SnapshotTopics.shake_level, _request(), since, delta)
+            return response, time.monotonic() - started
+
+        return asyncio.run(respond())
+
+    def test_long_poll(self):
+        """This test includes:
+        - no since -> latest snapshot, "<epoch>.<version>"
+        - latest version as since -> 304 after the timeout
+        - older version as since -> latest snapshot at once
+        - version of another boot, or ahead of the latest one -> latest snapshot at once
+        """
+        response, _ = self._respond()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Snapshot-Version"], f"{self.manager.epoch}.1")
+        self.assertEqual(response.body, b'{"value": 1}')
+
+        response, elapsed = self._respond(f"{self.manager.epoch}.1")
+        self.assertEqual(response.status_code, 304)
+        self.assertGreaterEqual(elapsed, 0.2)
+
+        self.state["value"] = 2
+        self.manager.publish("test")
+        response, elapsed = self._respond(f"{self.manager.epoch}.1", timeout=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Snapshot-Version"], f"{self.manager.epoch}.2")
+        self.assertLess(elapsed, 1)
+
+        for since in ["0.2", f"{self.manager.epoch}.100", "2", "malformed"]:
+            response, elapsed = self._respond(since, timeout=5)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.body, b'{"value": 2}')
+            self.assertLess(elapsed, 1)
+
+
+    def test_delta(self):
+        """This test includes:
+        - delta of a recent version -> patch turning it into the latest snapshot
+        - delta of the latest version -> full snapshot
+        - delta of another boot with the same version -> full snapshot
+        """
+        self.state = {"areas": [{"name": str(i), "intensity": 1} for i in range(20)]}
+        first, _ = self._respond()
+        self.state["areas"] = self.state["areas"][:15] + [{"name": "a", "intensity": 2}]
+        self.state["areas"][0]["intensity"] = 3
+        self.manager.publish("test")
+        response, _ = self._respond(delta=first.headers["X-Snapshot-Version"])
+        self.assertEqual(response.media_type, "application/json-patch+json")
+        self.assertEqual(response.headers["X-Patch-Base"], f"{self.manager.epoch}.1")
+        self.assertEqual(_apply_patch(json.loads(first.body), json.loads(response.body)), self.state)
+
+        response, _ = self._respond(delta=f"{self.manager.epoch}.2")
+        self.assertEqual(json.loads(response.body), self.state)
+
+        response, _ = self._respond(delta="0.1")
+        self.assertEqual(response.media_type, "application/json")
+        self.assertNotIn("X-Patch-Base", response.headers)
+        self.assertEqual(json.loads(response.body), self.state)
+
+
+    def test_gzip(self):
+        """This test includes:
+        - gzip accepted -> gzip body
+        - gzip;q=0 -> plain body
+        """
+        async def respond(accept_encoding: str):
+            return await self.manager.response(SnapshotTopics.shake_level,
+                                               _request({"Accept-Encoding": accept_encoding}))
+
+        response = asyncio.run(respond("br, gzip"))
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.body)), self.state)
+        response = asyncio.run(respond("gzip;q=0, br"))
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(json.loads(response.body), self.state)
+
+    def test_msgpack(self):
+        """This test includes:
+        - MessagePack in Accept (either type, any case) -> MessagePack body and its own ETag
+        - MessagePack preferred by q-value, or only one named beside "*/*" -> MessagePack
+        - JSON preferred, MessagePack q=0, "*/*" or no Accept -> JSON
+        - Vary on Accept and Accept-Encoding, for both
+        - If-None-Match of the MessagePack ETag -> 304 for MessagePack only
+        - MessagePack with gzip -> gzip MessagePack body
+        """
+        async def respond(headers: dict):
+            return await self.manager.response(SnapshotTopics.shake_level, _request(headers))
+
+        json_etag = asyncio.run(respond({})).headers["ETag"]
+        for accept in ["application/msgpack", "application/x-msgpack", "Application/MsgPack",
+                       "application/json;q=0.5, application/msgpack", "application/msgpack, */*;q=0.1",
+                       "application/json, application/msgpack"]:
+            response = asyncio.run(respond({"Accept": accept}))
+            self.assertEqual(response.media_type, "application/msgpack", accept)
+            self.assertEqual(msgpack.unpackb(response.body), self.state)
+            self.assertEqual(response.headers["ETag"], f'{json_etag[:-1]}-msgpack"')
+            self.assertEqual(response.headers["Vary"], "Accept, Accept-Encoding")
+
+        for accept in [None, "*/*", "application/json", "application/msgpack;q=0, application/json",
+                       "application/msgpack;q=0.5, application/json", "text/html"]:
+            response = asyncio.run(respond({"Accept": accept} if accept else {}))
+            self.assertEqual(response.media_type, "application/json", accept)
+            self.assertEqual(json.loads(response.body), self.state)
+            self.assertEqual(response.headers["ETag"], json_etag)
+            self.assertEqual(response.headers["Vary"], "Accept, Accept-Encoding")
+
+        msgpack_etag = f'{json_etag[:-1]}-msgpack"'
+        response = asyncio.run(respond({"Accept": "application/msgpack", "If-None-Match": msgpack_etag}))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], msgpack_etag)
+        response = asyncio.run(respond({"Accept": "application/msgpack", "If-None-Match": json_etag}))
+        self.assertEqual(response.status_code, 200)
+        response = asyncio.run(respond({"If-None-Match": msgpack_etag}))
+        self.assertEqual(response.status_code, 200)
+
+        response = asyncio.run(respond({"Accept": "application/msgpack", "Accept-Encoding": "gzip"}))
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(msgpack.unpackb(gzip.decompress(response.body)), self.state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+import brotli
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from internal.static import PrecompressedStaticFiles, IMMUTABLE_CACHE, REVALIDATE_CACHE
+from tools.static_compressor import main as static_compressor
+
+# Source files: name -> content
+SOURCES = {
+    "japan.json": json.dumps({"type": "FeatureCollection", "features": [], "name": "japan" * 100}).encode("utf-8"),
+    "world.json": json.dumps({"type": "FeatureCollection", "features": [], "name": "world" * 100}).encode("utf-8")
+}
+
+
+def _compress(directory: str, without_brotli: bool = False) -> dict[str, str]:
+    """
+    Runs tools/static_compressor over the sources.
+    :param directory: The static directory
+    :param without_brotli: Whether to run it as if brotli were not installed
+    :return: The manifest
+    """
+    os.makedirs(os.path.join(directory, "geojson"), exist_ok=True)
+    for name, content in SOURCES.items():
+        with open(os.path.join(directory, "geojson", name), "wb") as f:
+            f.write(content)
+    with patch.object(static_compressor, "STATIC_DIRECTORY", directory), \
+            patch.object(static_compressor, "DIST_DIRECTORY", os.path.join(directory, "dist")), \
+            redirect_stdout(StringIO()):
+        if without_brotli:
+            with patch.object(static_compressor, "brotli", None):
+                static_compressor.run()
+        else:
+            static_compressor.run()
+    with open(os.path.join(directory, "dist", "manifest.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TestStaticCompressor(unittest.TestCase):
+    def test_run(self):
+        """This test includes:
+        - each source -> a fingerprinted copy, with .gz and .br sidecars of the same content
+        - manifest -> original name to fingerprinted name
+        - missing folder (topojson) -> skipped
+        - no brotli -> .gz sidecars only
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = _compress(directory)
+            self.assertEqual(manifest, {f"geojson/{name}": static_compressor.fingerprint(f"geojson/{name}", content)
+                                        for name, content in SOURCES.items()})
+            for name, content in SOURCES.items():
+                path = os.path.join(directory, "dist", manifest[f"geojson/{name}"])
+                self.assertRegex(os.path.basename(path), r"^\w+\.[0-9a-f]{16}\.json$")
+                with open(path, "rb") as f:
+                    self.assertEqual(f.read(), content)
+                with open(f"{path}.gz", "rb") as f:
+                    self.assertEqual(gzip.decompress(f.read()), content)
+                with open(f"{path}.br", "rb") as f:
+                    self.assertEqual(brotli.decompress(f.read()), content)
+            self.assertFalse(os.path.exists(os.path.join(directory, "dist", "topojson")))
+
+            manifest = _compress(directory, without_brotli=True)
+            path = os.path.join(directory, "dist", manifest["geojson/japan.json"])
+            self.assertTrue(os.path.isfile(f"{path}.gz"))
+            self.assertFalse(os.path.exists(f"{path}.br"))
+
+
+class TestPrecompressedStaticFiles(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.manifest = _compress(self.directory)
+        # A file in the manifest whose sidecars are gone
+        for suffix in (".br", ".gz"):
+            os.remove(os.path.join(self.directory, "dist", self.manifest["geojson/world.json"]) + suffix)
+        # A file not in the manifest
+        with open(os.path.join(self.directory, "plain.txt"), "wb") as f:
+            f.write(b"plain")
+        app = FastAPI()
+        app.mount("/static", PrecompressedStaticFiles(directory=self.directory,
+                                                      dist_directory=os.path.join(self.directory, "dist")),
+                  name="static")
+        self.client = TestClient(app)
+
+    def _size(self, path: str, suffix: str = "") -> int:
+        """
+        :param path: The path in the manifest
+        :param suffix: The sidecar suffix
+        :return: Size of the file in dist
+        """
+        return os.path.getsize(os.path.join(self.directory, "dist", self.manifest[path]) + suffix)
+
+    def test_encoding(self):
+        """This test includes:
+        - both accepted -> .br (preferred on a tie)
+        - q-value -> the higher one, either way
+        - q=0, identity or no Accept-Encoding -> the plain file
+        - Vary and Content-Encoding set
+        """
+        cases = [
+            ("gzip, br", "br", ".br"),
+            ("gzip;q=1, br;q=1", "br", ".br"),
+            ("br;q=0.5, gzip", "gzip", ".gz"),
+            ("br, gzip;q=0.9", "br", ".br"),
+            ("br;q=0, gzip", "gzip", ".gz"),
+            ("*;q=0.5, br;q=0.1", "gzip", ".gz"),
+            ("br;q=0, gzip;q=0", None, ""),
+            ("identity", None, ""),
+            ("", None, ""),
+        ]
+        for accept_encoding, encoding, suffix in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.client.get("/static/geojson/japan.json", headers={"Accept-Encoding": accept_encoding})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers.get("Content-Encoding"), encoding)
+                self.assertEqual(int(response.headers["Content-Length"]), self._size("geojson/japan.json", suffix))
+                self.assertEqual(response.headers["Vary"], "Accept, Accept-Encoding")
+                self.assertEqual(response.content, SOURCES["japan.json"])
+
+    def test_cache_control(self):
+        """This test includes:
+        - fingerprinted name -> immutable
+        - original name -> revalidated
+        """
+        response = self.client.get(f"/static/{self.manifest['geojson/japan.json']}",
+                                   headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Cache-Control"], IMMUTABLE_CACHE)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.content, SOURCES["japan.json"])
+
+        response = self.client.get("/static/geojson/japan.json", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Cache-Control"], REVALIDATE_CACHE)
+
+    def test_fallback(self):
+        """This test includes:
+        - no sidecar -> the plain file from dist
+        - not in the manifest -> the plain file, as StaticFiles serves it
+        """
+        for path in ("geojson/world.json", self.manifest["geojson/world.json"]):
+            with self.subTest(path=path):
+                response = self.client.get(f"/static/{path}", headers={"Accept-Encoding": "br, gzip"})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn("Content-Encoding", response.headers)
+                self.assertEqual(int(response.headers["Content-Length"]), self._size("geojson/world.json"))
+                self.assertEqual(response.content, SOURCES["world.json"])
+
+        response = self.client.get("/static/plain.txt", headers={"Accept-Encoding": "br, gzip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertNotIn("Vary", response.headers)
+        self.assertEqual(response.content, b"plain")
+
+
+if __name__ == "__main__":
+    unittest.main()
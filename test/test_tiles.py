@@ -0,0 +1,103 @@
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+from internal.tiles import VectorTiles, _tile_bounds, _points_bounds, TILE_BUFFER
+from schemas.tiles import TileLayers
+
+# A triangle over Japan, whose hypotenuse runs from (170, 30) to (130, 60)
+TRIANGLE = {"type": "Polygon", "coordinates": [[[130, 30], [170, 30], [130, 60], [130, 30]]]}
+# (z, x, y) of a tile the triangle crosses the west and north edges of
+CROSSED_TILE = (4, 14, 6)
+# (z, x, y) of a tile in the triangle's bounds, but above its hypotenuse
+EMPTY_TILE = (4, 15, 5)
+
+
+def _tiles(geometry: dict, directory: str = None) -> VectorTiles:
+    """
+    Makes a tile cutter whose japan layer is one feature.
+    :param geometry: The geometry of the feature
+    :param directory: The disk cache directory
+    :return: The tile cutter
+    """
+    feature = {"type": "Feature", "properties": {"name": "test"}, "geometry": geometry}
+
+    def init_layers(tiles: VectorTiles) -> None:
+        tiles._layers[TileLayers.japan] = [(feature, _points_bounds(VectorTiles._flatten(geometry)))]
+        tiles._fingerprints[TileLayers.japan] = "test"
+
+    with patch.object(VectorTiles, "_init_layers", init_layers):
+        return VectorTiles(6, 1 << 20, 1 << 20, directory)
+
+
+class TestVectorTiles(unittest.TestCase):
+    def test_cut(self):
+        """This test includes:
+        - polygon crossing the tile -> clipped to the buffered tile, ring closed
+        - polygon inside the tile -> simplified to its corners
+        - tile in the polygon's bounds but outside it -> no feature
+        - tile out of range -> None
+        """
+        tiles = _tiles(TRIANGLE)
+        collection = json.loads(gzip.decompress(tiles.get_tile(TileLayers.japan, *CROSSED_TILE)))
+        self.assertEqual(len(collection["features"]), 1)
+        self.assertEqual(collection["features"][0]["properties"], {"name": "test"})
+        geometry = collection["features"][0]["geometry"]
+        self.assertEqual(geometry["type"], "Polygon")
+        ring = geometry["coordinates"][0]
+        self.assertEqual(ring[0], ring[-1])
+        west, south, east, north = _tile_bounds(*CROSSED_TILE, TILE_BUFFER)
+        for longitude, latitude in ring:
+            self.assertTrue(west - 0.01 <= longitude <= east + 0.01)
+            self.assertTrue(south - 0.01 <= latitude <= north + 0.01)
+        self.assertAlmostEqual(min(i[0] for i in ring), west, places=2)
+        self.assertAlmostEqual(max(i[1] for i in ring), north, places=2)
+
+        # The edges of a square, with a point every 0.01 degrees
+        edge = [i / 100 for i in range(100)]
+        square = ([[130 + i, 30] for i in edge] + [[131, 30 + i] for i in edge] +
+                  [[131 - i, 31] for i in edge] + [[130, 31 - i] for i in edge] + [[130, 30]])
+        tiles = _tiles({"type": "Polygon", "coordinates": [square]})
+        collection = json.loads(gzip.decompress(tiles.get_tile(TileLayers.japan, 0, 0, 0)))
+        self.assertEqual(collection["features"][0]["geometry"]["coordinates"][0],
+                         [[130, 30], [131, 30], [131, 31], [130, 31], [130, 30]])
+
+        tiles = _tiles(TRIANGLE)
+        self.assertIsNone(tiles._clip_geometry(TRIANGLE, _tile_bounds(*EMPTY_TILE, TILE_BUFFER), False, 0, 6))
+        collection = json.loads(gzip.decompress(tiles.get_tile(TileLayers.japan, *EMPTY_TILE)))
+        self.assertEqual(collection["features"], [])
+        self.assertIsNone(tiles.get_tile(TileLayers.japan, 7, 0, 0))
+        self.assertIsNone(tiles.get_tile(TileLayers.japan, 4, 16, 0))
+
+    def test_disk_cache(self):
+        """This test includes:
+        - tiles of another version of the layer -> removed at startup
+        - plain files in the cache root -> skipped
+        - tile cut before -> read from disk
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            stale = os.path.join(directory, TileLayers.japan.value, "stale")
+            os.makedirs(stale)
+            with open(os.path.join(directory, "README"), "w") as f:
+                f.write("test")
+            tiles = _tiles(TRIANGLE, directory)
+            self.assertFalse(os.path.exists(stale))
+            self.assertTrue(os.path.exists(os.path.join(directory, "README")))
+
+            content = tiles.get_tile(TileLayers.japan, *CROSSED_TILE)
+            tiles = _tiles(TRIANGLE, directory)
+            with patch.object(tiles, "_cut") as cut:
+                self.assertEqual(tiles.get_tile(TileLayers.japan, *CROSSED_TILE), content)
+                cut.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
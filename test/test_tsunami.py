@@ -0,0 +1,131 @@
+import json
+import sys
+import unittest
+
+# To mitigate not being found
+sys.path.insert(0, "../")
+sys.path.append(".")
+
+from env import Env
+from internal.geojson import GeoJson, TSUNAMI_GEOJSON_CACHE_SIZE
+from modules.tsunami.feed import JMAFeedReader
+from routers.tsunami import _serialize_tsunami_info
+from schemas.config import ConfigModel
+from schemas.jma import JMAListContent, JMAListEntryLink
+from schemas.p2p_info import TsunamiAreaModel, TsunamiAreaGradeEnum, TsunamiReturnModel
+from schemas.tsunami import TsunamiTotalInfoModel, TsunamiExpectationReturnModel, TsunamiObservationReturnModel
+from sdk import yaml_to_model
+
+DATA_URL = "https://www.data.jma.go.jp/developer/xml/data"
+
+
+def _entry(entry_id: str, content: bool = True, link: bool = True) -> str:
+    """
+    Generates an Atom entry of JMA's feed.
+    :param entry_id: The file name of the entry
+    :param content: Whether to include <content>
+    :param link: Whether to include <link>
+    :return: The entry
+    """
+    return (f"<entry><title>津波情報a</title><id>{DATA_URL}/{entry_id}</id>"
+            f"<updated>2024-01-01T07:10:00Z</updated><author><name>気象庁</name></author>"
+            + (f'<link type="application/xml" href="{DATA_URL}/{entry_id}"/>' if link else "")
+            + ('<content type="text">【津波情報】</content>' if content else "")
+            + "</entry>")
+
+
+def _feed(*entries: str) -> bytes:
+    """
+    Generates JMA's Atom feed.
+    :param entries: The entries, newest-first
+    :return: The raw feed
+    """
+    return ('<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom" lang="ja">'
+            '<title>高頻度（地震火山）</title><id>urn:uuid:test</id><updated>2024-01-01T07:10:00Z</updated>'
+            + "".join(entries) + "</feed>").encode("utf-8")
+
+
+ENTRIES = ["20240101071000_0_VTSE51_010000.xml",
+           "20240101070900_0_VTSE41_010000.xml",
+           "20240101070800_0_VXSE53_010000.xml"]
+
+
+class TestJMAFeedReader(unittest.TestCase):
+    def test_read_new_entries(self):
+        """This test includes:
+        - no last entry -> every entry, newest-first
+        - last entry in the feed -> entries newer than it
+        - newest entry as the last entry -> no entry
+        """
+        feed = _feed(*[_entry(i) for i in ENTRIES])
+        entries = JMAFeedReader.read_new_entries(feed, None)
+        self.assertEqual([i.id for i in entries], [f"{DATA_URL}/{i}" for i in ENTRIES])
+        self.assertEqual(entries[0].title, "津波情報a")
+        self.assertEqual(entries[0].author.name, "気象庁")
+        self.assertEqual(entries[0].content, JMAListContent(text="【津波情報】", type="text"))
+        self.assertEqual(entries[0].link, JMAListEntryLink(href=f"{DATA_URL}/{ENTRIES[0]}", type="application/xml"))
+
+        entries = JMAFeedReader.read_new_entries(feed, f"{DATA_URL}/{ENTRIES[1]}")
+        self.assertEqual([i.id for i in entries], [f"{DATA_URL}/{ENTRIES[0]}"])
+
+        self.assertEqual(JMAFeedReader.read_new_entries(feed, f"{DATA_URL}/{ENTRIES[0]}"), [])
+
+    def test_last_entry_rolled_out(self):
+        """This test includes:
+        - last entry no longer in the feed -> every entry
+        """
+        feed = _feed(*[_entry(i) for i in ENTRIES])
+        entries = JMAFeedReader.read_new_entries(feed, f"{DATA_URL}/20240101060000_0_VTSE51_010000.xml")
+        self.assertEqual([i.id for i in entries], [f"{DATA_URL}/{i}" for i in ENTRIES])
+
+    def test_missing_elements(self):
+        """This test includes:
+        - entry without <content> -> empty content
+        - entry without <link> -> empty link
+        """
+        feed = _feed(_entry(ENTRIES[0], content=False), _entry(ENTRIES[1], link=False))
+        entries = JMAFeedReader.read_new_entries(feed, None)
+        self.assertEqual(entries[0].content, JMAListContent(text="", type=""))
+        self.assertEqual(entries[1].link, JMAListEntryLink(href="", type=""))
+        self.assertEqual(entries[1].content.text, "【津波情報】")
+
+
+
+class TestTsunamiGeoJson(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Env.config = yaml_to_model("../config/testing.yaml", ConfigModel)
+        Env.geojson_instance = GeoJson()
+
+    def test_serialized_info(self):
+        """This test includes:
+        - tsunami info with a map -> the same document as model_dump_json
+        - copy of the GeoJson -> the same serialized form
+        - GeoJson evicted from the cache -> the same serialized form
+        """
+        names = [i.properties.name for i in Env.geojson_instance.tsunami_areas.features[:3]]
+        grades = [TsunamiAreaGradeEnum.MajorWarning, TsunamiAreaGradeEnum.Watch, TsunamiAreaGradeEnum.Unknown]
+        geojson = Env.geojson_instance.get_tsunami_geojson(
+            {name: TsunamiAreaModel(grade=grade, name=name) for name, grade in zip(names, grades)})
+        body = Env.geojson_instance.get_tsunami_geojson_json(geojson)
+        self.assertEqual(json.loads(body), json.loads(geojson.model_dump_json()))
+        self.assertEqual(Env.geojson_instance.get_tsunami_geojson_json(geojson.model_copy(deep=True)), body)
+
+        model = TsunamiTotalInfoModel(
+            status="1",
+            status_forecast="0",
+            map=TsunamiReturnModel(time="2024/01/01 16:22:00", areas=geojson),
+            info=TsunamiExpectationReturnModel(),
+            watch=TsunamiObservationReturnModel()
+        )
+        self.assertEqual(json.loads(_serialize_tsunami_info(model, body)), json.loads(model.model_dump_json()))
+
+        for feature in Env.geojson_instance.tsunami_areas.features[3:3 + TSUNAMI_GEOJSON_CACHE_SIZE]:
+            Env.geojson_instance.get_tsunami_geojson({feature.properties.name: TsunamiAreaModel(
+                grade=TsunamiAreaGradeEnum.Warning)})
+        self.assertNotIn(geojson, [i[0] for i in Env.geojson_instance._tsunami_geojson_cache.values()])
+        self.assertEqual(Env.geojson_instance.get_tsunami_geojson_json(geojson), body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+ QuakeMap - Tools - static_compressor
+ Outputs the fingerprinted, precompressed static files into static/dist, with static/dist/manifest.json.
+ NOTES:
+    - Run it whenever static/geojson changes (the Docker build runs it).
+    - Brotli sidecars need the brotli package; without it, only gzip sidecars are written.
+    - static/topojson is written by topojson_exporter; run that first, or it is skipped.
+ Output, for each static/geojson/NAME.json (and static/topojson/NAME.json):
+    - static/dist/geojson/NAME.HASH.json (+ .gz, .br)
+    - manifest.json entry: "geojson/NAME.json": "geojson/NAME.HASH.json"
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import traceback
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIRECTORY = "../../static"
+DIST_DIRECTORY = "../../static/dist"
+SOURCE_FOLDERS = ["geojson", "topojson"]
+
+
+def fingerprint(path: str, content: bytes) -> str:
+    """
+    Inserts the content hash into a file name, e.g. geojson/japan.json -> geojson/japan.0123456789abcdef.json
+    """
+    root, extension = os.path.splitext(path)
+    return f"{root}.{hashlib.blake2b(content, digest_size=8).hexdigest()}{extension}"
+
+
+def run():
+    if brotli is None:
+        print("brotli is not installed; writing gzip sidecars only.")
+    shutil.rmtree(DIST_DIRECTORY, ignore_errors=True)
+    manifest: dict[str, str] = {}
+    for folder in SOURCE_FOLDERS:
+        if not os.path.isdir(os.path.join(STATIC_DIRECTORY, folder)):
+            print(f"Skipping {folder}: not found.")
+            continue
+        os.makedirs(os.path.join(DIST_DIRECTORY, folder), exist_ok=True)
+        for name in sorted(os.listdir(os.path.join(STATIC_DIRECTORY, folder))):
+            path = f"{folder}/{name}"
+            try:
+                with open(os.path.join(STATIC_DIRECTORY, path), "rb") as f:
+                    content = f.read()
+                    f.close()
+            except Exception:
+                print(f"Failed to read {path}.")
+                traceback.print_exc()
+                return
+            output = fingerprint(path, content)
+            output_path = os.path.join(DIST_DIRECTORY, output)
+            with open(output_path, "wb") as f:
+                f.write(content)
+                f.close()
+            gzip_content = gzip.compress(content, compresslevel=9, mtime=0)
+            with open(f"{output_path}.gz", "wb") as f:
+                f.write(gzip_content)
+                f.close()
+            sizes = f"raw {len(content)}, gzip {len(gzip_content)}"
+            if brotli is not None:
+                brotli_content = brotli.compress(content, quality=11)
+                with open(f"{output_path}.br", "wb") as f:
+                    f.write(brotli_content)
+                    f.close()
+                sizes += f", brotli {len(brotli_content)}"
+            manifest[path] = output
+            print(f"{path} -> {output} ({sizes})")
+    with open(os.path.join(DIST_DIRECTORY, "manifest.json"), "w+", encoding="utf-8") as f:
+        f.write(json.dumps(manifest, indent=2))
+        f.close()
+    print(f"Total files: {len(manifest)}")
+
+
+if __name__ == "__main__":
+    run()
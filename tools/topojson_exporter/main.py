@@ -0,0 +1,226 @@
+"""
+ QuakeMap - Tools - topojson_exporter
+ Outputs static/topojson/NAME.json for each static/geojson/NAME.json, and reports the size reduction.
+ NOTES:
+    - Run it before static_compressor, so that the TopoJSON files are precompressed as well
+      (the Docker build runs both).
+    - The output is standard TopoJSON (shared arcs, quantized and delta-encoded coordinates),
+      decodable by topojson-client's feature().
+    - Each file has a single object named after the layer, e.g. objects.japan.
+ Report, for each layer and each of REPORT_QUANTIZATIONS:
+    NAME  GEOJSON (GZIP)  TOPOJSON (GZIP)  REDUCTION
+"""
+import gzip
+import json
+import os
+import traceback
+
+GEOJSON_DIRECTORY = "../../static/geojson"
+TOPOJSON_DIRECTORY = "../../static/topojson"
+# The quantization written out; more steps keep more precision
+QUANTIZATION = 100000
+REPORT_QUANTIZATIONS = [10000, 100000, 1000000]
+
+Point = tuple[int, int]
+
+
+class Topology:
+    """
+    Converts the GeoJSON geometries of one layer into a TopoJSON topology.
+    """
+
+    def __init__(self, geometries: list[dict], quantization: int):
+        self.geometries = geometries
+        points = [point for geometry in geometries for point in self._points(geometry)]
+        self.x0 = min(i[0] for i in points)
+        self.y0 = min(i[1] for i in points)
+        self.kx = (max(i[0] for i in points) - self.x0) / (quantization - 1) or 1
+        self.ky = (max(i[1] for i in points) - self.y0) / (quantization - 1) or 1
+        self.arcs: list[list[Point]] = []
+        self._arc_index: dict[tuple[Point, ...], int] = {}
+        self._neighbors: dict[Point, tuple[Point, Point]] = {}
+        self._junctions: set[Point] = set()
+
+    @staticmethod
+    def _points(geometry: dict) -> list[list[float]]:
+        coordinates = geometry["coordinates"]
+        if geometry["type"] == "LineString":
+            return coordinates
+        if geometry["type"] in ("Polygon", "MultiLineString"):
+            return [point for part in coordinates for point in part]
+        if geometry["type"] == "MultiPolygon":
+            return [point for polygon in coordinates for ring in polygon for point in ring]
+        return []
+
+    def _quantize(self, line: list[list[float]], ring: bool) -> list[Point]:
+        """
+        Quantizes a line, removing the points that collapse into the previous one (and a ring's closing point).
+        """
+        quantized: list[Point] = []
+        for x, y, *_ in line:
+            point = (round((x - self.x0) / self.kx), round((y - self.y0) / self.ky))
+            if not quantized or quantized[-1] != point:
+                quantized.append(point)
+        if ring and len(quantized) > 1 and quantized[0] == quantized[-1]:
+            quantized.pop()
+        return quantized
+
+    def _visit(self, line: list[Point], ring: bool) -> None:
+        """
+        Marks the points where lines join or split as junctions.
+        A point shared with the same neighbors (a shared border) is not a junction.
+        """
+        if not ring:
+            self._junctions.add(line[0])
+            self._junctions.add(line[-1])
+        count = len(line)
+        for index, point in enumerate(line):
+            if not ring and index in (0, count - 1):
+                continue
+            neighbors = (line[index - 1], line[(index + 1) % count])
+            seen = self._neighbors.setdefault(point, neighbors)
+            if seen != neighbors and seen != neighbors[::-1]:
+                self._junctions.add(point)
+
+    def _reference(self, arc: list[Point]) -> int:
+        """
+        Gets the index of an arc, adding it if neither it nor its reverse is known.
+        :return: The index, or ~index for the reversed arc
+        """
+        key = tuple(arc)
+        if key in self._arc_index:
+            return self._arc_index[key]
+        if key[::-1] in self._arc_index:
+            return ~self._arc_index[key[::-1]]
+        self._arc_index[key] = len(self.arcs)
+        self.arcs.append(arc)
+        return len(self.arcs) - 1
+
+    def _cut(self, line: list[Point], ring: bool) -> list[int]:
+        """
+        Cuts a line at its junctions into arcs.
+        :return: The arc references
+        """
+        if ring:
+            starts = [index for index, point in enumerate(line) if point in self._junctions]
+            if not starts:
+                # A ring joining nothing: one closed arc, starting at its smallest point so that
+                # the same ring is found in either direction.
+                start = line.index(min(line))
+                return [self._reference(line[start:] + line[:start + 1])]
+            line = line[starts[0]:] + line[:starts[0]] + [line[starts[0]]]
+        references = []
+        arc = [line[0]]
+        for point in line[1:]:
+            arc.append(point)
+            if point in self._junctions:
+                references.append(self._reference(arc))
+                arc = [point]
+        if len(arc) > 1:
+            references.append(self._reference(arc))
+        return references
+
+    def _parts(self, geometry: dict) -> list[tuple[list[Point], bool, tuple[int, ...]]]:
+        """
+        Gets the lines of a geometry, with whether they are rings and their position in the geometry.
+        """
+        coordinates = geometry["coordinates"]
+        geometry_type = geometry["type"]
+        if geometry_type == "LineString":
+            return [(self._quantize(coordinates, False), False, ())]
+        if geometry_type == "MultiLineString":
+            return [(self._quantize(line, False), False, (i,)) for i, line in enumerate(coordinates)]
+        if geometry_type == "Polygon":
+            return [(self._quantize(ring, True), True, (i,)) for i, ring in enumerate(coordinates)]
+        if geometry_type == "MultiPolygon":
+            return [(self._quantize(ring, True), True, (i, j))
+                    for i, polygon in enumerate(coordinates) for j, ring in enumerate(polygon)]
+        return []
+
+    def build(self, name: str, properties: list[dict]) -> dict:
+        """
+        Builds the topology.
+        :param name: The object name
+        :param properties: The properties of each geometry
+        :return: The TopoJSON
+        """
+        parts = [[part for part in self._parts(geometry) if len(part[0]) >= (3 if part[1] else 2)]
+                 for geometry in self.geometries]
+        for geometry_parts in parts:
+            for line, ring, _ in geometry_parts:
+                self._visit(line, ring)
+        output_geometries = []
+        for geometry, geometry_parts, geometry_properties in zip(self.geometries, parts, properties):
+            output: dict = {"type": geometry["type"]}
+            if geometry["type"] in ("LineString", "Polygon", "MultiLineString"):
+                output["arcs"] = [self._cut(line, ring) for line, ring, _ in geometry_parts]
+                if geometry["type"] == "LineString":
+                    output["arcs"] = output["arcs"][0] if output["arcs"] else []
+            elif geometry["type"] == "MultiPolygon":
+                polygons: dict[int, list[list[int]]] = {}
+                for line, ring, position in geometry_parts:
+                    polygons.setdefault(position[0], []).append(self._cut(line, ring))
+                output["arcs"] = [polygons[i] for i in sorted(polygons)]
+            else:
+                output = {"type": None}
+            if geometry_properties:
+                output["properties"] = geometry_properties
+            output_geometries.append(output)
+        return {
+            "type": "Topology",
+            "transform": {"scale": [self.kx, self.ky], "translate": [self.x0, self.y0]},
+            "objects": {name: {"type": "GeometryCollection", "geometries": output_geometries}},
+            "arcs": [self._delta(arc) for arc in self.arcs]
+        }
+
+    @staticmethod
+    def _delta(arc: list[Point]) -> list[list[int]]:
+        encoded = [list(arc[0])]
+        for previous, point in zip(arc, arc[1:]):
+            encoded.append([point[0] - previous[0], point[1] - previous[1]])
+        return encoded
+
+
+def convert(content: dict, name: str, quantization: int) -> bytes:
+    """
+    Converts a GeoJSON FeatureCollection or GeometryCollection into TopoJSON.
+    """
+    if content["type"] == "GeometryCollection":
+        geometries, properties = content["geometries"], [{} for _ in content["geometries"]]
+    else:
+        features = content["features"]
+        geometries = [i.get("geometry") or {"type": None, "coordinates": []} for i in features]
+        properties = [i.get("properties") or {} for i in features]
+    topology = Topology(geometries, quantization).build(name, properties)
+    return json.dumps(topology, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def run():
+    os.makedirs(TOPOJSON_DIRECTORY, exist_ok=True)
+    print(f"{'NAME':<28}{'GEOJSON (GZIP)':>24}{'Q':>10}{'TOPOJSON (GZIP)':>24}{'REDUCTION':>12}")
+    for file_name in sorted(os.listdir(GEOJSON_DIRECTORY)):
+        name, _ = os.path.splitext(file_name)
+        try:
+            with open(os.path.join(GEOJSON_DIRECTORY, file_name), "rb") as f:
+                raw_content = f.read()
+                f.close()
+            content = json.loads(raw_content)
+        except Exception:
+            print(f"Failed to read {file_name}.")
+            traceback.print_exc()
+            return
+        raw_gzip = len(gzip.compress(raw_content, mtime=0))
+        for quantization in REPORT_QUANTIZATIONS:
+            output = convert(content, name, quantization)
+            output_gzip = len(gzip.compress(output, mtime=0))
+            print(f"{name:<28}{f'{len(raw_content)} ({raw_gzip})':>24}{quantization:>10}"
+                  f"{f'{len(output)} ({output_gzip})':>24}{f'{1 - output_gzip / raw_gzip:.1%}':>12}")
+            if quantization == QUANTIZATION:
+                with open(os.path.join(TOPOJSON_DIRECTORY, file_name), "wb") as f:
+                    f.write(output)
+                    f.close()
+    print("Reduction compares the gzip sizes.")
+
+
+if __name__ == "__main__":
+    run()